@@ -1,26 +1,38 @@
-def main() -> int:
+from typing import Optional
+
+#: The available commands. The ``run`` command is used when no command is specified.
+COMMANDS = ('run', 'batch', 'worker', 'snapshot')
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     import argparse
+    import sys
     from pathlib import Path
 
+    from .async_executor import AsyncExecutor
     from .core import Project
+    from .dedupe import DEDUPE_SCOPES, SCOPE_TEMPLATE
     from .executor import Executor
-
-    parser = argparse.ArgumentParser('differ')
-    parser.add_argument('-v', '--verbose', action='store_true', help='verbose log output')
-    parser.add_argument(
-        '-s',
-        '--report-successes',
-        action='store_true',
-        help='write a report for both successful and failed traces',
+    from .retention import KEEP_ALL, KEEP_MODES
+    from .util import SAMPLE_DIR, discover_projects
+    from .workqueue import DEFAULT_LEASE_SECONDS, WorkQueue
+    from .workspace import (
+        TMPFS_DIRECTORY,
+        WORKSPACE_DISK,
+        WORKSPACE_MODES,
+        WORKSPACE_TMPFS,
     )
-    parser.add_argument(
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-v', '--verbose', action='store_true', help='verbose log output')
+    common.add_argument(
         '-r',
         '--report-dir',
         action='store',
         default='./reports',
         help='report directory where traces are executed from and reports are stored',
     )
-    parser.add_argument(
+    common.add_argument(
         '-m',
         '--max-permutations',
         action='store',
@@ -28,25 +40,319 @@ def main() -> int:
         type=int,
         help='maximum number of variable permutations to run per template',
     )
-    parser.add_argument('-f', '--force', action='store_true', help='overwrite existing reports')
-    parser.add_argument('project_filename', help='project YAML file to run')
+    common.add_argument(
+        '--network-namespace',
+        action='store_true',
+        help='run every trace within a private network namespace',
+    )
+    common.add_argument(
+        '--seed',
+        action='store',
+        type=int,
+        help='seed used to generate the trace context variable values',
+    )
+    common.add_argument(
+        '--cache',
+        action='store',
+        help='directory of a persistent cache of original binary trace results that are reused '
+        'across runs',
+    )
+    common.add_argument('-f', '--force', action='store_true', help='overwrite existing reports')
+
+    execution = argparse.ArgumentParser(add_help=False)
+    execution.add_argument(
+        '-s',
+        '--report-successes',
+        action='store_true',
+        help='write a report for both successful and failed traces',
+    )
+    execution.add_argument(
+        '-j',
+        '--jobs',
+        action='store',
+        default=1,
+        type=int,
+        help='number of trace contexts to run in parallel',
+    )
+    execution.add_argument(
+        '--parallel-debloaters',
+        action='store_true',
+        help='run the debloated binaries of each trace context concurrently',
+    )
+    execution.add_argument(
+        '--async',
+        action='store_true',
+        dest='async_executor',
+        help='supervise the trace contexts from a single asyncio event loop instead of a process '
+        'pool',
+    )
+    execution.add_argument(
+        '--resume',
+        action='store_true',
+        help='resume an interrupted run, skipping the trace contexts that have already completed',
+    )
+    execution.add_argument(
+        '--max-errors-per-template',
+        action='store',
+        default=0,
+        type=int,
+        help='stop scheduling the trace contexts of a template once it has reported this many '
+        'errors',
+    )
+    execution.add_argument(
+        '--max-errors-per-debloater',
+        action='store',
+        default=0,
+        type=int,
+        help='stop running a debloated binary once this many of its traces have failed',
+    )
+    execution.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='stop scheduling trace contexts after the first error',
+    )
+    execution.add_argument(
+        '--dedupe',
+        action='store',
+        choices=DEDUPE_SCOPES,
+        default=SCOPE_TEMPLATE,
+        help='skip trace contexts whose rendered inputs duplicate an earlier trace context within '
+        'the same template, within the project, or never (default: template)',
+    )
+    execution.add_argument(
+        '--time-budget',
+        action='store',
+        type=float,
+        default=0.0,
+        metavar='SECONDS',
+        help='wall-clock time budget of each project, which is split across its templates. Trace '
+        'contexts are not started once the budget is exhausted (default: no limit)',
+    )
+    execution.add_argument(
+        '--template-time-budget',
+        action='store',
+        type=float,
+        default=0.0,
+        metavar='SECONDS',
+        help="default wall-clock time budget of each template, overridden by the template's "
+        '"time_budget" setting (default: no limit)',
+    )
+    execution.add_argument(
+        '--workspace',
+        action='store',
+        choices=WORKSPACE_MODES,
+        default=WORKSPACE_DISK,
+        help='run the trace contexts within the report directory, disk, or within a memory-backed '
+        'directory, tmpfs, that only persists the trace contexts with an error, a crash, or a '
+        'success report to the report directory (default: disk)',
+    )
+    execution.add_argument(
+        '--workspace-max-size',
+        action='store',
+        type=int,
+        default=1024,
+        metavar='MB',
+        help='maximum size of the tmpfs workspace, in megabytes. Trace contexts run within the '
+        'report directory once the workspace is full, 0 for no limit (default: 1024)',
+    )
+    execution.add_argument(
+        '--keep',
+        action='store',
+        choices=KEEP_MODES,
+        default=KEEP_ALL,
+        help='keep the directory of every trace context, all, or only the trace contexts with an '
+        'error or a crash, failures (default: all)',
+    )
+    execution.add_argument(
+        '--keep-runs',
+        action='store',
+        type=int,
+        default=1,
+        metavar='N',
+        help='keep the report directories of the last N runs of each project, including the '
+        'current run. Previous runs are renamed to "{project}.run-{timestamp}" (default: 1)',
+    )
+    execution.add_argument(
+        '--max-disk-usage',
+        action='store',
+        type=int,
+        default=0,
+        metavar='MB',
+        help='maximum size of each project report directory, in megabytes. Once it is reached, '
+        'the directories of passing trace contexts are removed (default: no limit)',
+    )
+    execution.add_argument(
+        '--archive',
+        action='store_true',
+        dest='archive_artifacts',
+        help='pack the output files of each finished trace context into a compressed archive',
+    )
 
-    args = parser.parse_args()
-    app = Executor(
+    parser = argparse.ArgumentParser('differ')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser(
+        'run', parents=[common, execution], help='run a project (the default command)'
+    )
+    run_parser.add_argument('project_filename', help='project YAML file to run')
+    run_parser.add_argument(
+        '--golden',
+        action='store',
+        help='golden snapshot archive of the original binary traces, only the debloated binaries '
+        'are executed',
+    )
+    run_parser.add_argument(
+        '--queue',
+        action='store',
+        help='publish the trace contexts to a work queue database and collect the results from '
+        'worker processes',
+    )
+
+    batch_parser = commands.add_parser(
+        'batch',
+        parents=[common, execution],
+        help='run every project within a directory using a shared worker pool',
+    )
+    batch_parser.add_argument(
+        'projects_dir',
+        nargs='?',
+        default=str(SAMPLE_DIR),
+        help='directory that contains a subdirectory for each project (default: samples)',
+    )
+
+    worker_parser = commands.add_parser(
+        'worker', parents=[common], help='run trace contexts that are published to a work queue'
+    )
+    worker_parser.add_argument(
+        '--queue', action='store', required=True, help='work queue database'
+    )
+    worker_parser.add_argument(
+        '-s',
+        '--report-successes',
+        action='store_true',
+        help='write a report for both successful and failed traces',
+    )
+    worker_parser.add_argument(
+        '--lease',
+        action='store',
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help='number of seconds that a claimed trace context is leased before it is returned to '
+        'the queue if the worker stops renewing it',
+    )
+    worker_parser.add_argument('--worker-id', action='store', default='', help='worker id')
+
+    snapshot_parser = commands.add_parser('snapshot', help='manage golden snapshots')
+    snapshot_commands = snapshot_parser.add_subparsers(dest='snapshot_command', required=True)
+    record_parser = snapshot_commands.add_parser(
+        'record',
+        parents=[common],
+        help='run the original binary and record a golden snapshot archive',
+    )
+    record_parser.add_argument('project_filename', help='project YAML file to record')
+    record_parser.add_argument(
+        '-o', '--output', action='store', required=True, help='golden snapshot archive to create'
+    )
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] not in COMMANDS and argv[0] not in ('-h', '--help'):
+        # differ [options] project.yml
+        argv = ['run', *argv]
+
+    args = parser.parse_args(argv)
+    cache_dir = Path(args.cache) if args.cache else None
+
+    if args.command == 'snapshot':
+        app = Executor(
+            Path(args.report_dir),
+            max_permutations=args.max_permutations,
+            verbose=args.verbose,
+            overwrite_existing_report=args.force,
+            network_namespace=args.network_namespace,
+            seed=args.seed,
+            cache_dir=cache_dir,
+        )
+        app.setup()
+
+        project = Project.load(app.root, args.project_filename)
+        return app.record_snapshot(project, Path(args.output).absolute())
+
+    if args.command == 'worker':
+        app = Executor(
+            Path(args.report_dir),
+            report_successes=args.report_successes,
+            max_permutations=args.max_permutations,
+            verbose=args.verbose,
+            network_namespace=args.network_namespace,
+            seed=args.seed,
+            cache_dir=cache_dir,
+        )
+        app.setup()
+
+        app.run_worker(WorkQueue(Path(args.queue), lease_seconds=args.lease), args.worker_id)
+        return 0
+
+    executor_cls = AsyncExecutor if args.async_executor else Executor
+    golden = getattr(args, 'golden', None)
+    app = executor_cls(
         Path(args.report_dir),
         report_successes=args.report_successes,
         max_permutations=args.max_permutations,
         verbose=args.verbose,
         overwrite_existing_report=args.force,
+        jobs=args.jobs,
+        parallel_debloaters=args.parallel_debloaters,
+        network_namespace=args.network_namespace,
+        resume=args.resume,
+        seed=args.seed,
+        cache_dir=cache_dir,
+        golden=Path(golden).absolute() if golden else None,
+        max_errors_per_template=args.max_errors_per_template,
+        max_errors_per_debloater=args.max_errors_per_debloater,
+        fail_fast=args.fail_fast,
+        time_budget=args.time_budget,
+        template_time_budget=args.template_time_budget,
+        dedupe=args.dedupe,
+        workspace=TMPFS_DIRECTORY if args.workspace == WORKSPACE_TMPFS else None,
+        workspace_max_size=args.workspace_max_size * 1024 * 1024,
+        keep=args.keep,
+        keep_runs=args.keep_runs,
+        max_disk_usage=args.max_disk_usage * 1024 * 1024,
+        archive_artifacts=args.archive_artifacts,
     )
     app.setup()
 
+    if args.command == 'batch':
+        projects = discover_projects(Path(args.projects_dir), app.root)
+        summary = app.run_batch(projects)
+        print_batch_summary(summary)
+        return sum(errors for _, errors, _ in summary.values())
+
     project = Project.load(app.root, args.project_filename)
+    if args.queue:
+        queue = WorkQueue(Path(args.queue))
+        return app.run_coordinator(project, Path(args.project_filename), queue)
+
     error_count = app.run_project(project)
 
     return error_count
 
 
+def print_batch_summary(summary: dict[str, tuple[int, int, int]]) -> None:
+    """
+    Print the trace, error, and skipped trace count of each project in a batch run.
+
+    :param summary: the batch summary returned by :meth:`~differ.executor.Executor.run_batch`
+    """
+    width = max([len('project'), *(len(name) for name in summary)])
+    print(f'{"project":<{width}}  {"traces":>8}  {"errors":>8}  {"skipped":>8}')
+    for name, (trace_count, error_count, skipped_count) in summary.items():
+        print(f'{name:<{width}}  {trace_count:>8}  {error_count:>8}  {skipped_count:>8}')
+
+    totals = [sum(counts) for counts in zip(*summary.values())] or [0, 0, 0]
+    print(f'{"total":<{width}}  {totals[0]:>8}  {totals[1]:>8}  {totals[2]:>8}')
+
+
 if __name__ == '__main__':  # pragma: no cover
     import sys
 
@@ -0,0 +1,66 @@
+"""
+Compressed trace artifact archives. When trace artifacts are kept, each trace writes its standard
+output, standard error, hook scripts and their output, and packet capture to separate files. Once a
+trace context has finished, these artifacts are packed into a single LZMA compressed zip archive
+within the context directory, which reduces the inode count and disk footprint of the report tree.
+The zip central directory indexes every member, so a single artifact can be read without
+decompressing the others, see :meth:`~differ.core.Trace.read_artifact`.
+"""
+import logging
+import zipfile
+from pathlib import Path
+
+from .core import ARTIFACT_ARCHIVE_FILENAME, TraceTemplate
+
+logger = logging.getLogger(__name__)
+
+#: The filename pattern of the artifacts that differ writes to each trace directory
+ARTIFACT_PATTERN = '__differ-*'
+
+
+def artifact_files(context_dir: Path, template: TraceTemplate) -> list[Path]:
+    """
+    :param context_dir: the trace context directory
+    :param template: the trace context's template
+    :returns: the artifacts within each trace directory of a trace context
+    """
+    files = []
+    for trace_dir in sorted(context_dir.iterdir()):
+        if trace_dir.is_symlink() or not trace_dir.is_dir():
+            continue
+
+        candidates = sorted(trace_dir.glob(ARTIFACT_PATTERN))
+        if template.pcap and not template.pcap.filename.is_absolute():
+            candidates.append(trace_dir / template.pcap.filename)
+
+        files.extend(path for path in candidates if path.is_file() and not path.is_symlink())
+    return files
+
+
+def pack_context(context_dir: Path, template: TraceTemplate) -> int:
+    """
+    Pack the artifacts of a finished trace context into the context's archive and remove the
+    packed files. Each member is named by its path relative to the context directory, such as
+    ``__original__/__differ-stdout.bin``. The archive is written to a temporary file and then
+    renamed so that a partial archive is never visible.
+
+    :param context_dir: the trace context directory
+    :param template: the trace context's template
+    :returns: the number of packed artifacts
+    """
+    files = artifact_files(context_dir, template)
+    if not files:
+        return 0
+
+    archive = context_dir / ARTIFACT_ARCHIVE_FILENAME
+    temp = context_dir / f'.{ARTIFACT_ARCHIVE_FILENAME}.tmp'
+    with zipfile.ZipFile(temp, 'w', compression=zipfile.ZIP_LZMA) as file:
+        for path in files:
+            file.write(path, path.relative_to(context_dir).as_posix())
+
+    temp.rename(archive)
+    for path in files:
+        path.unlink()
+
+    logger.debug('packed %d trace artifacts: %s', len(files), archive)
+    return len(files)
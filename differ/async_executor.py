@@ -0,0 +1,424 @@
+"""
+An executor that supervises every in-flight trace from a single asyncio event loop. Trace processes
+are launched with :class:`subprocess.Popen`, so hooks and comparators receive the same
+:attr:`~differ.core.Trace.process` object as with the :class:`~differ.executor.Executor`, but the
+executor waits on a pidfd for each process rather than polling ``waitpid`` every millisecond. The
+blocking preparation and comparison steps are offloaded to worker threads.
+"""
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Collection, Iterable, Iterator, Optional, Sequence
+
+from .core import (
+    ConcurrentHookMode,
+    DebloatedBinary,
+    Project,
+    ReadinessProbe,
+    Trace,
+    TraceContext,
+)
+from .executor import Executor
+
+logger = logging.getLogger(__name__)
+
+#: The interval, in seconds, between wait status checks on systems that do not support pidfds
+POLL_INTERVAL = 0.01
+
+
+class AsyncExecutor(Executor):
+    """
+    Project executor that runs up to ``jobs`` trace contexts concurrently within an asyncio event
+    loop. The timeout, concurrent hook, and ``ConcurrentHookMode.client`` semantics are identical
+    to the :class:`~differ.executor.Executor`.
+    """
+
+    def run_batch_contexts(
+        self,
+        items: Iterable[tuple[Project, TraceContext]],
+        projects: Optional[Sequence[Project]] = None,
+    ) -> Iterator[tuple[Project, TraceContext, int]]:
+        """
+        Run trace contexts, which may belong to different projects, within an event loop and yield
+        each context along with its error count as it completes. At most ``jobs`` contexts are
+        executed at the same time, the contexts are started in order, and ``items`` is only
+        consumed as contexts are started.
+
+        Contexts that are skipped because the error or time budget is exhausted, see
+        :meth:`~differ.executor.Executor.skip_context`, are not yielded.
+
+        :param items: the ``(project, context)`` tuples to run
+        :param projects: unused, the contexts are executed within the current process
+        :returns: a generator that yields a tuple of ``(project, context, error_count)``
+        """
+        loop = asyncio.new_event_loop()
+        pending_items = iter(items)
+        tasks: dict[asyncio.Task, tuple[Project, TraceContext]] = {}
+
+        def start_next() -> Optional[asyncio.Task]:
+            for project, context in pending_items:
+                task = loop.create_task(self._run_budgeted_context(project, context))
+                tasks[task] = (project, context)
+                return task
+            return None
+
+        # a new context is only generated and started once a running context completes
+        while len(tasks) < max(self.jobs, 1) and start_next():
+            pass
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for task in done:
+                    project, context = tasks.pop(task)
+                    errors = task.result()
+                    if next_task := start_next():
+                        pending.add(next_task)
+                    if errors is not None:
+                        yield project, context, errors
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+    async def _run_budgeted_context(
+        self, project: Project, context: TraceContext
+    ) -> Optional[int]:
+        """
+        :returns: the number of errors for the context, or ``None`` if the context was skipped
+            because the error or time budget is exhausted
+        """
+        # the budgets are checked once the context is ready to start
+        if self.skip_context(project, context):
+            return None
+
+        skip_debloaters = self.budget.skipped_debloaters(project)
+        errors = await self.run_context_async(project, context, skip_debloaters)
+        # record the result before the next context is started
+        self.budget.record(project, context, errors)
+        return errors
+
+    async def run_context_async(
+        self, project: Project, context: TraceContext, skip_debloaters: Collection[str] = ()
+    ) -> int:
+        """
+        Run a trace context against the original binary and each debloated binary. This is the
+        asynchronous equivalent of :meth:`~differ.executor.Executor.run_context`.
+
+        :param skip_debloaters: the engines of the debloated binaries that are not executed
+
+        :returns: the number of errors for the context
+        """
+        logger.debug('running trace context: %s', context)
+        await asyncio.to_thread(self.create_context_directory, project, context)
+        errors: Optional[int] = None
+        try:
+            errors = await self.run_context_traces_async(project, context, skip_debloaters)
+            return errors
+        finally:
+            await asyncio.to_thread(self.finish_context, project, context, errors)
+
+    async def run_context_traces_async(
+        self, project: Project, context: TraceContext, skip_debloaters: Collection[str] = ()
+    ) -> int:
+        """
+        Run the traces of a trace context whose directory has been created. This is the
+        asynchronous equivalent of :meth:`~differ.executor.Executor.run_context_traces`.
+
+        :param skip_debloaters: the engines of the debloated binaries that are not executed
+        :returns: the number of errors for the context
+        """
+        debloaters = [
+            debloater
+            for debloater in project.debloaters.values()
+            if debloater.engine not in skip_debloaters
+        ]
+        parallel = self.run_debloaters_concurrently(context.template, len(debloaters))
+
+        # First, run the original trace and verify it worked as expected
+        original_trace = await asyncio.to_thread(
+            self.create_trace, project, context, project.original, '__original__'
+        )
+        await self.run_trace_async(project, original_trace, link_cwd=not parallel)
+        crash = await asyncio.to_thread(self.check_original_trace, project, original_trace)
+        if crash:
+            # The original did not behave as we expected and we can't trust the results of the
+            # debloated binaries. Report the crash and quit.
+            crash.save(project.crash_filename(original_trace))
+            return 1
+
+        if self.trace_cache and original_trace.cache_key:
+            # The original trace was verified, cache the results
+            await asyncio.to_thread(
+                self.trace_cache.store, original_trace, original_trace.cache_key
+            )
+
+        if parallel:
+            results = await asyncio.gather(
+                *[
+                    self.run_debloated_trace_async(
+                        project, context, original_trace, debloater, link_cwd=False
+                    )
+                    for debloater in debloaters
+                ]
+            )
+            return sum(results)
+
+        error_count = 0
+        for debloater in debloaters:
+            error_count += await self.run_debloated_trace_async(
+                project, context, original_trace, debloater
+            )
+
+        return error_count
+
+    async def run_debloated_trace_async(
+        self,
+        project: Project,
+        context: TraceContext,
+        original_trace: Trace,
+        debloater: DebloatedBinary,
+        link_cwd: bool = True,
+    ) -> int:
+        """
+        Run a debloated binary within a trace context and compare it against the original trace.
+        This is the asynchronous equivalent of
+        :meth:`~differ.executor.Executor.run_debloated_trace`.
+
+        :returns: ``1`` if the trace has an error, ``0`` otherwise
+        """
+        trace = await asyncio.to_thread(
+            self.create_trace, project, context, debloater.binary, debloater.engine
+        )
+        await self.run_trace_async(project, trace, link_cwd=link_cwd)
+        return await asyncio.to_thread(self.report_debloated_trace, project, original_trace, trace)
+
+    async def run_trace_async(self, project: Project, trace: Trace, link_cwd: bool = True) -> None:
+        """
+        Run a single trace. This is the asynchronous equivalent of
+        :meth:`~differ.executor.Executor.run_trace`.
+        """
+        logger.debug('running trace: %s', trace)
+        cwd: Optional[Path] = None
+        try:
+            args, cwd, stdin_file = await asyncio.to_thread(
+                self._prepare_trace, project, trace, link_cwd
+            )
+            if await asyncio.to_thread(self._restore_cached_trace, project, trace, cwd):
+                return
+
+            if trace.context.template.pcap:
+                # start the packet capture
+                pcap = await asyncio.to_thread(self._start_packet_capture, trace)
+            else:
+                pcap = None
+
+            try:
+                await asyncio.to_thread(self._setup_trace, trace, cwd)
+                self._launch_trace(trace, args, cwd, stdin_file)
+                await self._monitor_trace_async(trace, cwd)
+                await self._teardown_trace_async(trace, cwd)
+            finally:
+                if pcap:
+                    await asyncio.to_thread(pcap.stop)
+
+            if pcap:
+                self._check_packet_capture(trace)
+        finally:
+            await asyncio.to_thread(self._cleanup_trace, trace, cwd, link_cwd)
+
+    async def _teardown_trace_async(self, trace: Trace, cwd: Path) -> None:
+        """
+        Run the trace teardown hooks, the teardown script, and terminate the concurrent script if
+        it is still running.
+        """
+        await asyncio.to_thread(self._run_teardown_hooks, trace, cwd)
+
+        script = trace.concurrent_script
+        if script and script.returncode is None:
+            if not await self._wait_exited(script.pid, self._concurrent_script_wait_time(trace)):
+                logger.error('terminating trace concurrent script: %s', trace)
+                script.terminate()
+                await self._wait_exited(script.pid, None)
+            script.wait()
+
+    async def _monitor_trace_async(self, trace: Trace, cwd: Path) -> None:
+        """
+        Monitor the trace as it is running until it either finishes execution or the trace times
+        out and is terminated by differ.
+        """
+        assert trace.process, 'trace process is not active'
+
+        running = True
+        status = 0
+        trace.start_time = time.monotonic()
+        end_time = trace.start_time + float(trace.context.template.timeout.seconds)
+
+        concurrent = trace.context.template.concurrent
+        if concurrent and concurrent.ready:
+            # wait for the trace process to be ready before launching the concurrent script
+            running, status = await self._wait_ready_async(trace, concurrent.ready, end_time)
+        else:
+            concurrent_delay_time = trace.start_time + concurrent.delay if concurrent else 0.0
+            initial_timeout = concurrent_delay_time or end_time
+            if initial_timeout > trace.start_time:
+                running, status = await self._wait_process_async(trace.process, initial_timeout)
+
+        if running and concurrent:
+            self._launch_concurrent_script(trace, cwd)
+            running, status = await self._monitor_concurrent_mode_async(trace, end_time)
+
+        if running:
+            # timeout reached
+            logger.warning('process reached timeout; terminating: %s', trace)
+            trace.process.terminate()
+            await self._wait_exited(trace.process.pid, None)
+            _, status = os.waitpid(trace.process.pid, 0)
+            trace.timed_out = True
+
+        trace.process_status = status
+        trace.process.returncode = os.waitstatus_to_exitcode(status)
+        logger.debug('process exited with code %s: %d', trace, trace.process.returncode)
+
+    async def _wait_ready_async(
+        self, trace: Trace, probe: ReadinessProbe, end_time: float
+    ) -> tuple[bool, int]:
+        """
+        Wait for the trace process to become ready, exit, or until the probe's timeout is reached.
+        This is the asynchronous equivalent of :meth:`~differ.executor.Executor._wait_ready`.
+        """
+        assert trace.process, 'trace process is not active'  # pragma: no cover
+
+        ready_end_time = min(time.monotonic() + probe.timeout, end_time)
+        while True:
+            running, status = await self._wait_process_async(
+                trace.process, min(time.monotonic() + probe.interval, ready_end_time)
+            )
+            if not running:
+                return running, status
+
+            if probe.is_ready(trace):
+                logger.debug('trace is ready: %s', trace)
+                return running, status
+
+            if time.monotonic() >= ready_end_time:
+                logger.warning('trace did not become ready before the probe timeout: %s', trace)
+                return running, status
+
+    async def _monitor_concurrent_mode_async(
+        self, trace: Trace, end_time: float
+    ) -> tuple[bool, int]:
+        """
+        Monitor the trace honoring the concurrent script mode. The return value of this method is
+        the same as :meth:`_wait_process_async`.
+        """
+        config = trace.context.template.concurrent
+        assert config, 'no concurrent script configuration set'  # pragma: no cover
+        assert trace.process, 'Trace is not running'  # pragma: no cover
+
+        if not config.mode:
+            # no mode, wait for the trace to complete
+            return await self._wait_process_async(trace.process, end_time)
+
+        if config.mode is not ConcurrentHookMode.client:
+            raise TypeError(f'unsupported concurrent script mode: {config.mode.name}')
+
+        assert trace.concurrent_script, 'Concurrent script is not running'  # pragma: no cover
+
+        # In client mode, we wait for the concurrent script to complete instead of the trace
+        # process.
+        client_running, client_status = await self._wait_process_async(
+            trace.concurrent_script, end_time
+        )
+        if client_running:
+            # The client is still running, check to see if the trace process has terminated
+            return await self._wait_process_async(trace.process, time.monotonic() + 1.0)
+
+        logger.debug('client has completed for trace: %s', trace)
+        trace.concurrent_script.returncode = os.waitstatus_to_exitcode(client_status)
+
+        # We allow the main process the delay_time to exit on its own before we terminate it.
+        running, status = await self._wait_process_async(
+            trace.process, time.monotonic() + config.delay
+        )
+        if not running:
+            return running, status
+
+        logger.debug('terminating trace with SIGINT: %s', trace)
+        trace.process.send_signal(signal.SIGINT.value)
+        # Allow the process 5 seconds to cleanly exit
+        return await self._wait_process_async(trace.process, time.monotonic() + 5.0)
+
+    async def _wait_process_async(
+        self, process: subprocess.Popen, end_time: float
+    ) -> tuple[bool, int]:
+        """
+        Wait for the process to finish executing or until the ``end_time`` is surpassed. The
+        process is reaped if it exits.
+
+        :param process: the subprocess to wait for
+        :param end_time: the moment in time to wait until
+        :returns: a tuple containing ``(is_still_running, wait_status)``
+        """
+        if not await self._wait_exited(process.pid, end_time - time.monotonic()):
+            return True, 0
+
+        _, status = os.waitpid(process.pid, 0)
+        return False, status
+
+    async def _wait_exited(self, pid: int, timeout: Optional[float]) -> bool:
+        """
+        Wait for a child process to exit without reaping it. The process's pidfd becomes readable
+        once the process exits, so the event loop is woken only when there is something to do.
+
+        :param pid: the child process id
+        :param timeout: the maximum number of seconds to wait or ``None`` to wait indefinitely
+        :returns: ``True`` if the process has exited, ``False`` if the timeout was reached
+        """
+        try:
+            if os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT):
+                return True
+        except ChildProcessError:
+            # the process has already been reaped
+            return True
+
+        try:
+            pidfd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            # pidfds require Linux 5.3+
+            return await self._poll_exited(pid, timeout)
+
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(True))
+        try:
+            await asyncio.wait_for(exited, None if timeout is None else max(timeout, 0.0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+    async def _poll_exited(self, pid: int, timeout: Optional[float]) -> bool:
+        """
+        Fallback for :meth:`_wait_exited` that periodically checks the process wait status.
+        """
+        end_time = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT):
+                return True
+
+            if end_time is not None and time.monotonic() >= end_time:
+                return False
+
+            await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,304 @@
+"""
+Budgets stop scheduling work. Error budgets skip work that is certain to fail: a badly broken
+debloated binary fails every trace context of a template in the same way, so once a template or a
+debloated binary has exhausted its error budget the remaining work is skipped. Time budgets limit
+the wall-clock time of a project and its templates. In both cases the skipped work is recorded in
+the run summary.
+"""
+import logging
+import time
+from collections import Counter
+from typing import Optional
+
+from .core import Project, TraceContext, TraceTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorBudget:
+    """
+    Tracks the errors of each template and debloated binary within a run and decides which work
+    is skipped. A limit of ``0`` disables the corresponding budget.
+    """
+
+    def __init__(
+        self,
+        max_errors_per_template: int = 0,
+        max_errors_per_debloater: int = 0,
+        fail_fast: bool = False,
+    ):
+        """
+        :param max_errors_per_template: stop scheduling the trace contexts of a template once its
+            trace contexts have reported this many errors
+        :param max_errors_per_debloater: stop running a debloated binary within a project once this
+            many of its traces have failed
+        :param fail_fast: stop scheduling any trace context after the first error
+        """
+        self.max_errors_per_template = max_errors_per_template
+        self.max_errors_per_debloater = max_errors_per_debloater
+        self.fail_fast = fail_fast
+        #: The number of errors, keyed by ``(project name, template id)``
+        self.template_errors: Counter[tuple[str, str]] = Counter()
+        #: The number of failed traces, keyed by ``(project name, debloater engine)``
+        self.debloater_errors: Counter[tuple[str, str]] = Counter()
+        #: The number of skipped trace contexts, keyed by ``(project name, template id)``
+        self.skipped_contexts: Counter[tuple[str, str]] = Counter()
+        #: The number of skipped debloated binary traces, keyed by
+        #: ``(project name, debloater engine)``
+        self.skipped_traces: Counter[tuple[str, str]] = Counter()
+        #: An error occurred and ``fail_fast`` is enabled
+        self.stopped = False
+
+    @property
+    def enabled(self) -> bool:
+        """
+        :returns: ``True`` if any budget is configured
+        """
+        return bool(
+            self.max_errors_per_template or self.max_errors_per_debloater or self.fail_fast
+        )
+
+    def record(self, project: Project, context: TraceContext, error_count: int) -> None:
+        """
+        Record the result of a completed trace context.
+
+        :param error_count: the number of errors reported for the trace context
+        """
+        if not error_count:
+            return
+
+        if self.fail_fast and not self.stopped:
+            logger.error('stopping after the first error in trace context: %s', context)
+            self.stopped = True
+
+        key = (project.name, context.template.id)
+        previous = self.template_errors[key]
+        self.template_errors[key] += error_count
+        if previous < self.max_errors_per_template <= self.template_errors[key]:
+            logger.error(
+                'template %s exhausted its error budget of %d errors, skipping its remaining '
+                'trace contexts',
+                context.template,
+                self.max_errors_per_template,
+            )
+
+        if self.max_errors_per_debloater:
+            for engine in project.failed_engines(context.id):
+                key = (project.name, engine)
+                self.debloater_errors[key] += 1
+                if self.debloater_errors[key] == self.max_errors_per_debloater:
+                    logger.error(
+                        'debloater %s exhausted its error budget of %d errors, skipping its '
+                        'remaining traces in project %s',
+                        engine,
+                        self.max_errors_per_debloater,
+                        project.name,
+                    )
+
+    def template_exhausted(self, project: Project, template: TraceTemplate) -> bool:
+        """
+        :returns: ``True`` if no more trace contexts of the template can run, in which case the
+            remaining trace contexts do not need to be generated
+        """
+        key = (project.name, template.id)
+        exhausted = (
+            self.max_errors_per_template
+            and self.template_errors[key] >= self.max_errors_per_template
+        )
+        return bool(self.stopped or exhausted)
+
+    def skip_context(self, project: Project, context: TraceContext) -> bool:
+        """
+        Check if a trace context must be skipped because a budget has been exhausted. Skipped
+        contexts are counted in :attr:`skipped_contexts`.
+
+        :returns: ``True`` if the trace context must not be executed
+        """
+        if self.template_exhausted(project, context.template):
+            self.skipped_contexts[(project.name, context.template.id)] += 1
+            return True
+        return False
+
+    def skipped_debloaters(self, project: Project) -> list[str]:
+        """
+        Get the debloated binaries that have exhausted their budget, which are not executed within
+        the next trace context. Each skipped debloated binary is counted in
+        :attr:`skipped_traces`.
+
+        :returns: the engines of the debloated binaries to skip
+        """
+        if not self.max_errors_per_debloater:
+            return []
+
+        engines = []
+        for debloater in project.debloaters.values():
+            key = (project.name, debloater.engine)
+            if self.debloater_errors[key] >= self.max_errors_per_debloater:
+                self.skipped_traces[key] += 1
+                engines.append(debloater.engine)
+        return engines
+
+    def skipped_debloater_trace_count(self, project: Project) -> int:
+        """
+        :returns: the number of debloated binary traces that were skipped within trace contexts
+            that were executed
+        """
+        return sum(
+            skipped for (name, _), skipped in self.skipped_traces.items() if name == project.name
+        )
+
+    def skipped_trace_count(self, project: Project) -> int:
+        """
+        :returns: the total number of traces that were skipped within a project
+        """
+        traces_per_context = len(project.debloaters) + 1
+        count = sum(
+            skipped * traces_per_context
+            for (name, _), skipped in self.skipped_contexts.items()
+            if name == project.name
+        )
+        return count + self.skipped_debloater_trace_count(project)
+
+    def log_summary(self, project: Optional[Project] = None) -> None:
+        """
+        Log the work that was skipped within a project, or within every project.
+        """
+        for (name, template_id), skipped in self.skipped_contexts.items():
+            if project is None or name == project.name:
+                logger.warning(
+                    'project %s skipped %d trace contexts of template %s',
+                    name,
+                    skipped,
+                    template_id,
+                )
+
+        for (name, engine), skipped in self.skipped_traces.items():
+            if project is None or name == project.name:
+                logger.warning(
+                    'project %s skipped %d traces of debloater %s', name, skipped, engine
+                )
+
+
+class TimeBudget:
+    """
+    Wall-clock time budgets of each project and template. The trace contexts of a template are
+    scheduled until the template's deadline passes and the remaining contexts are skipped, so a
+    run that is out of time stops with the results of every context that completed. Contexts that
+    have already started are not interrupted. A budget of ``0`` disables the corresponding
+    deadline.
+
+    The templates of a project run one after another, so the time that remains in the project
+    budget is split evenly across the templates that have not started yet. A cheap template runs
+    all of its contexts early and leaves the unused time to the following templates while an
+    expensive template is stopped once it has used its share.
+    """
+
+    def __init__(self, project_seconds: float = 0.0, template_seconds: float = 0.0):
+        """
+        :param project_seconds: the time budget of each project, in seconds
+        :param template_seconds: the default time budget of each template, in seconds, which is
+            overridden by the template's ``time_budget`` setting
+        """
+        self.project_seconds = project_seconds
+        self.template_seconds = template_seconds
+        #: The :func:`time.monotonic` deadline of each project, keyed by project name
+        self.project_deadlines: dict[str, float] = {}
+        #: The :func:`time.monotonic` deadline of each template, keyed by
+        #: ``(project name, template id)``
+        self.template_deadlines: dict[tuple[str, str], float] = {}
+        #: The number of skipped trace contexts, keyed by ``(project name, template id)``
+        self.skipped_contexts: Counter[tuple[str, str]] = Counter()
+        #: The templates that ran out of time, as ``(project name, template id)`` tuples
+        self.expired: set[tuple[str, str]] = set()
+
+    def start_project(self, project: Project) -> None:
+        """
+        Start the project's time budget.
+        """
+        if self.project_seconds:
+            self.project_deadlines[project.name] = time.monotonic() + self.project_seconds
+
+    def start_template(
+        self, project: Project, template: TraceTemplate, remaining_templates: int = 1
+    ) -> None:
+        """
+        Start the template's time budget. The template's deadline is the earliest of its own
+        budget and its share of the time that remains in the project budget.
+
+        :param remaining_templates: the number of templates, including this template, that share
+            the remaining project budget
+        """
+        now = time.monotonic()
+        limits = []
+        if seconds := template.time_budget or self.template_seconds:
+            limits.append(seconds)
+
+        project_deadline = self.project_deadlines.get(project.name)
+        if project_deadline is not None:
+            limits.append(max(project_deadline - now, 0.0) / max(remaining_templates, 1))
+
+        if limits:
+            self.template_deadlines[(project.name, template.id)] = now + min(limits)
+
+    def template_exhausted(self, project: Project, template: TraceTemplate) -> bool:
+        """
+        :returns: ``True`` if the template or project is out of time, in which case the remaining
+            trace contexts do not need to be generated
+        """
+        key = (project.name, template.id)
+        if key in self.expired:
+            return True
+
+        deadlines = [
+            deadline
+            for deadline in (
+                self.template_deadlines.get(key),
+                self.project_deadlines.get(project.name),
+            )
+            if deadline is not None
+        ]
+        if not deadlines or time.monotonic() < min(deadlines):
+            return False
+
+        logger.warning(
+            'template %s ran out of time, skipping its remaining trace contexts', template
+        )
+        self.expired.add(key)
+        return True
+
+    def skip_context(self, project: Project, context: TraceContext) -> bool:
+        """
+        Check if a trace context must be skipped because its template or project is out of time.
+        Skipped contexts are counted in :attr:`skipped_contexts`.
+
+        :returns: ``True`` if the trace context must not be executed
+        """
+        if not self.template_exhausted(project, context.template):
+            return False
+
+        self.skipped_contexts[(project.name, context.template.id)] += 1
+        return True
+
+    def skipped_trace_count(self, project: Project) -> int:
+        """
+        :returns: the total number of traces that were skipped within a project
+        """
+        traces_per_context = len(project.debloaters) + 1
+        return sum(
+            skipped * traces_per_context
+            for (name, _), skipped in self.skipped_contexts.items()
+            if name == project.name
+        )
+
+    def log_summary(self, project: Optional[Project] = None) -> None:
+        """
+        Log the trace contexts that were skipped within a project, or within every project.
+        """
+        for (name, template_id), skipped in self.skipped_contexts.items():
+            if project is None or name == project.name:
+                logger.warning(
+                    'project %s ran out of time and skipped %d trace contexts of template %s',
+                    name,
+                    skipped,
+                    template_id,
+                )
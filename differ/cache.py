@@ -0,0 +1,220 @@
+"""
+A persistent, content-addressed cache of original binary trace results. The cache key is a digest
+of everything that determines how the original binary behaves: the binary's content, the rendered
+command line arguments, the content of every file within the prepared trace directory (the
+rendered stdin, input files, and hook scripts), and the template's execution configuration. A cache
+hit restores the trace directory and the process results instead of executing the binary.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import yaml
+
+from .core import Project, Trace, TraceHook
+
+logger = logging.getLogger(__name__)
+
+#: The cache format version, which is part of every cache key. Increment this when the key or the
+#: layout of a cache entry changes.
+CACHE_VERSION = 1
+
+#: Digests of previously hashed files, keyed by ``(path, size, mtime)``
+_FILE_DIGESTS: dict[tuple[str, int, int], str] = {}
+
+
+def file_digest(path: Path) -> str:
+    """
+    Compute the SHA-256 digest of a file. Digests are memoized by the file's path, size, and
+    modification time so that large binaries are only read once per process.
+
+    :param path: the file path
+    :returns: the hex digest
+    """
+    stat = path.stat()
+    memo_key = (str(path.absolute()), stat.st_size, stat.st_mtime_ns)
+    if digest := _FILE_DIGESTS.get(memo_key):
+        return digest
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            sha256.update(chunk)
+
+    digest = sha256.hexdigest()
+    _FILE_DIGESTS[memo_key] = digest
+    return digest
+
+
+def _process_state(
+    process: Union[subprocess.Popen, subprocess.CompletedProcess, None]
+) -> Optional[dict]:
+    if not process:
+        return None
+    return {'args': [str(arg) for arg in process.args], 'returncode': process.returncode}
+
+
+def _restore_process(state: Optional[dict]) -> Optional[subprocess.CompletedProcess]:
+    if not state:
+        return None
+    return subprocess.CompletedProcess(state['args'], state['returncode'])
+
+
+class TraceCache:
+    """
+    A directory of cached trace results. Each entry is stored in ``{key[:2]}/{key}/`` and contains
+    a copy of the trace directory and a ``trace.yml`` file with the process results. Entries are
+    written to a temporary directory and then renamed so that concurrent writers never expose a
+    partial entry.
+    """
+
+    #: The process results filename within a cache entry
+    STATE_FILENAME = 'trace.yml'
+    #: The trace directory copy within a cache entry
+    FILES_DIRNAME = 'files'
+
+    def __init__(self, directory: Path):
+        """
+        :param directory: the cache directory
+        """
+        self.directory = directory.absolute()
+
+    def is_cacheable(self, trace: Trace) -> bool:
+        """
+        A trace is only cacheable when none of the template's hooks run custom setup or teardown
+        actions, since their side effects cannot be restored.
+
+        :returns: ``True`` if the trace results can be cached
+        """
+        for hook in trace.context.template.hooks:
+            hook_cls = type(hook)
+            if (
+                hook_cls.setup is not TraceHook.setup
+                or hook_cls.teardown is not TraceHook.teardown
+            ):
+                return False
+        return True
+
+    def key(self, project: Project, trace: Trace, cwd: Path, network_namespace: bool) -> str:
+        """
+        Compute the cache key of a trace that has been prepared to run.
+
+        :param project: differ project
+        :param trace: the prepared trace
+        :param cwd: the directory that the trace runs from
+        :param network_namespace: the trace runs within a private network namespace
+        :returns: the cache key
+        """
+        template = trace.context.template
+        digest = hashlib.sha256()
+
+        def update(*values) -> None:
+            for value in values:
+                digest.update(repr(value).encode())
+                digest.update(b'\0')
+
+        update(CACHE_VERSION, file_digest(trace.binary.resolve()), trace.arguments, str(cwd))
+        update(project.link_filename, network_namespace)
+        update(template.timeout, template.concurrent, template.pcap, template.expect_signal)
+        update(template.script_exit_on_first_error)
+
+        for path in sorted(trace.cwd.rglob('*')):
+            name = str(path.relative_to(trace.cwd))
+            if path.is_symlink():
+                update('link', name, os.readlink(path))
+            elif path.is_dir():
+                update('dir', name)
+            else:
+                update('file', name, path.stat().st_mode & 0o7777, file_digest(path))
+
+        return digest.hexdigest()
+
+    def entry_directory(self, key: str) -> Path:
+        """
+        :returns: the directory of a cache entry
+        """
+        return self.directory / key[:2] / key
+
+    def restore(self, trace: Trace, key: str) -> bool:
+        """
+        Restore a cached trace by copying the cached trace directory into the trace's working
+        directory and setting the process results on the trace. Prepared files, other than links,
+        that the original trace removed are removed as well.
+
+        :param trace: the prepared trace
+        :param key: the cache key
+        :returns: ``True`` if the trace was restored, ``False`` if the key is not in the cache
+        """
+        entry = self.entry_directory(key)
+        state_filename = entry / self.STATE_FILENAME
+        if not state_filename.is_file():
+            return False
+
+        state = yaml.safe_load(state_filename.read_text())
+        files = entry / self.FILES_DIRNAME
+        for path in trace.cwd.rglob('*'):
+            if path.is_symlink() or path.is_dir():
+                # links, such as the binary link, are recreated each time the trace is prepared
+                continue
+            if not os.path.lexists(files / path.relative_to(trace.cwd)):
+                path.unlink()
+
+        for source in sorted(files.rglob('*')):
+            destination = trace.cwd / source.relative_to(files)
+            if source.is_symlink():
+                if not os.path.lexists(destination):
+                    destination.symlink_to(os.readlink(source))
+            elif source.is_dir():
+                destination.mkdir(exist_ok=True)
+            else:
+                # the prepared file may be a hard link to a staged input file, or read-only, so
+                # it is replaced rather than written to
+                destination.unlink(missing_ok=True)
+                shutil.copy2(source, destination)
+
+        trace.process = _restore_process(state['process'])  # type: ignore
+        trace.process_status = state['process_status']
+        trace.timed_out = state['timed_out']
+        trace.setup_script = _restore_process(state['setup_script'])
+        trace.teardown_script = _restore_process(state['teardown_script'])
+        trace.concurrent_script = _restore_process(state['concurrent_script'])  # type: ignore
+        return True
+
+    def store(self, trace: Trace, key: str) -> None:
+        """
+        Store a trace that has finished executing in the cache.
+
+        :param trace: the executed trace
+        :param key: the cache key
+        """
+        entry = self.entry_directory(key)
+        if entry.exists():
+            return
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'process': _process_state(trace.process),
+            'process_status': trace.process_status,
+            'timed_out': trace.timed_out,
+            'setup_script': _process_state(trace.setup_script),
+            'teardown_script': _process_state(trace.teardown_script),
+            'concurrent_script': _process_state(trace.concurrent_script),
+        }
+
+        staging = Path(tempfile.mkdtemp(dir=entry.parent, prefix=f'.{key}-'))
+        try:
+            shutil.copytree(trace.cwd, staging / self.FILES_DIRNAME, symlinks=True)
+            (staging / self.STATE_FILENAME).write_text(yaml.safe_dump(state))
+            staging.rename(entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(staging, ignore_errors=True)
+            if not entry.exists():
+                raise
+
+        logger.debug('stored trace in cache: %s -> %s', trace, key)
@@ -0,0 +1,112 @@
+"""
+Packet capture using ``tcpdump``. The capture is started and stopped based on the state reported by
+``tcpdump`` rather than fixed delays: startup blocks until ``tcpdump`` reports that it is listening
+on the interface and shutdown waits for the pcap file to stop growing, interrupts ``tcpdump``, and
+waits for it to flush the pcap file and exit.
+"""
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+#: The line ``tcpdump`` writes to stderr once the capture is active
+LISTENING_MESSAGE = b'listening on'
+#: The maximum amount of time, in seconds, to wait for ``tcpdump`` to start capturing
+STARTUP_TIMEOUT = 5.0
+#: The interval, in seconds, between pcap file size checks while draining the capture
+DRAIN_INTERVAL = 0.01
+#: The amount of time, in seconds, that the pcap file size must remain unchanged before the
+#: capture is considered drained
+DRAIN_QUIET_TIME = 0.05
+#: The maximum amount of time, in seconds, to wait for the capture to drain
+DRAIN_TIMEOUT = 1.0
+
+
+class PacketCapture:
+    """
+    A running ``tcpdump`` packet capture. ``tcpdump`` must be run in packet-buffered mode (``-U``)
+    so that each packet is written to the pcap file as soon as it is captured.
+    """
+
+    def __init__(self, args: list[str], pcap_path: Path, cwd: Path):
+        """
+        :param args: the ``tcpdump`` command line arguments
+        :param pcap_path: the pcap file that ``tcpdump`` writes to
+        :param cwd: the working directory
+        """
+        self.args = args
+        self.pcap_path = pcap_path
+        self.cwd = cwd
+        self.process: Optional[subprocess.Popen] = None
+        #: The ``tcpdump`` stderr output
+        self.output = b''
+
+    def start(self, timeout: float = STARTUP_TIMEOUT) -> None:
+        """
+        Launch ``tcpdump`` and block until it is listening on the interface, it exits, or the
+        ``timeout`` is reached. A warning is logged if ``tcpdump`` did not start successfully.
+        """
+        self.process = subprocess.Popen(
+            self.args,
+            cwd=str(self.cwd),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+        )
+        assert self.process.stderr
+
+        end_time = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.process.stderr, selectors.EVENT_READ)
+            while LISTENING_MESSAGE not in self.output:
+                remaining = end_time - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    logger.warning('timeout waiting for tcpdump to start: %s', self.pcap_path)
+                    return
+
+                chunk = os.read(self.process.stderr.fileno(), 4096)
+                if not chunk:
+                    logger.warning(
+                        'tcpdump exited before capturing packets: %s', self.output.decode().strip()
+                    )
+                    return
+
+                self.output += chunk
+
+    def drain(self) -> None:
+        """
+        Block until the pcap file has stopped growing, which signals that ``tcpdump`` has written
+        every packet that was in flight, or until :data:`DRAIN_TIMEOUT` is reached.
+        """
+        end_time = time.monotonic() + DRAIN_TIMEOUT
+        size = self._pcap_size()
+        quiet_since = time.monotonic()
+        while (now := time.monotonic()) < end_time and now - quiet_since < DRAIN_QUIET_TIME:
+            time.sleep(DRAIN_INTERVAL)
+            if (current := self._pcap_size()) != size:
+                size = current
+                quiet_since = time.monotonic()
+
+    def stop(self) -> None:
+        """
+        Drain the capture, interrupt ``tcpdump``, and wait for it to flush the pcap file and exit.
+        """
+        assert self.process, 'packet capture is not running'
+        if self.process.poll() is None:
+            self.drain()
+            self.process.send_signal(signal.SIGINT.value)
+
+        _, stderr = self.process.communicate()
+        self.output += stderr
+
+    def _pcap_size(self) -> int:
+        try:
+            return self.pcap_path.stat().st_size
+        except OSError:
+            return 0
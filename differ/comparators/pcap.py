@@ -3,14 +3,21 @@
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, Union
 
 from scapy.layers.inet import IP, TCP, UDP
 from scapy.packet import Packet, Raw
 from scapy.plist import PacketList
 from scapy.utils import rdpcap
 
-from differ.core import Comparator, ComparisonResult, CrashResult, Trace
+from differ.core import (
+    Comparator,
+    ComparisonResult,
+    CrashResult,
+    PortRef,
+    Trace,
+    VariableRef,
+)
 
 from . import register
 
@@ -86,8 +93,9 @@ class PcapComparatorConfig:
     filename: Path
     #: Filter packets to a specific protocol
     protocol: Protocol
-    #: Filter packets to a specific port matching on either the source or destination port
-    port: int
+    #: Filter packets to a specific port matching on either the source or destination port. This
+    #: can be a reference to a dynamically allocated trace port or to a variable.
+    port: Union[int, VariableRef]
     #: Filter packets to a specific address matching on either the source or destination address
     address: str = ''
     #: Compare flow payloads
@@ -97,17 +105,35 @@ class PcapComparatorConfig:
 
     @classmethod
     def parse(cls, config: dict) -> 'PcapComparatorConfig':
+        port = VariableRef.try_parse(PortRef.try_parse(config['port']))
         return cls(
             filename=Path(config['filename']),
             protocol=Protocol[config['protocol']],
-            port=int(config['port']),
+            port=port if isinstance(port, VariableRef) else int(port),
             address=config.get('address', ''),
             compare_payload=config.get('compare_payload', True),
             exists=config.get('exists', True),
         )
 
     def describe_filter(self) -> str:
-        return f'{self.protocol.name}/{self.address or "*"}:{self.port}'
+        return f'{self.protocol.name}/{self.address or "*"}:{self.port_label}'
+
+    @property
+    def port_label(self) -> str:
+        """
+        :returns: the port number or, for references, the referenced name in braces
+        """
+        if isinstance(self.port, VariableRef):
+            return f'{{{self.port.variable}}}'
+        return str(self.port)
+
+    def get_port(self, trace: Trace) -> int:
+        """
+        :returns: the concrete port to filter on for the trace
+        """
+        if isinstance(self.port, PortRef):
+            return self.port.get(trace.ports)
+        return int(VariableRef.deref(self.port, trace.context.values))
 
     def pcap_filename(self, trace: Trace) -> Path:
         if self.filename.is_absolute():
@@ -152,7 +178,15 @@ class PcapComparator(Comparator):
           # The port to filter packets to. After packets are filtered to the configured protocol,
           # they are further filtered based on the port, either source port or destination port.
           # Typically this will be the port that the server is listening on so that both the client
-          # and server packets are included in the comparison. This option is required.
+          # and server packets are included in the comparison. This option is required and can be
+          # a port number, a variable reference, or a reference to a port that is dynamically
+          # allocated for each trace by the template's `ports` option:
+          #
+          # port:
+          #   port: http
+          #
+          # Dynamically allocated ports differ between the original and debloated traces, so the
+          # port is replaced by its name when flows are compared.
           port: 8080
 
           # The address to filter to. Similar to the port option, packets will be filtered to only
@@ -185,11 +219,12 @@ class PcapComparator(Comparator):
 
     def verify_original(self, original: Trace) -> Optional[CrashResult]:
         filename = self.config.pcap_filename(original)
-        if not filename.is_file():
+        if not original.has_artifact(filename):
             return CrashResult(original, f'pcap file does not exist: {filename}', self)
 
-        pcap = rdpcap(filename.open('rb'))
-        packets = self._filter_pcap(pcap)
+        port = self.config.get_port(original)
+        pcap = rdpcap(original.open_artifact(filename))
+        packets = self._filter_pcap(pcap, port)
 
         if packets and not self.config.exists:
             # There are packets that we did not expect
@@ -202,17 +237,18 @@ class PcapComparator(Comparator):
                 original, f'flow does not exist in pcap: {self.config.describe_filter()}', self
             )
 
-        original.cache[self.flow_cache_key()] = self.extract_flows(packets)
+        original.cache[self.flow_cache_key()] = self.extract_flows(packets, port)
 
     def compare(self, original: Trace, debloated: Trace) -> ComparisonResult:
         original_flows = original.cache[self.flow_cache_key()]
 
         filename = self.config.pcap_filename(debloated)
-        if not filename.is_file():
+        if not debloated.has_artifact(filename):
             return ComparisonResult.error(self, debloated, f'pcap file does not exist: {filename}')
 
-        pcap = rdpcap(filename.open('rb'))
-        packets = self._filter_pcap(pcap)
+        port = self.config.get_port(debloated)
+        pcap = rdpcap(debloated.open_artifact(filename))
+        packets = self._filter_pcap(pcap, port)
 
         if not self.config.exists:
             # We expect that the flow does not exist
@@ -224,7 +260,7 @@ class PcapComparator(Comparator):
             else:
                 return ComparisonResult.success(self, debloated)
 
-        debloated_flows = self.extract_flows(packets)
+        debloated_flows = self.extract_flows(packets, port)
 
         if error := self.compare_flows(original_flows, debloated_flows):
             return ComparisonResult.error(self, debloated, error)
@@ -275,13 +311,13 @@ class PcapComparator(Comparator):
     def flow_cache_key(self) -> str:
         return f'{self.config.describe_filter()}_flows'
 
-    def extract_flows(self, packets: list[Packet]) -> list[Flow]:
+    def extract_flows(self, packets: list[Packet], port: Optional[int] = None) -> list[Flow]:
         flows_lookup: dict[str, Flow] = {}
         flows: list[Flow] = []
         proto = self.config.protocol.value
         for pkt in packets:
-            source = f'{pkt[IP].src}:{pkt[proto].sport}'
-            dest = f'{pkt[IP].dst}:{pkt[proto].dport}'
+            source = self._endpoint(pkt[IP].src, pkt[proto].sport, port)
+            dest = self._endpoint(pkt[IP].dst, pkt[proto].dport, port)
             key = '|'.join(sorted([source, dest]))
             flow = flows_lookup.get(key)
             if not flow:
@@ -299,11 +335,20 @@ class PcapComparator(Comparator):
 
         return flows
 
-    def _filter_pcap(self, pcap: PacketList) -> list[Packet]:
+    def _endpoint(self, address: str, port: int, filter_port: Optional[int]) -> str:
+        if port == filter_port and isinstance(self.config.port, PortRef):
+            # Dynamically allocated ports differ between traces so the port name is used instead
+            return f'{address}:{self.config.port_label}'
+        return f'{address}:{port}'
+
+    def _filter_pcap(self, pcap: PacketList, port: Optional[int] = None) -> list[Packet]:
         proto = self.config.protocol.value
+        if port is None:
+            assert isinstance(self.config.port, int), 'the port reference is not resolved'
+            port = self.config.port
         checks: list[Callable[[Packet], bool]] = [
             lambda pkt: proto in pkt and IP in pkt,
-            lambda pkt: self.config.port in (pkt[proto].sport, pkt[proto].dport),
+            lambda pkt: port in (pkt[proto].sport, pkt[proto].dport),
         ]
 
         if self.config.address:
@@ -273,7 +273,9 @@ class HookScriptComparator(Comparator):
                 f'debloated={debloated_proc.returncode}',
             )
 
-        if self.output and original_output.read_bytes() != debloated_output.read_bytes():
+        if self.output and (
+            original.read_artifact(original_output) != debloated.read_artifact(debloated_output)
+        ):
             return ComparisonResult.error(
                 f'{self.id}[output]',
                 debloated,
@@ -1,20 +1,31 @@
+import errno
 import os
+import re
 import shlex
 import signal
 import subprocess
+import zipfile
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import cached_property
 from itertools import chain
 from pathlib import Path
-from typing import Any, Iterator, Optional, Union
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterator, Optional, Sequence, Union
 from uuid import uuid4
 
 import jinja2
 import yaml
 
+from .ports import is_port_listening
 from .template import JINJA_ENVIRONMENT
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .namespace import NetworkNamespace
+
+#: The filename of the compressed archive that the artifacts of a trace context are packed into,
+#: see :mod:`differ.archive`
+ARTIFACT_ARCHIVE_FILENAME = 'artifacts.zip'
+
 
 class TraceHook:
     """
@@ -89,12 +100,52 @@ class Project:
         """
         return self.context_directory(context) / debloater_engine
 
+    def staging_directory(self) -> Path:
+        """
+        :returns: the directory of the project's staged static input files, see
+            :class:`~differ.staging.InputStager`
+        """
+        return self.directory / '.staged-inputs'
+
     def crash_filename(self, trace: 'Trace') -> Path:
         """
         :returns: the crash report filename when the original binary does not behave correctly
         """
         return self.directory / f'crash-{trace.debloater_engine}-{trace.context.id}.yml'
 
+    def alias_filename(self, context_id: str) -> Path:
+        """
+        :returns: the filename that records the earlier trace context that a duplicate trace
+            context aliases
+        """
+        return self.directory / f'alias-{context_id}.yml'
+
+    def context_result_files(self, context_id: str) -> list[Path]:
+        """
+        :returns: the report and crash filenames that a trace context may produce for the original
+            binary and each debloated binary
+        """
+        files = []
+        for engine in ['__original__', *(item.engine for item in self.debloaters.values())]:
+            files.append(self.directory / f'crash-{engine}-{context_id}.yml')
+            files.append(self.directory / f'report-{engine}-success-{context_id}.yml')
+            files.append(self.directory / f'report-{engine}-error-{context_id}.yml')
+        return files
+
+    def failed_engines(self, context_id: str) -> list[str]:
+        """
+        :returns: the engines of the debloated binaries that reported an error or a crash within a
+            trace context
+        """
+        engines = []
+        for debloater in self.debloaters.values():
+            engine = debloater.engine
+            if (self.directory / f'report-{engine}-error-{context_id}.yml').exists() or (
+                self.directory / f'crash-{engine}-{context_id}.yml'
+            ).exists():
+                engines.append(engine)
+        return engines
+
     def report_filename(self, trace: 'Trace', successful: bool) -> Path:
         """
         :returns: the report filename for a trace
@@ -235,9 +286,14 @@ class InputFile:
     mode: Optional[str] = None
     #: The file is static and should not be generated using the trace context variables.
     static: bool = False
+    #: The file is binary, such as a compressed archive, and is copied byte for byte rather than
+    #: rendered as a template. Binary input files are always static.
+    binary: bool = False
 
     def __post_init__(self) -> None:
         self._template: Optional[jinja2.Template] = None
+        if self.binary:
+            self.static = True
 
     def resolve_source(self, cwd: Path) -> None:
         """
@@ -252,9 +308,13 @@ class InputFile:
     @cached_property
     def template(self) -> jinja2.Template:
         """
-        :returns: the Jinja2 template object for the input file
+        :returns: the Jinja2 template object for the input file. Bytes that are not valid UTF-8
+            are decoded as surrogates, so they are written back unchanged when the rendered
+            content is encoded with ``errors='surrogateescape'``.
         """
-        return JINJA_ENVIRONMENT.from_string(self.source.read_text())
+        return JINJA_ENVIRONMENT.from_string(
+            self.source.read_text(encoding='utf-8', errors='surrogateescape')
+        )
 
     @classmethod
     def load_dict(cls, body: Union[dict, str]) -> 'InputFile':
@@ -277,6 +337,7 @@ class InputFile:
             destination=Path(destination) if destination else None,
             mode=mode,
             static=body.get('static', False),
+            binary=body.get('binary', False),
         )
 
     def get_destination(self, cwd: Path) -> Path:
@@ -333,6 +394,66 @@ class ConcurrentHookMode(Enum):
         return cls(val)
 
 
+@dataclass
+class ReadinessProbe:
+    """
+    A check that determines when the trace process is ready for the concurrent script to start.
+    The probe is checked every ``interval`` seconds and the concurrent script is launched as soon
+    as every configured check passes.
+    """
+
+    #: The TCP port that the trace process listens on once it is ready. A string is the name of a
+    #: port allocated by the template's ``ports`` option.
+    port: Union[int, str, None] = None
+    #: A file, relative to the trace directory, that exists once the trace process is ready
+    file: Optional[str] = None
+    #: A regex that matches the trace process stdout once it is ready
+    stdout: Optional[re.Pattern] = None
+    #: The interval, in seconds, between checks
+    interval: float = 0.05
+    #: The maximum amount of time, in seconds, to wait for the trace process to become ready. The
+    #: concurrent script is launched once the timeout is reached regardless.
+    timeout: float = 10.0
+
+    @classmethod
+    def load_dict(cls, body: dict) -> 'ReadinessProbe':
+        port = body.get('port')
+        if isinstance(port, str) and port.isdigit():
+            port = int(port)
+        if isinstance(port, int) and not 0 < port < 65536:
+            raise ValueError(f'invalid readiness probe port: {port}')
+
+        probe = cls(
+            port=port,
+            file=body.get('file'),
+            stdout=re.compile(body['stdout'].encode()) if body.get('stdout') else None,
+            interval=float(body.get('interval', 0.05)),
+            timeout=float(body.get('timeout', 10.0)),
+        )
+        if probe.port is None and not probe.file and not probe.stdout:
+            raise ValueError('readiness probe requires at least one of: port, file, stdout')
+        return probe
+
+    def is_ready(self, trace: 'Trace') -> bool:
+        """
+        :returns: ``True`` if every configured check passes for the running trace
+        """
+        assert trace.process, 'trace process is not active'  # pragma: no cover
+
+        if self.port is not None:
+            port = trace.ports[self.port] if isinstance(self.port, str) else self.port
+            if not is_port_listening(trace.process.pid, port):
+                return False
+
+        if self.file and not (trace.cwd / self.file).exists():
+            return False
+
+        if self.stdout and not self.stdout.search(trace.stdout_path.read_bytes()):
+            return False
+
+        return True
+
+
 @dataclass
 class ConcurrentHook:
     """
@@ -341,7 +462,8 @@ class ConcurrentHook:
 
     #: The bash script to execute
     run: str
-    #: The delay time, in seconds, prior to launching the concurrent process
+    #: The delay time, in seconds, prior to launching the concurrent process. A configured
+    #: readiness probe replaces this delay.
     delay: float = 1.0
     #: The connect script mode
     mode: Optional[ConcurrentHookMode] = None
@@ -349,6 +471,9 @@ class ConcurrentHook:
     #: useful for testing network clients where the server needs some time to start and be ready to
     #: accept incoming connections.
     retries: int = 0
+    #: Launch the concurrent process as soon as the trace process is ready, rather than after the
+    #: fixed ``delay``
+    ready: Optional[ReadinessProbe] = None
 
     @classmethod
     def load_dict(cls, body: Union[str, dict]) -> 'ConcurrentHook':
@@ -359,6 +484,7 @@ class ConcurrentHook:
             float(body.get('delay', 1.0)),
             mode=ConcurrentHookMode.parse(body.get('mode')),
             retries=body.get('retries', 0),
+            ready=ReadinessProbe.load_dict(body['ready']) if body.get('ready') else None,
         )
 
 
@@ -372,10 +498,23 @@ class PcapConfig:
     filename: Path
     #: The network interface to capture on
     interface: str
+    #: The network interface to capture on when the trace is running within a private network
+    #: namespace, which only contains a loopback interface.
+    namespace_interface: str = 'lo'
 
     @classmethod
     def parse(cls, body: dict) -> 'PcapConfig':
-        return cls(filename=Path(body['filename']), interface=body['interface'])
+        return cls(
+            filename=Path(body['filename']),
+            interface=body['interface'],
+            namespace_interface=body.get('namespace_interface', 'lo'),
+        )
+
+    def get_interface(self, trace: 'Trace') -> str:
+        """
+        :returns: the network interface to capture on for the trace
+        """
+        return self.namespace_interface if trace.network_namespace else self.interface
 
 
 @dataclass
@@ -415,6 +554,28 @@ class TraceTemplate:
     expect_signal: int = 0
     #: Packet capture configuration
     pcap: Optional[PcapConfig] = None
+    #: Network ports that are dynamically allocated for each trace. The key is the port name and
+    #: the value is the protocol, either ``tcp`` or ``udp``. Allocated ports are available to
+    #: Jinja2 templates as ``{{trace.ports.<name>}}``.
+    ports: dict[str, str] = field(default_factory=dict)
+    #: Run each trace, and its setup, concurrent, and teardown scripts, within a private user and
+    #: network namespace so that traces binding to the same fixed port can run at the same time.
+    network_namespace: bool = False
+    #: Run the debloated binaries of each trace context concurrently once the original trace has
+    #: been verified. Every trace of the context then runs from its own trace directory rather
+    #: than the shared ``current_trace`` link, so this must only be enabled for templates whose
+    #: output does not depend on the working directory path.
+    parallel_debloaters: bool = False
+    #: The wall-clock time budget of the template, in seconds. Trace contexts of the template are
+    #: not started once the budget is exhausted. ``0`` uses the ``--template-time-budget`` option.
+    time_budget: float = 0.0
+    #: The parameter generator that produces the variable values of each trace context, see
+    #: :data:`~differ.parameters.PARAMETER_GENERATOR_REGISTRY`. The YAML may either be the
+    #: generator name or a dictionary with a ``type`` key that contains the generator name and the
+    #: generator's options.
+    generator: str = 'combination'
+    #: The parameter generator options
+    generator_config: dict = field(default_factory=dict)
     #: User supplied name
     name: str = ''
     #: A brief summary of the template
@@ -564,6 +725,35 @@ class TraceTemplate:
         else:
             pcap = None
 
+        ports_config = body.get('ports') or {}
+        if isinstance(ports_config, list):
+            ports_config = {name: 'tcp' for name in ports_config}
+
+        ports: dict[str, str] = {}
+        for name, protocol in ports_config.items():
+            if protocol not in ('tcp', 'udp'):
+                raise ValueError(f'invalid protocol for port {name}: {protocol}')
+            ports[name] = protocol
+
+        ready = concurrent.ready if concurrent else None
+        if ready and isinstance(ready.port, str) and ready.port not in ports:
+            # the port is looked up in the trace's allocated ports once the trace is running
+            raise ValueError(f'readiness probe port is not a template port: {ready.port}')
+
+        generator_config = body.get('generator') or {}
+        if isinstance(generator_config, dict):
+            generator_config = dict(generator_config)
+            generator = generator_config.pop('type', 'combination')
+        else:
+            generator = str(generator_config)
+            generator_config = {}
+
+        # imported here since the parameters module depends on this module
+        from .parameters import PARAMETER_GENERATOR_REGISTRY
+
+        if generator not in PARAMETER_GENERATOR_REGISTRY:
+            raise ValueError(f'invalid parameter generator: {generator}')
+
         return cls(
             arguments=arguments,
             variables=variables,
@@ -578,6 +768,12 @@ class TraceTemplate:
             script_exit_on_first_error=body.get('script_exit_on_first_error', True),
             expect_signal=expect_signal,
             pcap=pcap,
+            ports=ports,
+            network_namespace=body.get('network_namespace', False),
+            parallel_debloaters=body.get('parallel_debloaters', False),
+            time_budget=float(body.get('time_budget', 0)),
+            generator=generator,
+            generator_config=generator_config,
             summary=body.get('summary', '').strip(),
             **kwargs,
         )
@@ -644,6 +840,13 @@ class Trace:
     concurrent_script: Optional[subprocess.Popen] = None
     #: The timestamp when the trace began executing
     start_time: float = 0.0
+    #: The private network namespace that the trace processes are running within
+    network_namespace: Optional['NetworkNamespace'] = None
+    #: Network ports allocated for the trace, see :attr:`TraceTemplate.ports`
+    ports: dict[str, int] = field(default_factory=dict)
+    #: The trace result cache key, set when the trace results can be cached. See
+    #: :class:`~differ.cache.TraceCache`.
+    cache_key: str = ''
 
     def __str__(self) -> str:
         return f'{self.context.id}[{self.debloater_engine}]'
@@ -676,7 +879,7 @@ class Trace:
             if stdout is not None:
                 return stdout
 
-        stdout = self.stdout_path.read_bytes()
+        stdout = self.read_artifact(self.stdout_path)
         if cache:
             self.cache['stdout'] = stdout
         return stdout
@@ -694,11 +897,77 @@ class Trace:
             if stderr is not None:
                 return stderr
 
-        stderr = self.stderr_path.read_bytes()
+        stderr = self.read_artifact(self.stderr_path)
         if cache:
             self.cache['stderr'] = stderr
         return stderr
 
+    @cached_property
+    def artifact_archive_path(self) -> Path:
+        """
+        :returns: the path to the compressed archive of the trace context's artifacts, see
+            :func:`~differ.archive.pack_context`
+        """
+        return self.cwd.parent / ARTIFACT_ARCHIVE_FILENAME
+
+    def _archived_artifact(self, path: Path) -> Optional[str]:
+        """
+        :returns: the archive member name of an artifact, or ``None`` if the artifact can not be
+            within the archive
+        """
+        if not path.is_relative_to(self.cwd.parent) or not self.artifact_archive_path.is_file():
+            return None
+        return path.relative_to(self.cwd.parent).as_posix()
+
+    def has_artifact(self, path: Path) -> bool:
+        """
+        :param path: the artifact's path within the trace directory
+        :returns: ``True`` if the artifact exists as a file or as a member of the trace context's
+            archive
+        """
+        if path.is_file():
+            return True
+
+        if not (name := self._archived_artifact(path)):
+            return False
+
+        with zipfile.ZipFile(self.artifact_archive_path) as archive:
+            return name in archive.namelist()
+
+    def open_artifact(self, path: Path) -> BinaryIO:
+        """
+        Open an artifact of the trace for reading. The artifact is read from the trace context's
+        archive when it has been packed, see :func:`~differ.archive.pack_context`.
+
+        :param path: the artifact's path within the trace directory
+        :returns: the opened binary file
+        :raises FileNotFoundError: the artifact does not exist
+        """
+        try:
+            return path.open('rb')
+        except FileNotFoundError:
+            if not (name := self._archived_artifact(path)):
+                raise
+
+        with zipfile.ZipFile(self.artifact_archive_path) as archive:
+            try:
+                # the member remains readable after the archive is closed
+                return archive.open(name)  # type: ignore
+            except KeyError:
+                raise FileNotFoundError(
+                    errno.ENOENT, os.strerror(errno.ENOENT), str(path)
+                ) from None
+
+    def read_artifact(self, path: Path) -> bytes:
+        """
+        Read the content of an artifact of the trace, see :meth:`open_artifact`.
+
+        :param path: the artifact's path within the trace directory
+        :returns: the artifact's content
+        """
+        with self.open_artifact(path) as file:
+            return file.read()
+
     @cached_property
     def stdout_path(self) -> Path:
         """
@@ -782,6 +1051,9 @@ class Trace:
                 'DIFFER_CONTEXT_ID': self.context.id,
             }
         )
+        for name, port in self.ports.items():
+            env[f'DIFFER_PORT_{name.upper()}'] = str(port)
+
         if self.process:
             env['DIFFER_TRACE_STDOUT'] = str(self.stdout_path.absolute())
             env['DIFFER_TRACE_STDERR'] = str(self.stderr_path.absolute())
@@ -917,9 +1189,17 @@ class FuzzVariable(TraceHook):
 
     Fuzz variables should be bounded to yield a set number of values, such as limiting the number
     of values that are generated with a ``size`` configuration parameter.
+
+    Parameter generators repeat a variable's values and, by default, cache every generated value
+    to do so. Variables with many or large values can avoid the cache by implementing
+    :meth:`indexed_values`, when the values can be accessed by index, or by setting
+    :attr:`reiterable`, when calling :meth:`generate_values` again yields the same values.
     """
 
     id: str = ''
+    #: :meth:`generate_values` yields the same values in the same order each time it is called,
+    #: so the values are generated again when they are repeated instead of being cached
+    reiterable: bool = False
 
     def __init__(self, name: str, config: dict):
         """
@@ -937,6 +1217,19 @@ class FuzzVariable(TraceHook):
         """
         raise NotImplementedError()
 
+    def indexed_values(self, template: TraceTemplate) -> Optional[Sequence]:
+        """
+        Get the generated values as a sequence that supports ``len()`` and access by index, when
+        the values can be accessed without generating them, such as a list of configured values
+        or a view over the lines of a file. The sequence must contain the values that
+        :meth:`generate_values` yields, in the same order.
+
+        :param template: trace template
+        :returns: the values, or ``None`` if the values can only be accessed by
+            :meth:`generate_values`
+        """
+        return None
+
 
 class Comparator(TraceHook):
     """
@@ -1077,6 +1370,45 @@ class VariableRef:
         return value
 
 
+class PortRef(VariableRef):
+    """
+    A reference to a network port that is dynamically allocated for each trace (see
+    :attr:`TraceTemplate.ports`). Comparators that accept a port number can use this reference to
+    compare against the port that was allocated to the trace. A port reference is defined as a
+    dictionary with a ``port`` key that stores the port name:
+
+    .. code-block:: yaml
+
+        templates:
+          - arguments: --port {{trace.ports.http}}
+            ports:
+              http: tcp
+
+            comparators:
+              - id: pcap
+                filename: capture.pcap
+                protocol: tcp
+                port:
+                  port: http
+
+    Since the port is allocated per trace, :meth:`get` must be called with the trace's
+    :attr:`Trace.ports` rather than the context variable values.
+    """
+
+    @classmethod
+    def try_parse(cls, value: Any) -> Any:
+        """
+        Attempt to parse a port reference from a dictionary. If the value is not a reference,
+        return it.
+
+        :param value: potential port reference or concrete value
+        :returns: either a ``PortRef`` object or the concrete value
+        """
+        if isinstance(value, dict) and value.get('port'):
+            return cls(value['port'])
+        return value
+
+
 #: Registry for all available variable classes. This is populated by the
 # :func:`~differ.variables.load_variables` function.
 VARIABLE_TYPE_REGISTRY: dict[str, type[FuzzVariable]] = {}
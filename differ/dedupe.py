@@ -0,0 +1,157 @@
+"""
+Trace context deduplication. Variable values often repeat: regular expression samples, radamsa
+output, and cycled parameter values can produce the same combination more than once and each
+repeat pays for a full set of trace executions. Each trace context is reduced to a fingerprint of
+its rendered inputs, the command line arguments, standard input, generated input files, and hook
+scripts, and a context whose fingerprint has already been seen is skipped. An alias file records
+the earlier context that each skipped context duplicates.
+"""
+import hashlib
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from .core import Project, Trace, TraceContext, TraceHook
+from .template import generate_chunks
+
+logger = logging.getLogger(__name__)
+
+#: Do not deduplicate trace contexts
+SCOPE_NONE = 'none'
+#: Deduplicate the trace contexts of each template
+SCOPE_TEMPLATE = 'template'
+#: Deduplicate the trace contexts across every template of a project
+SCOPE_PROJECT = 'project'
+#: The supported deduplication scopes
+DEDUPE_SCOPES = (SCOPE_NONE, SCOPE_TEMPLATE, SCOPE_PROJECT)
+
+#: The working directory of the placeholder trace that the inputs are rendered with
+_PLACEHOLDER_CWD = Path('/trace')
+
+
+def context_fingerprint(context: TraceContext, include_options: bool = False) -> str:
+    """
+    Compute the fingerprint of a trace context's rendered inputs. The inputs are rendered with a
+    placeholder trace, so references to the trace directory, the context id, or dynamic ports do
+    not make otherwise identical contexts unique. The values of variables that run custom setup or
+    teardown hooks are part of the fingerprint because their side effects are not rendered.
+
+    :param context: the trace context
+    :param include_options: include the template's execution options and comparators, so that the
+        fingerprints of contexts from different templates can be compared
+    :returns: the fingerprint
+    """
+    template = context.template
+    placeholder = TraceContext(template, context.values, id='')
+    trace = Trace(_PLACEHOLDER_CWD / 'binary', placeholder, _PLACEHOLDER_CWD, '')
+    trace.ports = {name: 0 for name in template.ports}
+    digest = hashlib.sha256()
+
+    def update(*values) -> None:
+        for value in values:
+            digest.update(repr(value).encode())
+            digest.update(b'\0')
+
+    def render(jinja_template) -> Optional[str]:
+        return jinja_template.render(trace=trace, **context.values) if jinja_template else None
+
+    def update_rendered(jinja_template) -> None:
+        # hash the rendered content in chunks so that large generated files are not held in memory
+        for chunk in generate_chunks(jinja_template, trace=trace, **context.values):
+            digest.update(chunk.encode(errors='surrogateescape'))
+        digest.update(b'\0')
+
+    update(render(template.arguments_template))
+    if isinstance(template.stdin, Path):
+        update('stdin-file', str(template.stdin))
+    else:
+        update('stdin', render(template.stdin_template))
+
+    for input_file in template.input_files:
+        update(str(input_file.source), input_file.destination, input_file.mode, input_file.static)
+        if not input_file.static:
+            update_rendered(input_file.template)
+
+    update(render(template.setup_template), render(template.teardown_template))
+    update(render(template.concurrent_template))
+
+    for name, variable in template.variables.items():
+        variable_cls = type(variable)
+        if (
+            variable_cls.setup is not TraceHook.setup
+            or variable_cls.teardown is not TraceHook.teardown
+        ):
+            update(name, context.values.get(name))
+
+    if include_options:
+        update(template.timeout, template.concurrent, template.pcap, template.expect_signal)
+        update(template.expect_success, template.script_exit_on_first_error)
+        update(template.network_namespace, template.ports)
+        for comparator in template.comparators:
+            update(type(comparator).__name__, sorted(vars(comparator).items()))
+
+    return digest.hexdigest()
+
+
+class ContextDeduplicator:
+    """
+    Tracks the fingerprints of the trace contexts generated within each project and detects the
+    contexts that duplicate an earlier context.
+    """
+
+    def __init__(self, scope: str = SCOPE_TEMPLATE):
+        """
+        :param scope: the deduplication scope, one of :data:`DEDUPE_SCOPES`
+        """
+        if scope not in DEDUPE_SCOPES:
+            raise ValueError(f'invalid deduplication scope: {scope}')
+        self.scope = scope
+        #: The first context id of each fingerprint, keyed by ``(project name, fingerprint)``
+        self.seen: dict[tuple[str, str], str] = {}
+        #: The number of duplicate trace contexts, keyed by ``(project name, template id)``
+        self.duplicates: Counter[tuple[str, str]] = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        :returns: ``True`` if trace contexts are deduplicated
+        """
+        return self.scope != SCOPE_NONE
+
+    def check(self, project: Project, context: TraceContext) -> Optional[str]:
+        """
+        Check if a trace context duplicates a context that was seen earlier. The context is
+        remembered when it is not a duplicate.
+
+        :returns: the id of the context that the trace context duplicates, or ``None`` if the
+            context is unique
+        """
+        if not self.enabled:
+            return None
+
+        if self.scope == SCOPE_PROJECT:
+            fingerprint = context_fingerprint(context, include_options=True)
+        else:
+            fingerprint = f'{context.template.id}:{context_fingerprint(context)}'
+
+        key = (project.name, fingerprint)
+        original = self.seen.setdefault(key, context.id)
+        if original == context.id:
+            return None
+
+        self.duplicates[(project.name, context.template.id)] += 1
+        return original
+
+    def log_summary(self, project: Optional[Project] = None) -> None:
+        """
+        Log the number of duplicate trace contexts within a project, or within every project.
+        """
+        for (name, template_id), count in self.duplicates.items():
+            if project is None or name == project.name:
+                logger.info(
+                    'project %s skipped %d duplicate trace contexts of template %s',
+                    name,
+                    count,
+                    template_id,
+                )
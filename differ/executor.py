@@ -1,31 +1,63 @@
 import errno
 import logging
+import multiprocessing
 import os
+import random
 import shlex
 import shutil
 import signal
+import socket
 import subprocess
+import threading
 import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import chain, islice
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Collection, Iterable, Iterator, Optional, Sequence
+
+import yaml
 
+from .archive import pack_context
+from .budget import ErrorBudget, TimeBudget
+from .cache import TraceCache
+from .capture import PacketCapture
 from .core import (
     Comparator,
     ComparisonResult,
     ComparisonStatus,
     ConcurrentHookMode,
     CrashResult,
+    DebloatedBinary,
     InputFile,
     Project,
+    ReadinessProbe,
     Trace,
     TraceContext,
     TraceTemplate,
 )
-from .parameters import CombinationParameterGenerator
-from .template import JINJA_ENVIRONMENT
+from .dedupe import SCOPE_TEMPLATE, ContextDeduplicator
+from .journal import RunJournal
+from .namespace import NetworkNamespace
+from .parameters import create_generator
+from .ports import PortAllocator
+from .retention import KEEP_ALL, RetentionPolicy
+from .snapshot import GoldenSnapshot
+from .staging import InputStager
+from .template import JINJA_ENVIRONMENT, generate_chunks, is_trace_independent
+from .workqueue import QueueTask, WorkQueue
+from .workspace import TraceWorkspace
 
 logger = logging.getLogger(__name__)
 
+#: The directory within a trace context directory that contains the files that are rendered once
+#: and shared by every trace of the context
+RENDERED_DIRNAME = '.rendered'
+
 SCRIPT_RETRY_TEMPLATE = JINJA_ENVIRONMENT.from_string(
     """
 cycle=0
@@ -65,6 +97,68 @@ class ExecutorComparator(Comparator):
 #: Singleton for the executor comparator
 EXECUTOR_COMPARATOR = ExecutorComparator({})
 
+#: The directory within the project directory that a golden snapshot is recorded to or extracted to
+GOLDEN_DIRNAME = 'golden'
+
+#: The interval, in seconds, between work queue checks while coordinating or while a worker is idle
+QUEUE_POLL_INTERVAL = 1.0
+
+#: The estimated duration, in seconds, of a trace that exits on its own. This is used to schedule
+#: the trace contexts of a batch run.
+SHORT_TRACE_DURATION = 1.0
+
+#: The executor and projects shared with process pool workers. The pool is created using the
+#: ``fork`` start method so each worker inherits the loaded projects rather than unpickling them.
+_POOL_STATE: Optional[tuple['Executor', list[Project]]] = None
+
+
+def _run_context_worker(
+    project_index: int,
+    template_index: int,
+    context_id: str,
+    values: dict,
+    skip_debloaters: list[str],
+) -> int:
+    """
+    Process pool entry point that runs a single trace context. The context is rebuilt from the
+    project index, template index, context id, and variable values so that only plain data crosses
+    the process boundary.
+
+    :returns: the number of errors for the context
+    """
+    assert _POOL_STATE, 'process pool state is not initialized'  # pragma: no cover
+    app, projects = _POOL_STATE
+    project = projects[project_index]
+    context = TraceContext(project.templates[template_index], values, id=context_id)
+    return app.run_context(project, context, skip_debloaters)
+
+
+def _isolated_random(factory: Callable[[], Iterable[dict]], seed: str) -> Iterator[dict]:
+    """
+    Advance an iterator with its own state of the global :mod:`random` module, which is restored
+    after each value is generated. Variables generate their values with the global
+    :mod:`random` module while the contexts that were already generated are running, so the values
+    only depend on the seed and not on how the generation is interleaved with execution.
+
+    :param factory: creates the iterator, which is called with the seeded state
+    :param seed: the random seed
+    """
+    state = random.Random(seed).getstate()
+    iterator: Optional[Iterator[dict]] = None
+    while True:
+        outer = random.getstate()
+        random.setstate(state)
+        try:
+            if iterator is None:
+                iterator = iter(factory())
+            value = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            state = random.getstate()
+            random.setstate(outer)
+        yield value
+
 
 class Executor:
     """
@@ -78,6 +172,25 @@ class Executor:
         report_successes: bool = False,
         verbose: bool = False,
         overwrite_existing_report: bool = False,
+        jobs: int = 1,
+        parallel_debloaters: bool = False,
+        network_namespace: bool = False,
+        resume: bool = False,
+        seed: Optional[int] = None,
+        cache_dir: Optional[Path] = None,
+        golden: Optional[Path] = None,
+        max_errors_per_template: int = 0,
+        max_errors_per_debloater: int = 0,
+        fail_fast: bool = False,
+        time_budget: float = 0.0,
+        template_time_budget: float = 0.0,
+        dedupe: str = SCOPE_TEMPLATE,
+        workspace: Optional[Path] = None,
+        workspace_max_size: int = 0,
+        keep: str = KEEP_ALL,
+        keep_runs: int = 1,
+        max_disk_usage: int = 0,
+        archive_artifacts: bool = False,
     ):
         """
         :param root: root directory to store results
@@ -85,12 +198,78 @@ class Executor:
             single trace
         :param report_successes: report comparison successes
         :param verbose: verbose log output
+        :param jobs: the number of trace contexts to execute in parallel
+        :param parallel_debloaters: run the debloated traces of a context concurrently once the
+            original trace has been verified, regardless of the template's
+            ``parallel_debloaters`` setting
+        :param network_namespace: run every trace within a private network namespace, regardless of
+            the template's ``network_namespace`` setting
+        :param resume: resume an interrupted run of a project from the project's run journal,
+            skipping the trace contexts that have already completed
+        :param seed: the seed used to generate trace context variable values. A random seed is
+            chosen if this is not specified. A resumed run always uses the seed of the original
+            run.
+        :param cache_dir: the directory of a persistent cache of original binary trace results,
+            see :class:`~differ.cache.TraceCache`
+        :param golden: a golden snapshot archive, see :class:`~differ.snapshot.GoldenSnapshot`.
+            When specified, the trace contexts and the original binary's traces are restored from
+            the snapshot and only the debloated binaries are executed.
+        :param max_errors_per_template: stop scheduling the trace contexts of a template once it
+            has reported this many errors, ``0`` to disable
+        :param max_errors_per_debloater: stop running a debloated binary once this many of its
+            traces have failed, ``0`` to disable
+        :param fail_fast: stop scheduling trace contexts after the first error
+        :param time_budget: the wall-clock time budget of each project, in seconds, which is
+            split across the project's templates, ``0`` to disable
+        :param template_time_budget: the default wall-clock time budget of each template, in
+            seconds, ``0`` to disable
+        :param dedupe: skip trace contexts whose rendered inputs duplicate an earlier context
+            within the same template, ``template``, within the project, ``project``, or never,
+            ``none``, see :class:`~differ.dedupe.ContextDeduplicator`
+        :param workspace: run the trace contexts within a memory-backed directory, such as
+            ``/dev/shm``, and only persist the context directories that have an error, a crash, or
+            a success report, see :class:`~differ.workspace.TraceWorkspace`
+        :param workspace_max_size: the maximum number of bytes that the workspace can use, ``0``
+            for no limit
+        :param keep: the trace context directories to keep, ``all`` or ``failures``, see
+            :class:`~differ.retention.RetentionPolicy`
+        :param keep_runs: the number of runs of each project to keep, including the current run
+        :param max_disk_usage: the maximum number of bytes that each project's report tree can
+            use before the directories of passing trace contexts are pruned, ``0`` for no limit
+        :param archive_artifacts: pack the artifacts of each finished trace context into a
+            compressed archive, see :func:`~differ.archive.pack_context`
         """
         self.root = root.absolute()
         self.max_permutations = max_permutations
         self.report_successes = report_successes
         self.verbose = verbose
         self.overwrite_existing_report = overwrite_existing_report
+        self.jobs = jobs
+        self.parallel_debloaters = parallel_debloaters
+        self.network_namespace = network_namespace
+        self.resume = resume
+        self.seed = seed
+        self.trace_cache = TraceCache(cache_dir) if cache_dir else None
+        self.golden_archive = golden
+        #: The error budget of the run, see :class:`~differ.budget.ErrorBudget`
+        self.budget = ErrorBudget(max_errors_per_template, max_errors_per_debloater, fail_fast)
+        #: The time budget of the run, see :class:`~differ.budget.TimeBudget`
+        self.time_budget = TimeBudget(time_budget, template_time_budget)
+        #: Detects duplicate trace contexts, see :class:`~differ.dedupe.ContextDeduplicator`
+        self.deduplicator = ContextDeduplicator(dedupe)
+        #: Stages the static input files of each project, see :class:`~differ.staging.InputStager`
+        self.stager = InputStager()
+        self.port_allocator = PortAllocator()
+        #: The memory-backed workspace, see :class:`~differ.workspace.TraceWorkspace`
+        self.workspace = TraceWorkspace(workspace, workspace_max_size) if workspace else None
+        #: Prunes trace context directories and previous runs, see
+        #: :class:`~differ.retention.RetentionPolicy`
+        self.retention = RetentionPolicy(keep, keep_runs, max_disk_usage)
+        self.archive_artifacts = archive_artifacts
+        #: The run journal of the active project
+        self.journal: Optional[RunJournal] = None
+        #: The golden snapshot of the active project
+        self.golden: Optional[GoldenSnapshot] = None
 
     def setup(self) -> None:
         """
@@ -113,17 +292,70 @@ class Executor:
 
     def setup_project(self, project: Project) -> None:
         """
-        Setup a project.
+        Setup a project and its run journal. When resuming, the existing project directory is kept
+        and the trace contexts that did not complete are removed.
         """
-        if project.directory.exists():
-            if not self.overwrite_existing_report:
-                # The project directory must not exist
-                raise FileExistsError(
-                    errno.EEXIST, os.strerror(errno.EEXIST), str(project.directory)
+        journal_filename = project.directory / RunJournal.FILENAME
+        if self.resume and project.directory.exists():
+            if not journal_filename.is_file():
+                raise FileNotFoundError(
+                    errno.ENOENT, os.strerror(errno.ENOENT), str(journal_filename)
                 )
-            shutil.rmtree(project.directory)
+
+            self.journal = RunJournal.load(journal_filename)
+            if self.journal.seed is None:
+                # the journal was interrupted before the seed was recorded
+                self.journal.start(self._initial_seed())
+
+            self.remove_incomplete_contexts(project, self.journal)
+            # the static input files may have changed since the interrupted run
+            self.stager.cleanup(project)
+            self.retention.start_project(project)
+            logger.info(
+                'resuming project %s with %d completed trace contexts',
+                project.name,
+                len(self.journal.completed),
+            )
+            return
+
+        if project.directory.exists():
+            # the previous run is deleted in the background, or kept when retaining multiple runs
+            self.retention.remove_previous_run(project, self.overwrite_existing_report)
 
         project.directory.mkdir()
+        self.journal = RunJournal(journal_filename)
+        self.journal.start(self._initial_seed())
+        self.retention.start_project(project)
+
+    def _initial_seed(self) -> int:
+        return self.seed if self.seed is not None else random.SystemRandom().randrange(2**32)
+
+    def remove_incomplete_contexts(self, project: Project, journal: RunJournal) -> None:
+        """
+        Remove the directory, reports, and crash results of every trace context that was started
+        but did not complete according to the run journal.
+        """
+        for context_dir in project.directory.glob('trace-*'):
+            context_id = context_dir.name.removeprefix('trace-')
+            if context_id in journal.completed:
+                continue
+
+            logger.info('removing incomplete trace context: %s', context_id)
+            self.remove_context(project, context_id)
+
+    def remove_context(self, project: Project, context_id: str) -> None:
+        """
+        Remove the directory, reports, and crash results of a trace context.
+        """
+        context_dir = project.directory / f'trace-{context_id}'
+        if context_dir.is_symlink():
+            # the context was running within a memory-backed workspace
+            shutil.rmtree(context_dir.readlink(), ignore_errors=True)
+            context_dir.unlink()
+        else:
+            shutil.rmtree(context_dir, ignore_errors=True)
+        for filename in project.context_result_files(context_id):
+            filename.unlink(missing_ok=True)
 
     def run_project(self, project: Project) -> int:
         """
@@ -133,14 +365,27 @@ class Executor:
         """
         logger.info('running project: %s', project.name)
         self.setup_project(project)
+        if self.golden_archive:
+            self.golden = self.load_golden_snapshot(project, self.golden_archive)
 
         error_count = 0
         trace_count = 0
-        for template in project.templates:
+        self.time_budget.start_project(project)
+        for index, template in enumerate(project.templates):
+            # the remaining project budget is shared by this template and the templates after it
+            self.time_budget.start_template(project, template, len(project.templates) - index)
             traces, errors = self.run_template(project, template)
             trace_count += traces
             error_count += errors
 
+        self.stager.cleanup(project)
+        if self.workspace:
+            self.workspace.cleanup()
+        trace_count -= self.budget.skipped_debloater_trace_count(project)
+        self.budget.log_summary(project)
+        self.time_budget.log_summary(project)
+        self.deduplicator.log_summary(project)
+        self.retention.log_summary(project)
         if not error_count:
             logger.info('project %s ran %d traces successfully', project.name, trace_count)
         else:
@@ -150,6 +395,81 @@ class Executor:
 
         return error_count
 
+    def load_golden_snapshot(self, project: Project, archive: Path) -> GoldenSnapshot:
+        """
+        Extract a golden snapshot archive into the project directory and verify that it was
+        recorded for the project.
+
+        :param archive: the golden snapshot archive
+        :returns: the loaded snapshot
+        """
+        snapshot = GoldenSnapshot.load(archive, project.directory / GOLDEN_DIRNAME)
+        snapshot.check_project(project)
+        logger.info(
+            'loaded golden snapshot with %d trace contexts: %s', len(snapshot.contexts), archive
+        )
+        return snapshot
+
+    def record_snapshot(self, project: Project, archive: Path) -> int:
+        """
+        Record a golden snapshot of a project. The original binary is run for every trace context
+        and each trace that passes :meth:`check_original_trace` is added to the snapshot. The
+        debloated binaries are not executed.
+
+        :param archive: the golden snapshot archive to create
+        :returns: the number of original traces that failed verification
+        """
+        logger.info('recording golden snapshot of project: %s', project.name)
+        self.setup_project(project)
+        snapshot = GoldenSnapshot.create(project.directory / GOLDEN_DIRNAME, project)
+
+        error_count = 0
+        for template in project.templates:
+            for context in self.generate_contexts(project, template):
+                error_count += self.record_context(project, context, snapshot)
+
+        snapshot.save(archive, seed=self.journal.seed if self.journal else None)
+        if not error_count:
+            logger.info(
+                'recorded %d trace contexts to golden snapshot: %s',
+                len(snapshot.contexts),
+                archive,
+            )
+        else:
+            logger.error(
+                'recorded %d trace contexts to golden snapshot %s, %d original traces failed',
+                len(snapshot.contexts),
+                archive,
+                error_count,
+            )
+
+        return error_count
+
+    def record_context(
+        self, project: Project, context: TraceContext, snapshot: GoldenSnapshot
+    ) -> int:
+        """
+        Run the original binary within a trace context and add the verified trace to a golden
+        snapshot.
+
+        :returns: ``1`` if the original trace failed verification, ``0`` otherwise
+        """
+        logger.debug('recording trace context: %s', context)
+        self.create_context_directory(project, context)
+        errors: Optional[int] = None
+        try:
+            original_trace = self.create_trace(project, context, project.original, '__original__')
+            self.run_trace(project, original_trace)
+            if crash := self.check_original_trace(project, original_trace):
+                crash.save(project.crash_filename(original_trace))
+            else:
+                snapshot.add(original_trace)
+
+            errors = 1 if crash else 0
+            return errors
+        finally:
+            self.finish_context(project, context, errors)
+
     def run_template(self, project: Project, template: TraceTemplate) -> tuple[int, int]:
         """
         Run a project template. The return value is a tuple containing the total number of traces
@@ -157,66 +477,607 @@ class Executor:
 
         :returns: a tuple of ``(trace_count, error_count)``
         """
-        error_count = 0
+        resumed: dict[str, int] = {}
         context_count = 0
-        contexts = self.generate_contexts(project, template)
-        for context in contexts:
+        error_count = 0
+        contexts = self.pending_contexts(project, template, resumed)
+        for context, errors in self.run_contexts(project, contexts):
             context_count += 1
-            error_count += self.run_context(project, context)
+            error_count += errors
+            if self.journal:
+                self.journal.record(context.id, errors)
+            self.retention.context_finished(project, context.id, errors)
 
+        context_count += len(resumed)
+        error_count += sum(resumed.values())
         trace_count = context_count * (len(project.debloaters) + 1)
         return trace_count, error_count
 
-    def run_context(self, project: Project, context: TraceContext) -> int:
+    def pending_contexts(
+        self, project: Project, template: TraceTemplate, resumed: dict[str, int]
+    ) -> Iterator[TraceContext]:
+        """
+        Lazily generate the trace contexts of a template that still need to run. Contexts that
+        duplicate an earlier context are not yielded and an alias file is written for each, see
+        :meth:`save_alias`. Contexts that completed in a previous run that is being resumed are not
+        yielded and their error counts are added to ``resumed`` as they are generated. Duplicates
+        are detected before completed contexts are skipped, so a resumed run skips the same
+        duplicates. The run journal and seed are captured when this method is called, so the
+        generator can be consumed after another project becomes active. Once the template's error
+        or time budget is exhausted, see :meth:`template_exhausted`, no more contexts are
+        generated.
+
+        :param resumed: the error count of each completed context, keyed by context id
+        :returns: a generator of the trace contexts to run
+        """
+        completed = self.journal.completed if self.journal else {}
+        contexts = iter(self.generate_contexts(project, template))
+
+        def pending() -> Iterator[TraceContext]:
+            # the budget is checked before each context is generated, since generating the
+            # remaining contexts of an exhausted template only to skip them can take a long time
+            while not self.template_exhausted(project, template):
+                context = next(contexts, None)
+                if context is None:
+                    return
+
+                if original_id := self.deduplicator.check(project, context):
+                    self.save_alias(project, context, original_id)
+                elif context.id in completed:
+                    # The context completed in a previous run that is being resumed
+                    resumed[context.id] = completed[context.id]
+                else:
+                    yield context
+
+        return pending()
+
+    def save_alias(self, project: Project, context: TraceContext, original_id: str) -> None:
+        """
+        Record that a duplicate trace context was skipped because its rendered inputs are
+        identical to an earlier context.
+
+        :param original_id: the id of the earlier context that the duplicate aliases
+        """
+        logger.debug('trace context %s duplicates trace context %s', context.id, original_id)
+        with open(project.alias_filename(context.id), 'w') as file:
+            yaml.safe_dump(
+                {'context': context.id, 'alias': original_id, 'values': context.values}, file
+            )
+
+    def run_batch(self, projects: list[Project]) -> dict[str, tuple[int, int, int]]:
+        """
+        Run multiple projects within a single worker pool. The templates of every project are
+        scheduled longest first, based on :meth:`estimate_template_duration`, so that long running
+        templates, such as network servers, do not delay the end of the batch. The trace contexts
+        of each template are generated lazily as they are scheduled.
+
+        The contexts of a project's templates are interleaved, so each template's time budget is
+        limited by the time remaining in the project budget rather than an even share of it, see
+        :class:`~differ.budget.TimeBudget`.
+
+        :param projects: the projects to run
+        :returns: a dictionary of ``(trace_count, error_count, skipped_count)`` tuples, keyed by
+            project name, where ``skipped_count`` is the number of traces that were skipped
+            because the error or time budget was exhausted
+        """
+        journals: dict[str, Optional[RunJournal]] = {}
+        resumed: dict[str, dict[str, int]] = {}
+        context_counts: dict[str, int] = {}
+        error_counts: dict[str, int] = {}
+        templates = []
+        for project in projects:
+            logger.info('preparing project: %s', project.name)
+            self.setup_project(project)
+            journals[project.name] = self.journal
+            resumed[project.name] = {}
+            context_counts[project.name] = error_counts[project.name] = 0
+            for template in project.templates:
+                contexts = self.pending_contexts(project, template, resumed[project.name])
+                templates.append((project, template, contexts))
+
+        self.journal = None
+        # sorted() is stable, so templates with the same estimate keep their project order
+        templates = sorted(
+            templates,
+            key=lambda item: self.estimate_template_duration(item[0], item[1]),
+            reverse=True,
+        )
+        logger.info('running %d templates from %d projects', len(templates), len(projects))
+        for project in projects:
+            self.time_budget.start_project(project)
+            for template in project.templates:
+                self.time_budget.start_template(project, template)
+
+        items = chain.from_iterable(
+            ((project, context) for context in contexts) for project, _, contexts in templates
+        )
+        for project, context, errors in self.run_batch_contexts(items, projects):
+            context_counts[project.name] += 1
+            error_counts[project.name] += errors
+            if journal := journals[project.name]:
+                journal.record(context.id, errors)
+            self.retention.context_finished(project, context.id, errors)
+
+        summary = {}
+        for project in projects:
+            context_counts[project.name] += len(resumed[project.name])
+            error_counts[project.name] += sum(resumed[project.name].values())
+            trace_count = context_counts[project.name] * (len(project.debloaters) + 1)
+            trace_count -= self.budget.skipped_debloater_trace_count(project)
+            skipped_count = self.budget.skipped_trace_count(project)
+            skipped_count += self.time_budget.skipped_trace_count(project)
+            summary[project.name] = (trace_count, error_counts[project.name], skipped_count)
+            self.stager.cleanup(project)
+            self.budget.log_summary(project)
+            self.time_budget.log_summary(project)
+            self.deduplicator.log_summary(project)
+            self.retention.log_summary(project)
+            if not error_counts[project.name]:
+                logger.info('project %s ran %d traces successfully', project.name, trace_count)
+            else:
+                logger.error(
+                    'project %s ran %d traces with %d errors',
+                    project.name,
+                    trace_count,
+                    error_counts[project.name],
+                )
+
+        if self.workspace:
+            self.workspace.cleanup()
+        return summary
+
+    def run_coordinator(self, project: Project, project_filename: Path, queue: WorkQueue) -> int:
+        """
+        Run a project through a work queue. The pending trace contexts are published to the queue
+        and the results are collected as workers complete them, see :meth:`run_worker`. The
+        artifact bundle of each trace context is extracted into the project directory, so the
+        results on disk are identical to a local run.
+
+        :param project_filename: the project file that workers load
+        :param queue: the work queue
+        :returns: the number of errors
+        """
+        logger.info('coordinating project: %s', project.name)
+        self.setup_project(project)
+
+        resumed: dict[str, int] = {}
+        for template in project.templates:
+            contexts = self.pending_contexts(project, template, resumed)
+            published = queue.publish(project, project_filename, contexts)
+            logger.debug('published %d trace contexts of template %s', published, template)
+
+        context_count = len(resumed)
+        error_count = sum(resumed.values())
+        completed = self.journal.completed if self.journal else {}
+        while True:
+            finished = not queue.unfinished_count(project.name)
+            for task in queue.collect(project.name):
+                if task.context_id not in completed:
+                    # the context was not collected by an interrupted coordinator
+                    errors = self.collect_task(project, queue, task)
+                    context_count += 1
+                    error_count += errors
+                    if self.journal:
+                        self.journal.record(task.context_id, errors)
+                    self.retention.context_finished(project, task.context_id, errors)
+                queue.acknowledge(task)
+
+            if finished:
+                break
+            time.sleep(QUEUE_POLL_INTERVAL)
+
+        trace_count = context_count * (len(project.debloaters) + 1)
+        if not error_count:
+            logger.info('project %s ran %d traces successfully', project.name, trace_count)
+        else:
+            logger.error(
+                'project %s ran %d traces with %d errors', project.name, trace_count, error_count
+            )
+
+        return error_count
+
+    def collect_task(self, project: Project, queue: WorkQueue, task: QueueTask) -> int:
+        """
+        Extract the results of a finished task into the project directory.
+
+        :returns: the number of errors reported for the trace context
+        """
+        if task.state == 'failed':
+            logger.error(
+                'trace context failed on every worker that claimed it: %s', task.context_id
+            )
+            return task.errors
+
+        self.remove_context(project, task.context_id)
+        queue.extract_artifact(task, project)
+        logger.debug('collected trace context %s from worker %s', task.context_id, task.worker)
+        return task.errors
+
+    def run_worker(self, queue: WorkQueue, worker_id: str = '') -> int:
+        """
+        Claim and run trace contexts from a work queue, one at a time, until the queue does not
+        have any pending or leased trace contexts.
+
+        :param queue: the work queue
+        :param worker_id: the worker id, which defaults to the hostname and process id
+        :returns: the number of trace contexts that were executed
+        """
+        worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        logger.info('starting worker %s on queue: %s', worker_id, queue.filename)
+        projects: dict[str, Project] = {}
+        count = 0
+        while True:
+            task = queue.claim(worker_id)
+            if not task:
+                if not queue.unfinished_count():
+                    break
+                # wait for leased trace contexts to complete or expire
+                time.sleep(QUEUE_POLL_INTERVAL)
+                continue
+
+            if task.project_filename not in projects:
+                projects[task.project_filename] = Project.load(self.root, task.project_filename)
+
+            self.run_task(queue, task, projects[task.project_filename])
+            count += 1
+
+        for project in projects.values():
+            self.stager.cleanup(project)
+        logger.info('worker %s ran %d trace contexts', worker_id, count)
+        return count
+
+    def run_task(self, queue: WorkQueue, task: QueueTask, project: Project) -> None:
+        """
+        Run a claimed task, upload its artifact bundle, and complete it. The task's lease is
+        renewed from a background thread while the trace context runs. The task is returned to the
+        queue if the trace context could not be executed.
+        """
+        context = task.create_context(project)
+        project.directory.mkdir(parents=True, exist_ok=True)
+        # remove the results of a previous attempt on this host
+        self.remove_context(project, context.id)
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_lease, args=(queue, task, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            errors = self.run_context(project, context)
+            artifact = queue.create_artifact(task, project)
+        except Exception:
+            logger.exception('failed to run trace context: %s', context)
+            queue.release(task)
+            return
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        # the results are in the artifact bundle
+        self.remove_context(project, context.id)
+        queue.complete(task, errors, artifact)
+
+    def _renew_lease(self, queue: WorkQueue, task: QueueTask, stop: threading.Event) -> None:
+        while not stop.wait(queue.lease_seconds / 3):
+            if not queue.renew(task):
+                logger.warning('lost the lease of trace context: %s', task.context_id)
+                return
+
+    def estimate_context_duration(self, project: Project, context: TraceContext) -> float:
+        """
+        Estimate how long a trace context takes to run, see :meth:`estimate_template_duration`.
+
+        :returns: the estimated duration, in seconds
+        """
+        return self.estimate_template_duration(project, context.template)
+
+    def estimate_template_duration(self, project: Project, template: TraceTemplate) -> float:
+        """
+        Estimate how long each trace context of a template takes to run. Templates that have a
+        concurrent hook or that are expected to time out can run until the template's timeout is
+        reached, so each of their traces is estimated to take the entire timeout. Every other
+        trace is estimated to take :data:`SHORT_TRACE_DURATION` seconds.
+
+        :returns: the estimated duration of a single trace context, in seconds
+        """
+        if template.concurrent or template.timeout.expected:
+            trace_duration = template.timeout.seconds
+        else:
+            trace_duration = min(template.timeout.seconds, SHORT_TRACE_DURATION)
+
+        if self.run_debloaters_concurrently(template, len(project.debloaters)):
+            # the original trace, then all of the debloated traces at the same time
+            return trace_duration * 2
+        return trace_duration * (len(project.debloaters) + 1)
+
+    def run_contexts(
+        self, project: Project, contexts: Iterable[TraceContext]
+    ) -> Iterator[tuple[TraceContext, int]]:
+        """
+        Run the trace contexts of a project and yield each context along with its error count as
+        it completes. See :meth:`run_batch_contexts`.
+
+        :param project: differ project
+        :param contexts: the trace contexts to run
+        :returns: a generator that yields a tuple of ``(context, error_count)``
+        """
+        items = ((project, context) for context in contexts)
+        for _, context, errors in self.run_batch_contexts(items, [project]):
+            yield context, errors
+
+    def run_batch_contexts(
+        self,
+        items: Iterable[tuple[Project, TraceContext]],
+        projects: Optional[Sequence[Project]] = None,
+    ) -> Iterator[tuple[Project, TraceContext, int]]:
+        """
+        Run trace contexts, which may belong to different projects, and yield each context along
+        with its error count as it completes. The contexts are started in order and ``items`` is
+        only consumed as contexts are started, so contexts can be generated lazily. When ``jobs``
+        is greater than one, the contexts are executed within a process pool and are yielded in
+        the order they complete. Each worker owns a context directory end to end and the report and
+        crash filenames only depend on the context id, so the results on disk are identical to a
+        serial run.
+
+        Contexts that are skipped because the error or time budget is exhausted, see
+        :meth:`skip_context`, are not yielded.
+
+        :param items: the ``(project, context)`` tuples to run
+        :param projects: every project that ``items`` belong to, which must be known before the
+            process pool is started. When this is not specified, ``items`` is consumed up front to
+            find the projects.
+        :returns: a generator that yields a tuple of ``(project, context, error_count)``
+        """
+        if self.jobs <= 1:
+            for project, context in items:
+                if self.skip_context(project, context):
+                    continue
+
+                skip_debloaters = self.budget.skipped_debloaters(project)
+                errors = self.run_context(project, context, skip_debloaters)
+                self.budget.record(project, context, errors)
+                yield project, context, errors
+            return
+
+        if projects is None:
+            items = list(items)
+            projects = list({id(project): project for project, _ in items}.values())
+        projects = list(projects)
+        indexes = {id(project): index for index, project in enumerate(projects)}
+        pending = iter(items)
+        global _POOL_STATE
+        _POOL_STATE = (self, projects)
+        try:
+            mp_context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(self.jobs, mp_context=mp_context) as pool:
+                running: dict = {}
+
+                def submit_next() -> bool:
+                    # submit the next context that is within the error and time budgets
+                    for project, context in pending:
+                        if self.skip_context(project, context):
+                            continue
+
+                        future = pool.submit(
+                            _run_context_worker,
+                            indexes[id(project)],
+                            project.templates.index(context.template),
+                            context.id,
+                            context.values,
+                            self.budget.skipped_debloaters(project),
+                        )
+                        running[future] = (project, context)
+                        return True
+                    return False
+
+                # Only ``jobs`` contexts are submitted at a time so that the budgets are checked
+                # immediately before each context is started
+                while len(running) < self.jobs and submit_next():
+                    pass
+
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        project, context = running.pop(future)
+                        errors = future.result()
+                        self.budget.record(project, context, errors)
+                        yield project, context, errors
+                        submit_next()
+        finally:
+            _POOL_STATE = None
+
+    def template_exhausted(self, project: Project, template: TraceTemplate) -> bool:
+        """
+        Check if the time budget or the error budget of a template is exhausted, in which case
+        none of its remaining trace contexts can run.
+
+        :returns: ``True`` if no more trace contexts of the template can run
+        """
+        return self.time_budget.template_exhausted(
+            project, template
+        ) or self.budget.template_exhausted(project, template)
+
+    def skip_context(self, project: Project, context: TraceContext) -> bool:
+        """
+        Check the time budget, see :class:`~differ.budget.TimeBudget`, and the error budget, see
+        :class:`~differ.budget.ErrorBudget`, immediately before a trace context is started.
+
+        :returns: ``True`` if the trace context must not be executed
+        """
+        return self.time_budget.skip_context(project, context) or self.budget.skip_context(
+            project, context
+        )
+
+    def run_context(
+        self, project: Project, context: TraceContext, skip_debloaters: Collection[str] = ()
+    ) -> int:
         """
         Run a trace context against the original binary and each debloated binary.
+
+        :param skip_debloaters: the engines of the debloated binaries that are not executed
         """
         logger.debug('running trace context: %s', context)
-        context_dir = project.context_directory(context)
-        if context_dir.exists():
-            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(context_dir))
+        self.create_context_directory(project, context)
+        errors: Optional[int] = None
+        try:
+            errors = self.run_context_traces(project, context, skip_debloaters)
+            return errors
+        finally:
+            self.finish_context(project, context, errors)
 
-        context_dir.mkdir()
-        # Save the context parameters to context.yml
-        context.save(context_dir / 'context.yml')
+    def run_context_traces(
+        self, project: Project, context: TraceContext, skip_debloaters: Collection[str] = ()
+    ) -> int:
+        """
+        Run the traces of a trace context whose directory has been created, see
+        :meth:`run_context`.
 
-        # First, run the original trace and verify it worked as expected
+        :param skip_debloaters: the engines of the debloated binaries that are not executed
+        """
+        debloaters = [
+            debloater
+            for debloater in project.debloaters.values()
+            if debloater.engine not in skip_debloaters
+        ]
+        parallel = self.run_debloaters_concurrently(context.template, len(debloaters))
+
+        # First, run the original trace and verify it worked as expected. When the debloated
+        # traces run concurrently, they can not share the current_trace link, so the original
+        # trace runs from its own directory as well.
         original_trace = self.create_trace(project, context, project.original, '__original__')
-        self.run_trace(project, original_trace)
+        self.run_trace(project, original_trace, link_cwd=not parallel)
         if crash := self.check_original_trace(project, original_trace):
             # The original did not behave as we expected and we can't trust the results of the
             # debloated binaries. Report the crash and quit.
             crash.save(project.crash_filename(original_trace))
             return 1
 
-        error_count = 0
+        if self.trace_cache and original_trace.cache_key:
+            # The original trace was verified, cache the results
+            self.trace_cache.store(original_trace, original_trace.cache_key)
+
         # Run each debloated binary and compare it against the original
-        for debloater in project.debloaters.values():
-            trace = self.create_trace(project, context, debloater.binary, debloater.engine)
-            self.run_trace(project, trace)
+        if parallel:
+            with ThreadPoolExecutor(len(debloaters)) as pool:
+                futures = [
+                    pool.submit(
+                        self.run_debloated_trace,
+                        project,
+                        context,
+                        original_trace,
+                        debloater,
+                        link_cwd=False,
+                    )
+                    for debloater in debloaters
+                ]
+                return sum(future.result() for future in futures)
+
+        error_count = 0
+        for debloater in debloaters:
+            error_count += self.run_debloated_trace(project, context, original_trace, debloater)
+
+        return error_count
 
-            results = self.compare_trace(project, original_trace, trace)
-            crash = self.check_trace_crash(trace)
-            errors = self.get_errors(trace, results, crash)
+    def run_debloaters_concurrently(self, template: TraceTemplate, debloater_count: int) -> bool:
+        """
+        :param debloater_count: the number of debloated binaries that run within each trace
+            context
+        :returns: ``True`` if the debloated traces of the template's trace contexts run
+            concurrently, see the template's ``parallel_debloaters`` setting
+        """
+        parallel = self.parallel_debloaters or template.parallel_debloaters
+        return parallel and debloater_count > 1
 
-            # A crash is an error if we don't expect it (expect_success: true)
-            crash_is_error = crash and trace.context.template.expect_success
-            if not crash_is_error:
-                # ignore the crash, it was expected
-                crash = None
+    def finish_context(
+        self, project: Project, context: TraceContext, errors: Optional[int] = None
+    ) -> None:
+        """
+        Clean up a trace context directory once every trace of the context has finished. When the
+        context ran within the memory-backed workspace, the context directory is persisted to the
+        report tree if the context has an error, a crash, or a success report, and is otherwise
+        discarded. The artifacts of a kept context are packed into a compressed archive when
+        ``archive_artifacts`` is enabled.
+
+        :param errors: the number of errors, or ``None`` if the context did not complete
+        """
+        context_dir = project.context_directory(context)
+        # the shared rendered files have been copied into every trace
+        shutil.rmtree(context_dir / RENDERED_DIRNAME, ignore_errors=True)
+        keep = errors is None or errors or self.report_successes
+        if self.workspace and not keep:
+            self.workspace.discard(context_dir)
+            return
 
-            if errors or crash:
-                # update the error count
-                error_count += 1
+        if self.archive_artifacts:
+            # pack the artifacts before they are copied out of the workspace
+            pack_context(context_dir, context.template)
 
-            reports = results if self.report_successes else errors
-            if reports:
-                project.save_report(trace, reports)
+        if self.workspace:
+            self.workspace.persist(context_dir)
 
-            if crash:
-                crash.save(project.crash_filename(trace))
+    def create_context_directory(self, project: Project, context: TraceContext) -> Path:
+        """
+        Create the context directory and save the context parameters to ``context.yml``.
 
-        return error_count
+        :returns: the context directory
+        """
+        context_dir = project.context_directory(context)
+        if context_dir.exists():
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(context_dir))
+
+        if not self.workspace or not self.workspace.create(context_dir):
+            context_dir.mkdir()
+        # Save the context parameters to context.yml
+        context.save(context_dir / 'context.yml')
+        return context_dir
+
+    def run_debloated_trace(
+        self,
+        project: Project,
+        context: TraceContext,
+        original_trace: Trace,
+        debloater: DebloatedBinary,
+        link_cwd: bool = True,
+    ) -> int:
+        """
+        Run a debloated binary within a trace context, compare it against the original trace, and
+        save the report and crash result. This method is thread safe so the debloated traces of a
+        context can run concurrently.
+
+        :param original_trace: the original trace that has already been verified
+        :param debloater: the debloated binary to run
+        :param link_cwd: run the trace from the ``current_trace`` link, see :meth:`run_trace`
+        :returns: ``1`` if the trace has an error, ``0`` otherwise
+        """
+        trace = self.create_trace(project, context, debloater.binary, debloater.engine)
+        self.run_trace(project, trace, link_cwd=link_cwd)
+        return self.report_debloated_trace(project, original_trace, trace)
+
+    def report_debloated_trace(self, project: Project, original_trace: Trace, trace: Trace) -> int:
+        """
+        Compare a debloated trace that has finished executing against the original trace and save
+        the report and crash result.
+
+        :returns: ``1`` if the trace has an error, ``0`` otherwise
+        """
+        results = self.compare_trace(project, original_trace, trace)
+        crash = self.check_trace_crash(trace)
+        errors = self.get_errors(trace, results, crash)
+
+        # A crash is an error if we don't expect it (expect_success: true)
+        crash_is_error = crash and trace.context.template.expect_success
+        if not crash_is_error:
+            # ignore the crash, it was expected
+            crash = None
+
+        reports = results if self.report_successes else errors
+        if reports:
+            project.save_report(trace, reports)
+
+        if crash:
+            crash.save(project.crash_filename(trace))
+
+        return 1 if errors or crash else 0
 
     def get_errors(
         self, trace: Trace, results: list[ComparisonResult], crash: Optional[CrashResult]
@@ -295,14 +1156,58 @@ class Executor:
 
         return crash
 
-    def run_trace(self, project: Project, trace: Trace) -> None:
+    def run_trace(self, project: Project, trace: Trace, link_cwd: bool = True) -> None:
         """
         Run a single trace.
+
+        :param link_cwd: run the trace from the context's ``current_trace`` link so that the
+            working directory is identical for every binary. This must be disabled when multiple
+            traces of a context are running concurrently, in which case the trace runs from its own
+            directory.
         """
         logger.debug('running trace: %s', trace)
+        cwd: Optional[Path] = None
+        try:
+            args, cwd, stdin_file = self._prepare_trace(project, trace, link_cwd)
+            if self._restore_cached_trace(project, trace, cwd):
+                return
 
+            # start the packet capture
+            pcap = self._start_packet_capture(trace) if trace.context.template.pcap else None
+            try:
+                # run setup hooks and setup script
+                self._setup_trace(trace, cwd)
+
+                # start the binary
+                self._launch_trace(trace, args, cwd, stdin_file)
+
+                # monitor the process and launch the concurrent script
+                self._monitor_trace(trace, cwd)
+
+                # run the teardown hooks, teardown script, and terminate the concurrent script
+                self._teardown_trace(trace, cwd)
+            finally:
+                if pcap:
+                    pcap.stop()
+
+            if pcap:
+                self._check_packet_capture(trace)
+        finally:
+            # release the trace's ports and network namespace even if the trace failed
+            self._cleanup_trace(trace, cwd, link_cwd)
+
+    def _prepare_trace(
+        self, project: Project, trace: Trace, link_cwd: bool
+    ) -> tuple[list[str], Path, Path]:
+        """
+        Prepare the trace directory prior to running the trace: copy and generate the input files,
+        the stdin file, and the hook scripts, link the binary and working directory, and create the
+        trace's network namespace, if enabled.
+
+        :returns: a tuple of ``(arguments, cwd, stdin_file)`` that are used to launch the trace
+        """
         # copy and generate any input files
-        self.copy_input_files(trace)
+        self.copy_input_files(project, trace)
 
         # create the file used for stdin
         stdin_file = self.create_stdin_file(trace)
@@ -317,72 +1222,120 @@ class Executor:
         else:
             target = f'./{trace.binary.name}'
 
-        # link the 'current_trace' directory to the trace cwd so that paths are uniform
-        cwd = trace.cwd.parent / 'current_trace'
-        if cwd.exists():
-            cwd.unlink()
-
-        cwd.symlink_to(trace.cwd)
+        if link_cwd:
+            # link the 'current_trace' directory to the trace cwd so that paths are uniform
+            cwd = trace.cwd.parent / 'current_trace'
+            if cwd.exists():
+                cwd.unlink()
 
-        if trace.context.template.pcap:
-            # start the packet capture
-            pcap = self._start_packet_capture(trace)
-            time.sleep(1.0)
+            cwd.symlink_to(trace.cwd)
         else:
-            pcap = None
+            cwd = trace.cwd
 
-        # run setup hooks and setup script
-        self._setup_trace(trace, cwd)
+        if self.network_namespace or trace.context.template.network_namespace:
+            # create the namespace that all trace processes will run within
+            trace.network_namespace = NetworkNamespace()
+            trace.network_namespace.start()
 
-        # start the binary
-        logger.debug('launching trace %s with arguments: %s', trace, repr(trace.arguments))
         args = [target] + shlex.split(trace.arguments)
+        return args, cwd, stdin_file
+
+    def _restore_cached_trace(self, project: Project, trace: Trace, cwd: Path) -> bool:
+        """
+        Set the cache key of a prepared trace and restore the trace results from the golden
+        snapshot or the trace cache, if they exist. Only the traces of the original binary are
+        cached.
+
+        :returns: ``True`` if the trace was restored from the cache
+        """
+        if self.golden and trace.debloater_engine == '__original__':
+            if not self.golden.restore(trace):
+                raise ValueError(f'trace context is not in the golden snapshot: {trace.context}')
+
+            logger.debug('restored trace from golden snapshot: %s', trace)
+            return True
+
+        cache = self.trace_cache
+        if not cache or trace.debloater_engine != '__original__' or not cache.is_cacheable(trace):
+            return False
+
+        network_namespace = self.network_namespace or trace.context.template.network_namespace
+        trace.cache_key = cache.key(project, trace, cwd, network_namespace)
+        if not cache.restore(trace, trace.cache_key):
+            return False
+
+        logger.debug('restored trace from cache: %s', trace)
+        return True
+
+    def _launch_trace(self, trace: Trace, args: list[str], cwd: Path, stdin_file: Path) -> None:
+        """
+        Launch the trace binary and set :attr:`Trace.process`.
+        """
+        logger.debug('launching trace %s with arguments: %s', trace, repr(trace.arguments))
         trace.process = subprocess.Popen(
-            args,
+            self._trace_command(trace, args),
             cwd=str(cwd),
             stdout=trace.stdout_path.open('wb'),
             stderr=trace.stderr_path.open('wb'),
             stdin=stdin_file.open('rb'),
         )
+        # Record the binary's command line, without the namespace wrapper, for reports
+        trace.process.args = args
 
-        # monitor the process and launch the concurrent script
-        self._monitor_trace(trace, cwd)
+    def _check_packet_capture(self, trace: Trace) -> None:
+        """
+        Warn if the packet capture did not produce a pcap file.
+        """
+        if not trace.pcap_path.is_file() or trace.pcap_path.stat().st_size == 0:
+            logger.warn(  # pragma: no cover
+                'pcap file is empty, tcpdump may not have executed: %s, %s',
+                trace,
+                trace.pcap_path,
+            )
 
-        # run the teardown hooks, teardown script, and terminate the concurrent script
-        self._teardown_trace(trace, cwd)
+    def _cleanup_trace(self, trace: Trace, cwd: Optional[Path], link_cwd: bool) -> None:
+        """
+        Release the resources held by a trace that has finished executing, or that failed.
+
+        :param cwd: the trace's working directory, or ``None`` if the trace failed before the
+            working directory was prepared
+        """
+        if trace.network_namespace:
+            trace.network_namespace.stop()
 
-        if pcap:
-            if pcap.poll() is None:
-                time.sleep(1.0)
-                pcap.send_signal(signal.SIGINT.value)
-                pcap.wait()
+        self.port_allocator.release(trace.ports)
 
-            if not trace.pcap_path.is_file() or trace.pcap_path.stat().st_size == 0:
-                logger.warn(  # pragma: no cover
-                    'pcap file is empty, tcpdump may not have executed: %s, %s',
-                    trace,
-                    trace.pcap_path,
-                )
+        if link_cwd and cwd:
+            cwd.unlink(missing_ok=True)
 
-        cwd.unlink()
+    def _trace_command(self, trace: Trace, args: list[str]) -> list[str]:
+        """
+        Get the command line to launch a process that belongs to the trace, wrapping it so that it
+        runs within the trace's network namespace, if one was created.
+
+        :param args: the command line arguments
+        :returns: the command line arguments to execute
+        """
+        if trace.network_namespace:
+            return trace.network_namespace.wrap(args)
+        return args
 
-    def _start_packet_capture(self, trace: Trace) -> subprocess.Popen:
+    def _start_packet_capture(self, trace: Trace) -> PacketCapture:
         """
-        Start the packet capture for the trace using ``tcpdump``.
+        Start the packet capture for the trace using ``tcpdump`` and block until it is capturing
+        packets.
         """
         pcap = trace.context.template.pcap
         assert pcap
 
         trace.pcap_path.touch(mode=0o666)
 
-        logger.debug('starting packet capture for trace %s on interface %s', trace, pcap.interface)
-        return subprocess.Popen(
-            ['tcpdump', '-i', pcap.interface, '-w', str(trace.pcap_path)],
-            cwd=str(trace.cwd),
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL,
-        )
+        interface = pcap.get_interface(trace)
+        logger.debug('starting packet capture for trace %s on interface %s', trace, interface)
+        args = ['tcpdump', '-i', interface, '-U', '--immediate-mode', '-w', str(trace.pcap_path)]
+        capture = PacketCapture(self._trace_command(trace, args), trace.pcap_path, trace.cwd)
+        capture.start()
+        return capture
 
     def _setup_trace(self, trace: Trace, cwd: Path) -> None:
         """
@@ -397,7 +1350,7 @@ class Executor:
         # Run the trace setup script
         logger.debug('running trace setup %s', trace)
         trace.setup_script = subprocess.run(
-            [f'./{trace.setup_script_path.name}'],
+            self._trace_command(trace, [f'./{trace.setup_script_path.name}']),
             cwd=str(cwd),
             stdout=trace.setup_script_output_path.open('wb'),
             stderr=subprocess.STDOUT,
@@ -410,7 +1363,20 @@ class Executor:
         Run the trace teardown hooks, the teardown script, and terminate the concurrent script if
         it is still running.
         """
-        # Run teardown hooks
+        self._run_teardown_hooks(trace, cwd)
+
+        if trace.concurrent_script:
+            try:
+                trace.concurrent_script.wait(self._concurrent_script_wait_time(trace))
+            except subprocess.TimeoutExpired:
+                logger.error('terminating trace concurrent script: %s', trace)
+                trace.concurrent_script.terminate()
+                trace.concurrent_script.wait()
+
+    def _run_teardown_hooks(self, trace: Trace, cwd: Path) -> None:
+        """
+        Run the trace teardown hooks and the teardown script.
+        """
         for hook in trace.context.template.hooks:
             hook.teardown(trace)
 
@@ -418,7 +1384,7 @@ class Executor:
             # Run the trace teardown script
             logger.debug('running trace teardown %s', trace)
             trace.teardown_script = subprocess.run(
-                [f'./{trace.teardown_script_path.name}'],
+                self._trace_command(trace, [f'./{trace.teardown_script_path.name}']),
                 cwd=str(cwd),
                 stdout=trace.teardown_script_output_path.open('wb'),
                 stderr=subprocess.STDOUT,
@@ -426,20 +1392,15 @@ class Executor:
                 env=trace.env(inherit=True),
             )
 
-        if trace.concurrent_script:
-            # Determine how long we'll wait for the concurrent script to complete. Either the
-            # remaining timeout amount for a minimum for 5 seconds.
-            wait_time = float(trace.context.template.timeout.seconds) - (
-                time.monotonic() - trace.start_time
-            )
-            if wait_time < 5.0:
-                wait_time = 5.0
-            try:
-                trace.concurrent_script.wait(wait_time)
-            except subprocess.TimeoutExpired:
-                logger.error('terminating trace concurrent script: %s', trace)
-                trace.concurrent_script.terminate()
-                trace.concurrent_script.wait()
+    def _concurrent_script_wait_time(self, trace: Trace) -> float:
+        """
+        Determine how long we'll wait for the concurrent script to complete during teardown. Either
+        the remaining timeout amount or a minimum of 5 seconds.
+        """
+        wait_time = float(trace.context.template.timeout.seconds) - (
+            time.monotonic() - trace.start_time
+        )
+        return max(wait_time, 5.0)
 
     def _monitor_trace(self, trace: Trace, cwd: Path) -> None:
         """
@@ -453,25 +1414,18 @@ class Executor:
         trace.start_time = time.monotonic()
         end_time = trace.start_time + float(trace.context.template.timeout.seconds)
 
-        if concurrent := trace.context.template.concurrent:
-            concurrent_delay_time = trace.start_time + concurrent.delay
+        concurrent = trace.context.template.concurrent
+        if concurrent and concurrent.ready:
+            # wait for the trace process to be ready before launching the concurrent script
+            running, status = self._wait_ready(trace, concurrent.ready, end_time)
         else:
-            concurrent_delay_time = 0.0
-
-        initial_timeout = concurrent_delay_time or end_time
-        if initial_timeout > trace.start_time:
-            running, status = self._wait_process(trace.process, concurrent_delay_time or end_time)
-
-        if running and concurrent_delay_time:
-            trace.concurrent_script = subprocess.Popen(
-                [f'./{trace.concurrent_script_path.name}'],
-                cwd=str(cwd),
-                stdout=trace.concurrent_script_output_path.open('wb'),
-                stderr=subprocess.STDOUT,
-                stdin=subprocess.DEVNULL,
-                env=trace.env(inherit=True),
-            )
+            concurrent_delay_time = trace.start_time + concurrent.delay if concurrent else 0.0
+            initial_timeout = concurrent_delay_time or end_time
+            if initial_timeout > trace.start_time:
+                running, status = self._wait_process(trace.process, initial_timeout)
 
+        if running and concurrent:
+            self._launch_concurrent_script(trace, cwd)
             running, status = self._monitor_concurrent_mode(trace, end_time)
 
         if running:
@@ -485,6 +1439,49 @@ class Executor:
         trace.process.returncode = os.waitstatus_to_exitcode(status)
         logger.debug('process exited with code %s: %d', trace, trace.process.returncode)
 
+    def _wait_ready(
+        self, trace: Trace, probe: ReadinessProbe, end_time: float
+    ) -> tuple[bool, int]:
+        """
+        Wait for the trace process to become ready, exit, or until the probe's timeout is reached.
+        The return value of this method is the same as :meth:`_wait_process`.
+
+        :param trace: the running trace
+        :param probe: the readiness probe to check
+        :param end_time: the moment in time that the trace times out
+        :returns: a tuple containing ``(is_still_running, wait_status)``
+        """
+        assert trace.process, 'trace process is not active'  # pragma: no cover
+
+        ready_end_time = min(time.monotonic() + probe.timeout, end_time)
+        while True:
+            running, status = self._wait_process(
+                trace.process, min(time.monotonic() + probe.interval, ready_end_time)
+            )
+            if not running:
+                return running, status
+
+            if probe.is_ready(trace):
+                logger.debug('trace is ready: %s', trace)
+                return running, status
+
+            if time.monotonic() >= ready_end_time:
+                logger.warning('trace did not become ready before the probe timeout: %s', trace)
+                return running, status
+
+    def _launch_concurrent_script(self, trace: Trace, cwd: Path) -> None:
+        """
+        Launch the concurrent script and set :attr:`Trace.concurrent_script`.
+        """
+        trace.concurrent_script = subprocess.Popen(
+            self._trace_command(trace, [f'./{trace.concurrent_script_path.name}']),
+            cwd=str(cwd),
+            stdout=trace.concurrent_script_output_path.open('wb'),
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            env=trace.env(inherit=True),
+        )
+
     def _wait_process(self, process: subprocess.Popen, end_time: float) -> tuple[bool, int]:
         """
         Wait for the process to finish executing or until the ``end_time`` is surpassed.
@@ -621,68 +1618,77 @@ class Executor:
         link.symlink_to(binary)
 
         trace = Trace(link, context, cwd, debloater_engine)
+        # allocate the template's dynamic ports prior to rendering any template that uses them
+        trace.ports = self.port_allocator.allocate_ports(context.template.ports)
         trace.arguments = context.template.arguments_template.render(trace=trace, **context.values)
 
         return trace
 
-    def generate_contexts(self, project: Project, template: TraceTemplate) -> list[TraceContext]:
+    def generate_contexts(
+        self, project: Project, template: TraceTemplate
+    ) -> Iterable[TraceContext]:
         """
-        Generate a list of trace contexts with concrete variable values for the provided template.
+        Generate the trace contexts, with concrete variable values, of the provided template. The
+        contexts are generated lazily, as they are scheduled, so the first trace starts without
+        waiting for every context to be generated and memory use does not grow with
+        ``max_permutations``.
 
         :param project: differ project
         :param template: trace template
-        :returns: a list of trace contexts
+        :returns: the trace contexts
         """
-        contexts = []
-        for id, values in enumerate(self.generate_parameters(template), start=1):
-            contexts.append(TraceContext(template, values, id=f'{template.id}-{id:03}'))
+        if self.golden:
+            # Run the trace contexts that were recorded in the golden snapshot
+            return self.golden.generate_contexts(template)
+
+        if self.journal and self.journal.seed is not None:
+            # Seed the generators so that a resumed run generates identical contexts
+            seed = f'{self.journal.seed}:{template.id}'
+            parameters = _isolated_random(lambda: self.generate_parameters(template), seed)
+        else:
+            parameters = iter(self.generate_parameters(template))
 
-        logger.debug('generated %d trace contexts for template %s', len(contexts), template)
-        return contexts
+        return (
+            TraceContext(template, values, id=f'{template.id}-{id:03}')
+            for id, values in enumerate(parameters, start=1)
+        )
 
-    def generate_parameters(self, template: TraceTemplate) -> list[dict]:
+    def generate_parameters(self, template: TraceTemplate) -> Iterator[dict]:
         """
-        Generate the concrete values for the trace template variables. This runs each variable's
-        :meth:`~FuzzVariable.generate_values`.
+        Lazily generate the concrete values for the trace template variables using the template's
+        parameter generator, see :func:`~differ.parameters.create_generator`. This runs each
+        variable's :meth:`~FuzzVariable.generate_values`. Generation stops when the generator is
+        exhausted or ``max_permutations`` values have been generated.
 
         :param template: trace template
-        :returns: a list of generated variable values
+        :returns: a generator of variable values
         """
-        generator = CombinationParameterGenerator(template)
-        count = 0
-        values: list[dict] = []
+        generator = create_generator(template)
+        yield from islice(generator.generate(), self.max_permutations)
 
-        for parameters in generator.generate():
-            # Populate a dictionary of the generated parameters
-            values.append(parameters)
-            count += 1
-            # We are done when every variable has been exhausted or the number of parameters
-            # generated is greater than the max_permutations setting.
-            if count >= self.max_permutations:
-                break
-
-        logger.debug('generated %d parameters for template %s', len(values), template)
-        return values
-
-    def copy_input_files(self, trace: Trace) -> None:
+    def copy_input_files(self, project: Project, trace: Trace) -> None:
         """
-        Copy input files from the template to the trace.
+        Copy input files from the template to the trace. Static input files are staged once per
+        project and are reflinked, hard linked, or copied into the trace, see
+        :class:`~differ.staging.InputStager`.
         """
         for input_file in trace.context.template.input_files:
             if input_file.static:
                 # This is a static file that should not be modified
                 dest = input_file.get_destination(trace.cwd)
-                if input_file.source.is_dir():
-                    shutil.copytree(input_file.source, dest)
-                else:
-                    if not dest.parent.exists():
-                        dest.parent.mkdir(parents=True)
-
-                    shutil.copy(str(input_file.source), str(dest))
-                    self.set_input_file_mode(input_file, dest)
+                self.stager.materialize(project, input_file, dest, self.can_hardlink(trace))
             else:
                 self.generate_input_file(trace, input_file)
 
+    def can_hardlink(self, trace: Trace) -> bool:
+        """
+        :returns: ``True`` if read-only files can be hard linked into the trace directory. Root,
+            and the mapped root user of a user namespace, can write to read-only files, so files
+            are never hard linked into a trace that runs as either.
+        """
+        network_namespace = self.network_namespace or trace.context.template.network_namespace
+        return os.geteuid() != 0 and not network_namespace
+
     def generate_input_file(self, trace: Trace, input_file: InputFile) -> None:
         """
         Render an input file with the trace context variable values.
@@ -692,11 +1698,51 @@ class Executor:
         if not dest.parent.exists():
             dest.parent.mkdir(parents=True)
 
-        content = input_file.template.render(trace=trace, **trace.context.values)
-        with open(dest, 'w') as file:
-            file.write(content)
+        def write(filename: Path) -> None:
+            # stream the rendered content so that large generated files are not held in memory
+            chunks = generate_chunks(input_file.template, trace=trace, **trace.context.values)
+            with open(filename, 'w', encoding='utf-8', errors='surrogateescape') as file:
+                file.writelines(chunks)
+
+            self.set_input_file_mode(input_file, filename)
 
-        self.set_input_file_mode(input_file, dest)
+        self.write_rendered_file(trace, is_trace_independent(input_file.template), dest, write)
+
+    def write_rendered_file(
+        self,
+        trace: Trace,
+        trace_independent: bool,
+        filename: Path,
+        write: Callable[[Path], None],
+    ) -> None:
+        """
+        Render a template to a file within the trace directory. A template that does not reference
+        the ``trace`` variable renders identical content for the original binary and every
+        debloated binary, so it is rendered once per trace context into the context's
+        :data:`RENDERED_DIRNAME` directory and is then reflinked, hard linked, or copied into each
+        trace, see :meth:`~differ.staging.InputStager.materialize_file`.
+
+        :param trace_independent: the rendered content does not depend on the trace, see
+            :func:`~differ.template.is_trace_independent`
+        :param filename: the file to write
+        :param write: renders the template and writes the content to a file
+        """
+        relative = filename.relative_to(trace.cwd) if filename.is_relative_to(trace.cwd) else None
+        if not trace_independent or not relative or '..' in relative.parts:
+            write(filename)
+            return
+
+        shared = trace.cwd.parent / RENDERED_DIRNAME / relative
+        if not shared.exists():
+            logger.debug('rendering shared file for trace context %s: %s', trace.context, relative)
+            shared.parent.mkdir(parents=True, exist_ok=True)
+            # write() creates the file so that it has the same mode as an unshared file
+            temp = shared.with_name(f'.tmp-{os.getpid()}-{threading.get_ident()}-{shared.name}')
+            write(temp)
+            # concurrent traces of the context may render the same file
+            os.replace(temp, shared)
+
+        self.stager.materialize_file(shared, filename, self.can_hardlink(trace))
 
     def set_input_file_mode(self, input_file: InputFile, destination: Path) -> None:
         """
@@ -732,11 +1778,15 @@ class Executor:
 
         # stdin is either empty or a string that we need to generate based on the context values
         filename = trace.default_stdin_path
-        with open(filename, 'wb') as file:
-            if template := trace.context.template.stdin_template:
-                content = template.render(trace=trace, **trace.context.values)
-                file.write(content.encode())
+        template = trace.context.template.stdin_template
 
+        def write(path: Path) -> None:
+            with open(path, 'wb') as file:
+                if template:
+                    for chunk in generate_chunks(template, trace=trace, **trace.context.values):
+                        file.write(chunk.encode(errors='surrogateescape'))
+
+        self.write_rendered_file(trace, is_trace_independent(template), filename, write)
         return filename
 
     def write_hook_scripts(self, trace: Trace) -> None:
@@ -783,8 +1833,11 @@ class Executor:
             if not template:
                 continue
 
-            with open(filename, 'w') as file:
-                print('#!/bin/bash', file=file)
-                print(template.render(trace=trace, **values), file=file)
+            def write(path: Path, template=template, values=values) -> None:
+                with open(path, 'w') as file:
+                    print('#!/bin/bash', file=file)
+                    print(template.render(trace=trace, **values), file=file)
+
+                os.chmod(path, 0o755)
 
-            os.chmod(filename, 0o755)
+            self.write_rendered_file(trace, is_trace_independent(template), filename, write)
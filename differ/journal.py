@@ -0,0 +1,92 @@
+"""
+The run journal records the progress of a project run so that an interrupted run can be resumed.
+The journal is stored in the project directory and each line is a single YAML flow mapping that is
+appended and flushed as soon as the event occurs. A line that was only partially written when the
+run was interrupted is ignored when the journal is loaded.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """
+    An append-only record of the trace contexts that have completed within a project directory.
+    """
+
+    #: The journal filename within the project directory
+    FILENAME = 'journal.yml'
+
+    def __init__(self, filename: Path):
+        """
+        :param filename: the journal filename
+        """
+        self.filename = filename
+        #: The seed used to generate the trace context variable values
+        self.seed: Optional[int] = None
+        #: The error count of each completed trace context, keyed by the context id
+        self.completed: dict[str, int] = {}
+        # the last line was partially written and must be terminated before appending
+        self._partial_line = False
+
+    @classmethod
+    def load(cls, filename: Path) -> 'RunJournal':
+        """
+        Load an existing journal.
+
+        :param filename: the journal filename
+        :returns: the loaded journal
+        """
+        journal = cls(filename)
+        with open(filename, 'r') as file:
+            for lineno, line in enumerate(file, start=1):
+                journal._partial_line = not line.endswith('\n')
+                try:
+                    entry = yaml.safe_load(line)
+                except yaml.YAMLError:
+                    entry = None
+
+                if not isinstance(entry, dict) or not line.endswith('\n'):
+                    logger.warning('ignoring incomplete journal entry: %s:%d', filename, lineno)
+                    continue
+
+                if 'seed' in entry and journal.seed is None:
+                    journal.seed = int(entry['seed'])
+                elif 'context' in entry:
+                    journal.completed[str(entry['context'])] = int(entry['errors'])
+
+        return journal
+
+    def start(self, seed: int) -> None:
+        """
+        Record the start of a new run.
+
+        :param seed: the seed used to generate the trace context variable values
+        """
+        self.seed = seed
+        self._append({'seed': seed})
+
+    def record(self, context_id: str, error_count: int) -> None:
+        """
+        Record that a trace context has completed.
+
+        :param context_id: the trace context id
+        :param error_count: the number of errors reported for the trace context
+        """
+        self.completed[context_id] = error_count
+        self._append({'context': context_id, 'errors': error_count})
+
+    def _append(self, entry: dict) -> None:
+        line = yaml.safe_dump(entry, default_flow_style=True, width=float('inf')).strip()
+        with open(self.filename, 'a') as file:
+            if self._partial_line:
+                file.write('\n')
+                self._partial_line = False
+            file.write(f'{line}\n')
+            file.flush()
+            os.fsync(file.fileno())
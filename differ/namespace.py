@@ -0,0 +1,96 @@
+"""
+Private network namespaces for traces. Each namespace is owned by a long-running holder process
+that is created with ``unshare`` and every process that belongs to the trace is launched within the
+namespace using ``nsenter``. A user namespace is created alongside the network namespace so that
+no elevated privileges are required.
+"""
+import logging
+import subprocess
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+#: The command that creates the namespace, brings up the loopback interface, signals that the
+#: namespace is ready, and then waits until it is terminated.
+NAMESPACE_HOLDER_COMMAND = [
+    'unshare',
+    '--user',
+    '--map-root-user',
+    '--net',
+    '--',
+    'sh',
+    '-c',
+    'ip link set lo up && echo ready && exec sleep infinity',
+]
+
+
+class NetworkNamespace:
+    """
+    A private user and network namespace that only contains a loopback interface. Processes within
+    the namespace can bind to any port without colliding with other traces that are running at the
+    same time. Processes within the namespace run as the namespace's ``root`` user, which is mapped
+    to the current user.
+    """
+
+    def __init__(self):
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def pid(self) -> int:
+        """
+        :returns: the pid of the namespace holder process
+        """
+        assert self.process, 'network namespace is not running'
+        return self.process.pid
+
+    def start(self) -> None:
+        """
+        Create the namespace and block until the loopback interface is up.
+
+        :raises OSError: the namespace could not be created
+        """
+        self.process = subprocess.Popen(
+            NAMESPACE_HOLDER_COMMAND,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        assert self.process.stdout
+
+        line = self.process.stdout.readline()
+        if line.strip() != b'ready':
+            _, stderr = self.process.communicate()
+            self.process = None
+            raise OSError(f'failed to create network namespace: {stderr.decode().strip()}')
+
+        logger.debug('created network namespace: %d', self.pid)
+
+    def wrap(self, args: list[str]) -> list[str]:
+        """
+        Wrap a command so that it executes within the namespace. ``nsenter`` executes the command
+        directly, so the launched process has the same pid as the command.
+
+        :param args: the command line arguments
+        :returns: the command line arguments that will execute within the namespace
+        """
+        return [
+            'nsenter',
+            f'--target={self.pid}',
+            '--user',
+            '--net',
+            '--preserve-credentials',
+            '--',
+        ] + args
+
+    def stop(self) -> None:
+        """
+        Terminate the namespace holder process. The namespace is destroyed once every process
+        within it has exited.
+        """
+        if not self.process:
+            return
+
+        logger.debug('destroying network namespace: %d', self.pid)
+        self.process.terminate()
+        self.process.communicate()
+        self.process = None
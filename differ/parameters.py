@@ -1,15 +1,70 @@
-from typing import Iterable
+import random
+from collections import Counter
+from itertools import combinations, product
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TypeVar
 
 from .core import FuzzVariable, TraceContext, TraceTemplate
 
+#: The default parameter generator of a template
+DEFAULT_GENERATOR = 'combination'
+
+#: Registry for all available parameter generator classes, keyed by the template's ``generator``
+#: setting
+PARAMETER_GENERATOR_REGISTRY: dict[str, type['ParameterGenerator']] = {}
+
+T = TypeVar('T', bound='ParameterGenerator')
+
+
+def register(id: str) -> Callable[[type[T]], type[T]]:
+    def wrapper(cls: type[T]) -> type[T]:
+        cls.id = id
+        PARAMETER_GENERATOR_REGISTRY[id] = cls
+        return cls
+
+    return wrapper
+
+
+def create_generator(template: TraceTemplate) -> 'ParameterGenerator':
+    """
+    Create the parameter generator that is selected by the template's ``generator`` setting.
+
+    :returns: the parameter generator
+    """
+    try:
+        generator_cls = PARAMETER_GENERATOR_REGISTRY[template.generator]
+    except KeyError:
+        raise ValueError(f'invalid parameter generator: {template.generator}') from None
+    return generator_cls(template)
+
+
+def generate_variable_values(template: TraceTemplate) -> dict[str, Sequence]:
+    """
+    Generate every value of each template variable, for parameter generators that must know all of
+    the values up front. The values of indexable variables
+    (:meth:`~differ.core.FuzzVariable.indexed_values`) are accessed by index and are not copied.
+
+    :returns: the values of each variable, keyed by variable name
+    """
+    values: dict[str, Sequence] = {}
+    for variable in template.variables.values():
+        items = variable.indexed_values(template)
+        if items is None:
+            items = list(variable.generate_values(template))
+        if not items:
+            raise ValueError(f'variable {variable.name} did not generate any values')
+        values[variable.name] = items
+    return values
+
 
 class ParameterGenerator:
     """
     Base class for all parameter generators. A parameter generator accepts a trace template and
     produces a unique set of variable values, with each corresponding to a trace context that will
-    execute.
+    execute. Generator specific options are read from the template's ``generator_config``.
     """
 
+    id: str = ''
+
     def __init__(self, template: TraceTemplate):
         self.template = template
 
@@ -19,22 +74,55 @@ class ParameterGenerator:
 
 class ParameterIterator:
     """
-    An iterator over generated variable values where the values are cached and repeated once the
-    iterator has been exhausted.
+    An iterator over generated variable values where the values are repeated once the iterator
+    has been exhausted. The values are repeated without holding every value in memory when the
+    variable supports it: the values of an indexable variable
+    (:meth:`~differ.core.FuzzVariable.indexed_values`) are accessed by index and the values of a
+    :attr:`~differ.core.FuzzVariable.reiterable` variable are generated again. Otherwise, every
+    generated value is cached.
     """
 
     def __init__(self, template: TraceTemplate, variable: FuzzVariable):
+        self.template = template
         self.variable = variable
         self._pos = 0
-        self._iter = self.variable.generate_values(template)
-        self.value = next(self._iter)
-        self._cache = [self.value]
+        #: The variable's values, when they can be accessed by index
+        self._sequence: Optional[Sequence] = variable.indexed_values(template)
+        #: The generated values, when the variable's values can not be generated again
+        self._cache: Optional[list] = None
+        if self._sequence is not None:
+            if not self._sequence:
+                raise ValueError(f'variable {variable.name} did not generate any values')
+            self.value = self._sequence[0]
+        else:
+            self._iter = self.variable.generate_values(template)
+            self.value = next(self._iter)
+            if not variable.reiterable:
+                self._cache = [self.value]
 
     def advance(self) -> bool:
         """
         Advance to the next value and return ``True`` if the iterator has reached the end
         (has been exhausted).
         """
+        if self._sequence is not None:
+            self._pos += 1
+            exhausted = self._pos >= len(self._sequence)
+            if exhausted:
+                self._pos = 0
+            self.value = self._sequence[self._pos]
+            return exhausted
+
+        if self._cache is None:
+            try:
+                self.value = next(self._iter)
+            except StopIteration:
+                # restart the variable's values
+                self._iter = self.variable.generate_values(self.template)
+                self.value = next(self._iter)
+                return True
+            return False
+
         exhausted = False
         if self._pos:
             try:
@@ -57,6 +145,7 @@ class ParameterIterator:
         return exhausted
 
 
+@register('combination')
 class CombinationParameterGenerator(ParameterGenerator):
     """
     Generate unique combinations of parameters until all variable values and combinations have been
@@ -109,3 +198,205 @@ class CombinationParameterGenerator(ParameterGenerator):
                 # We are done when every value iterator has been exhausted (all calls to advance()
                 # return True).
                 exhausted = True
+
+
+@register('t-way')
+class CoveringArrayParameterGenerator(ParameterGenerator):
+    """
+    Generate a t-way covering array, where every combination of values of any ``strength``
+    variables appears in at least one generated set of values. The number of generated values
+    grows logarithmically with the number of variables rather than multiplicatively, so the
+    variables are varied evenly when ``--max-permutations`` truncates the output. This accepts the
+    following template configuration:
+
+    .. code-block:: yaml
+
+        generator:
+          type: t-way
+          # The number of variables whose value combinations are covered (default: 2)
+          strength: 3
+
+    The array is built greedily one row at a time: each row starts from the first uncovered
+    combination and every other variable is assigned the value that covers the most uncovered
+    combinations, so the earliest rows cover the most combinations. Ties are broken by the value
+    that appears in the most uncovered combinations.
+    """
+
+    #: The default strength
+    DEFAULT_STRENGTH = 2
+
+    def __init__(self, template: TraceTemplate):
+        super().__init__(template)
+        self.strength = int(template.generator_config.get('strength', self.DEFAULT_STRENGTH))
+        if self.strength < 1:
+            raise ValueError(f'invalid covering array strength: {self.strength}')
+
+        #: The values of each variable. Every combination of values must be known up front.
+        self.values = generate_variable_values(template)
+
+    def generate(self) -> Iterator[dict]:
+        """
+        Generate the rows of the covering array, for example a pairwise covering array for three
+        variables with two values each:
+
+        .. code-block:: python
+
+            # trace template variables
+            variables = {
+                'x': ['a', 'b'],
+                'y': [1, 2],
+                'z': [True, False]
+            }
+
+            # result from list(generate())
+            result = [
+                {'x': 'a', 'y': 1, 'z': True  },
+                {'x': 'a', 'y': 2, 'z': False },
+                {'x': 'b', 'y': 1, 'z': False },
+                {'x': 'b', 'y': 2, 'z': True  },
+            ]
+        """
+        names = list(self.values)
+        values = list(self.values.values())
+        if not names:
+            yield {}
+            return
+
+        # each combination is a tuple of (variable indexes, value indexes)
+        strength = min(self.strength, len(names))
+        ordered = [
+            (columns, row)
+            for columns in combinations(range(len(names)), strength)
+            for row in product(*(range(len(values[column])) for column in columns))
+        ]
+        uncovered = set(ordered)
+        # the number of uncovered combinations that contain each (variable index, value index)
+        remaining: Counter[tuple[int, int]] = Counter()
+        for columns, row in ordered:
+            remaining.update(zip(columns, row))
+
+        cursor = 0
+        while uncovered:
+            while ordered[cursor] not in uncovered:
+                cursor += 1
+
+            seed_columns, seed_row = ordered[cursor]
+            row: list = [None] * len(names)
+            for column, value in zip(seed_columns, seed_row):
+                row[column] = value
+
+            for column in range(len(names)):
+                if row[column] is None:
+                    row[column] = self._best_value(
+                        values, row, column, strength, uncovered, remaining
+                    )
+
+            for columns in combinations(range(len(names)), strength):
+                combination = tuple(row[column] for column in columns)
+                if (columns, combination) in uncovered:
+                    uncovered.remove((columns, combination))
+                    remaining.subtract(zip(columns, combination))
+
+            yield {name: values[index][row[index]] for index, name in enumerate(names)}
+
+    def _best_value(
+        self,
+        values: list[Sequence],
+        row: list,
+        column: int,
+        strength: int,
+        uncovered: set,
+        remaining: Counter,
+    ) -> int:
+        # choose the value that completes the most uncovered combinations with the variables that
+        # have already been assigned within the row
+        assigned = [index for index, value in enumerate(row) if value is not None]
+        best_value = 0
+        best_count: tuple[int, int] = (-1, -1)
+        for value in range(len(values[column])):
+            count = 0
+            for others in combinations(assigned, strength - 1):
+                columns = tuple(sorted((*others, column)))
+                combination = tuple(value if index == column else row[index] for index in columns)
+                if (columns, combination) in uncovered:
+                    count += 1
+            if (count, remaining[(column, value)]) > best_count:
+                best_value = value
+                best_count = (count, remaining[(column, value)])
+        return best_value
+
+
+@register('pairwise')
+class PairwiseParameterGenerator(CoveringArrayParameterGenerator):
+    """
+    Generate a pairwise covering array, where every pair of values of any two variables appears
+    in at least one generated set of values. This is a :class:`CoveringArrayParameterGenerator`
+    with a strength of ``2``.
+    """
+
+    def __init__(self, template: TraceTemplate):
+        super().__init__(template)
+        self.strength = 2
+
+
+@register('random')
+class RandomParameterGenerator(ParameterGenerator):
+    """
+    Generate distinct combinations of variable values in a uniformly random order. Each
+    combination is an index into the space of every combination, which is decoded in mixed radix,
+    so the combinations are sampled without enumerating or storing the cartesian product. Drawing
+    ``N`` combinations takes ``O(N)`` time and memory regardless of the size of the space. This
+    accepts the following template configuration:
+
+    .. code-block:: yaml
+
+        generator:
+          type: random
+          # The seed of the sample (default: the run's seed, see the --seed option)
+          seed: 1234
+
+    Without a ``seed``, the sample is drawn from the :mod:`random` module, which the executor
+    seeds from the run's seed, so a resumed run generates the same sample.
+    """
+
+    def __init__(self, template: TraceTemplate):
+        super().__init__(template)
+        seed = template.generator_config.get('seed')
+        #: The random number generator of the template's seed
+        self.random = random.Random(seed) if seed is not None else None
+        #: The values of each variable
+        self.values = generate_variable_values(template)
+        #: The number of combinations in the space
+        self.size = 1
+        for values in self.values.values():
+            self.size *= len(values)
+
+    def decode(self, index: int) -> dict:
+        """
+        Decode a combination index in mixed radix, where the last variable is the least
+        significant digit. Index ``i`` is the ``i``-th combination that
+        :class:`CombinationParameterGenerator` generates.
+
+        :param index: the combination index, ``0 <= index < size``
+        :returns: the variable values of the combination
+        """
+        result = {}
+        for name, values in reversed(self.values.items()):
+            index, digit = divmod(index, len(values))
+            result[name] = values[digit]
+        return {name: result[name] for name in self.values}
+
+    def generate(self) -> Iterator[dict]:
+        """
+        Generate every combination in a uniformly random order. This is a lazy Fisher-Yates
+        shuffle of the combination indexes where only the swapped indexes are stored.
+        """
+        randrange = self.random.randrange if self.random else random.randrange
+        swapped: dict[int, int] = {}
+        for position in range(self.size):
+            other = randrange(position, self.size)
+            index = swapped.get(other, other)
+            current = swapped.pop(position, position)
+            if other != position:
+                swapped[other] = current
+            yield self.decode(index)
@@ -0,0 +1,144 @@
+"""
+Dynamic network port allocation for traces. Ports are allocated by asking the kernel for a free
+port and are reserved until the trace releases them so that traces running at the same time never
+receive the same port. Reservations are shared by every process on the host, including the forked
+``--jobs`` workers, through a byte-range lock on a shared lock file.
+"""
+import fcntl
+import logging
+import os
+import socket
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+#: The lock file that port reservations are shared through. Each reserved port is an exclusive lock
+#: on the byte at the port's offset.
+PORT_LOCK_FILENAME = Path(tempfile.gettempdir()) / 'differ-ports.lock'
+
+#: The socket type for each supported protocol
+SOCKET_TYPES = {
+    'tcp': socket.SOCK_STREAM,
+    'udp': socket.SOCK_DGRAM,
+}
+
+
+class PortAllocator:
+    """
+    Allocates free TCP and UDP ports. This class is thread safe and the reservations are shared by
+    processes. POSIX record locks are owned by the process and are not inherited by forked
+    processes, so a port that is reserved by one worker can not be reserved by another, and the
+    reservations of a process are released when it exits.
+    """
+
+    def __init__(self, lock_filename: Path = PORT_LOCK_FILENAME):
+        """
+        :param lock_filename: the lock file that reservations are shared through
+        """
+        self.lock_filename = lock_filename
+        self._reserved: set[int] = set()
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+
+    def _lock_file(self) -> Optional[int]:
+        if self._lock_fd is None:
+            try:
+                self._lock_fd = os.open(self.lock_filename, os.O_RDWR | os.O_CREAT, 0o666)
+            except OSError as err:
+                # fall back to reservations within this process
+                logger.warning('failed to open port lock file %s: %s', self.lock_filename, err)
+                self._lock_fd = -1
+        return self._lock_fd if self._lock_fd >= 0 else None
+
+    def reserve(self, port: int) -> bool:
+        """
+        Reserve a port, if it is not already reserved by this process or another process. The
+        caller must hold the allocator's lock.
+
+        :returns: ``True`` if the port was reserved
+        """
+        if port in self._reserved:
+            return False
+
+        if (fd := self._lock_file()) is not None:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, port)
+            except OSError:
+                # another process reserved the port
+                return False
+
+        self._reserved.add(port)
+        return True
+
+    def allocate(self, protocol: str) -> int:
+        """
+        Allocate a free port for the protocol. The port is reserved until it is released.
+
+        :param protocol: the protocol, either ``tcp`` or ``udp``
+        :returns: the allocated port
+        """
+        socket_type = SOCKET_TYPES[protocol]
+        with self._lock:
+            while True:
+                with socket.socket(socket.AF_INET, socket_type) as sock:
+                    sock.bind(('', 0))
+                    port = sock.getsockname()[1]
+
+                if self.reserve(port):
+                    return port
+
+    def allocate_ports(self, ports: dict[str, str]) -> dict[str, int]:
+        """
+        Allocate a port for each entry in a template's port configuration.
+
+        :param ports: the port names and protocols, see :attr:`~differ.core.TraceTemplate.ports`
+        :returns: the allocated port for each name
+        """
+        return {name: self.allocate(protocol) for name, protocol in ports.items()}
+
+    def release(self, ports: dict[str, int]) -> None:
+        """
+        Release previously allocated ports.
+
+        :param ports: the allocated ports returned by :meth:`allocate_ports`
+        """
+        with self._lock:
+            for port in ports.values():
+                if port not in self._reserved:
+                    continue
+
+                self._reserved.remove(port)
+                if (fd := self._lock_file()) is not None:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, port)
+
+
+#: The ``/proc`` socket state of a TCP socket that is listening for connections
+TCP_LISTEN_STATE = '0A'
+
+
+def is_port_listening(pid: int, port: int) -> bool:
+    """
+    Check if a TCP socket is listening on a port within the network namespace of a process. The
+    socket tables are read from ``/proc/{pid}/net`` so the check works for processes running within
+    a private network namespace.
+
+    :param pid: the process id whose network namespace is checked
+    :param port: the TCP port
+    :returns: ``True`` if a socket is listening on the port
+    """
+    for table in ('tcp', 'tcp6'):
+        try:
+            lines = Path(f'/proc/{pid}/net/{table}').read_text().splitlines()[1:]
+        except OSError:
+            continue
+
+        for line in lines:
+            fields = line.split()
+            local_port = int(fields[1].rsplit(':', 1)[1], 16)
+            if local_port == port and fields[3] == TCP_LISTEN_STATE:
+                return True
+
+    return False
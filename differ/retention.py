@@ -0,0 +1,158 @@
+"""
+Retention policy of the report tree. A full run leaves tens of thousands of trace context
+directories, most of which belong to trace contexts that passed. The retention policy prunes the
+directories of passing trace contexts as soon as their results are recorded and moves the report
+trees of previous runs aside, deleting them within a background thread so that a new run is not
+held up by the delete.
+"""
+import errno
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from .core import Project
+from .workspace import directory_size
+
+logger = logging.getLogger(__name__)
+
+#: Keep the directory of every trace context
+KEEP_ALL = 'all'
+#: Only keep the directories of trace contexts that have an error or a crash
+KEEP_FAILURES = 'failures'
+#: The retention modes that are accepted by the ``--keep`` argument
+KEEP_MODES = (KEEP_ALL, KEEP_FAILURES)
+
+
+def remove_tree(path: Path) -> threading.Thread:
+    """
+    Rename a directory aside and delete it within a background thread. The rename is immediate, so
+    the path can be reused as soon as this function returns. The thread is not a daemon thread, so
+    the process does not exit until the delete has completed.
+
+    :param path: the directory to delete
+    :returns: the thread that deletes the directory
+    """
+    trash = path.with_name(f'.{path.name}.deleting-{os.getpid()}-{time.time_ns()}')
+    path.rename(trash)
+    logger.debug('deleting directory in the background: %s', path)
+    thread = threading.Thread(
+        target=shutil.rmtree, args=(trash,), kwargs={'ignore_errors': True}, name='remove-tree'
+    )
+    thread.start()
+    return thread
+
+
+class RetentionPolicy:
+    """
+    Decides which trace context directories and previous report trees are kept.
+    """
+
+    def __init__(self, keep: str = KEEP_ALL, keep_runs: int = 1, max_disk_usage: int = 0):
+        """
+        :param keep: the trace context directories to keep, either :data:`KEEP_ALL` or
+            :data:`KEEP_FAILURES`
+        :param keep_runs: the number of runs of each project to keep, including the current run.
+            When greater than one, the report tree of the previous run is renamed to
+            ``{project}.run-{timestamp}`` rather than being deleted.
+        :param max_disk_usage: the maximum number of bytes that a project's report tree can use.
+            Once a project has reached this size, the directories of passing trace contexts are
+            pruned. ``0`` disables the limit.
+        """
+        if keep not in KEEP_MODES:
+            raise ValueError(f'invalid retention mode: {keep}')
+
+        #: The trace context directories to keep
+        self.keep = keep
+        #: The number of runs of each project to keep
+        self.keep_runs = max(keep_runs, 1)
+        #: The maximum size of each project's report tree, in bytes, ``0`` for no limit
+        self.max_disk_usage = max_disk_usage
+        #: The current size of each project's report tree, keyed by project name. This is only
+        #: tracked when :attr:`max_disk_usage` is set.
+        self.disk_usage: dict[str, int] = {}
+        #: The number of trace context directories that were pruned, keyed by project name
+        self.pruned: Counter[str] = Counter()
+
+    def archive_directory(self, project: Project) -> Path:
+        """
+        :returns: the directory that a previous run of the project is moved to
+        """
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        return project.directory.with_name(f'{project.directory.name}.run-{timestamp}')
+
+    def previous_runs(self, project: Project) -> list[Path]:
+        """
+        :returns: the report trees of the previous runs of a project, oldest first
+        """
+        return sorted(project.directory.parent.glob(f'{project.directory.name}.run-*'))
+
+    def remove_previous_run(self, project: Project, overwrite: bool) -> None:
+        """
+        Move the existing report tree of a project aside. When more than one run is kept, the
+        report tree is renamed to :meth:`archive_directory` and the oldest runs beyond
+        :attr:`keep_runs` are deleted. Otherwise, the report tree is deleted. Every delete happens
+        within a background thread, see :func:`remove_tree`.
+
+        :param overwrite: the report tree can be deleted
+        :raises FileExistsError: the report tree exists and can not be deleted or archived
+        """
+        if self.keep_runs > 1:
+            archive = self.archive_directory(project)
+            logger.info('moving previous run of project %s to %s', project.name, archive)
+            project.directory.rename(archive)
+            previous = self.previous_runs(project)
+            for path in previous[: max(len(previous) - (self.keep_runs - 1), 0)]:
+                remove_tree(path)
+        elif overwrite:
+            remove_tree(project.directory)
+        else:
+            # The project directory must not exist
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(project.directory))
+
+    def start_project(self, project: Project) -> None:
+        """
+        Measure the size of a project's report tree, which is not empty when a run is resumed.
+        """
+        if self.max_disk_usage:
+            self.disk_usage[project.name] = directory_size(project.directory)
+
+    def context_finished(self, project: Project, context_id: str, errors: int) -> None:
+        """
+        Prune the directory of a trace context that has been recorded, if the policy does not
+        keep it. Only the directories of passing trace contexts are pruned.
+
+        :param context_id: the trace context id
+        :param errors: the number of errors that the trace context reported
+        """
+        context_dir = project.directory / f'trace-{context_id}'
+        if context_dir.is_symlink() or not context_dir.is_dir():
+            # the trace context was discarded from the memory-backed workspace
+            return
+
+        prune = not errors and self.keep == KEEP_FAILURES
+        if not prune and self.max_disk_usage:
+            size = directory_size(context_dir)
+            usage = self.disk_usage.get(project.name, 0)
+            if not errors and usage + size > self.max_disk_usage:
+                prune = True
+            else:
+                # failing trace contexts are always kept
+                self.disk_usage[project.name] = usage + size
+
+        if prune:
+            shutil.rmtree(context_dir, ignore_errors=True)
+            self.pruned[project.name] += 1
+
+    def log_summary(self, project: Project) -> None:
+        """
+        Log the number of trace context directories that were pruned.
+        """
+        if count := self.pruned[project.name]:
+            logger.info(
+                'project %s pruned %d passing trace context directories', project.name, count
+            )
@@ -0,0 +1,148 @@
+"""
+Golden snapshots of original binary traces. A snapshot is recorded once by running the original
+binary for every trace context of a project and is stored as a portable ``tar.gz`` archive. A
+snapshot can then be used on any machine to run only the debloated binaries: the original trace of
+each context is restored from the snapshot and verified again with each comparator's
+``verify_original`` method.
+"""
+import logging
+import tarfile
+from pathlib import Path
+from typing import Any, Optional
+
+import yaml
+
+from .cache import TraceCache, file_digest
+from .core import Project, Trace, TraceContext, TraceTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class GoldenSnapshot:
+    """
+    A set of original binary traces, one for each trace context. The snapshot is stored within a
+    directory that contains a ``snapshot.yml`` manifest and a :class:`~differ.cache.TraceCache`
+    whose keys are the trace context ids.
+    """
+
+    #: The manifest filename
+    MANIFEST_FILENAME = 'snapshot.yml'
+    #: The trace directory within the snapshot
+    TRACES_DIRNAME = 'traces'
+
+    def __init__(self, directory: Path, project_name: str = '', original_digest: str = ''):
+        """
+        :param directory: the snapshot directory
+        :param project_name: the name of the recorded project
+        :param original_digest: the SHA-256 digest of the recorded original binary
+        """
+        self.directory = directory
+        self.project_name = project_name
+        self.original_digest = original_digest
+        #: The recorded trace contexts, keyed by the context id. Each value contains the template
+        #: id and the context variable values.
+        self.contexts: dict[str, dict[str, Any]] = {}
+        self.traces = TraceCache(directory / self.TRACES_DIRNAME)
+
+    @classmethod
+    def create(cls, directory: Path, project: Project) -> 'GoldenSnapshot':
+        """
+        Create a new, empty snapshot for a project.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        digest = file_digest(project.original) if project.original.is_file() else ''
+        return cls(directory, project.name, digest)
+
+    @classmethod
+    def load(cls, archive: Path, directory: Path) -> 'GoldenSnapshot':
+        """
+        Extract and load a snapshot archive.
+
+        :param archive: the snapshot archive
+        :param directory: the directory to extract the snapshot to
+        :returns: the loaded snapshot
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(archive, 'r:gz') as tar:
+            if hasattr(tarfile, 'tar_filter'):
+                # reject members that would be extracted outside of the directory
+                tar.extractall(directory, filter='tar')
+            else:
+                tar.extractall(directory)  # pragma: no cover
+
+        body = yaml.safe_load((directory / cls.MANIFEST_FILENAME).read_text())
+        snapshot = cls(directory, body['project'], body.get('original_digest', ''))
+        snapshot.contexts = body['contexts']
+        return snapshot
+
+    def add(self, trace: Trace) -> None:
+        """
+        Add a verified original trace to the snapshot.
+        """
+        context = trace.context
+        self.traces.store(trace, context.id)
+        self.contexts[context.id] = {'template': context.template.id, 'values': context.values}
+
+    def restore(self, trace: Trace) -> bool:
+        """
+        Restore an original trace from the snapshot.
+
+        :returns: ``True`` if the trace was restored, ``False`` if the trace context was not
+            recorded
+        """
+        return self.traces.restore(trace, trace.context.id)
+
+    def generate_contexts(self, template: TraceTemplate) -> list[TraceContext]:
+        """
+        :returns: the recorded trace contexts of a template
+        """
+        return [
+            TraceContext(template, body['values'], id=context_id)
+            for context_id, body in self.contexts.items()
+            if body['template'] == template.id
+        ]
+
+    def check_project(self, project: Project) -> None:
+        """
+        Verify that the snapshot was recorded for the project.
+
+        :raises ValueError: the snapshot was recorded for a different project
+        """
+        if project.name != self.project_name:
+            raise ValueError(
+                f'snapshot was recorded for project {self.project_name}, not {project.name}'
+            )
+
+        if self.original_digest and project.original.is_file():
+            if file_digest(project.original) != self.original_digest:
+                logger.warning('original binary does not match the snapshot: %s', project.original)
+
+    def save(self, archive: Path, seed: Optional[int] = None) -> None:
+        """
+        Write the manifest and save the snapshot to a ``tar.gz`` archive.
+
+        :param archive: the archive filename
+        :param seed: the seed used to generate the trace contexts
+        """
+        body = {
+            'project': self.project_name,
+            'original_digest': self.original_digest,
+            'seed': seed,
+            'contexts': self.contexts,
+        }
+        (self.directory / self.MANIFEST_FILENAME).write_text(yaml.safe_dump(body))
+        with tarfile.open(archive, 'w:gz') as tar:
+            tar.add(self.directory / self.MANIFEST_FILENAME, self.MANIFEST_FILENAME)
+            if self.traces.directory.is_dir():
+                tar.add(self.traces.directory, self.TRACES_DIRNAME, filter=_portable_member)
+
+
+def _portable_member(member: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+    """
+    Exclude links to absolute paths, such as the link to the original binary, from the archive.
+    These links are specific to the machine that recorded the snapshot and are recreated when each
+    trace is prepared.
+    """
+    if member.issym() and member.linkname.startswith('/'):
+        return None
+    return member
@@ -0,0 +1,192 @@
+"""
+Staging of static input files. A static input file, such as a directory of files that a server
+serves, is identical in every trace, so it is copied once per project into a staging directory
+and each trace directory receives a reflink or a hard link of the staged file rather than another
+full copy. Reflinks share the file's data until either copy is modified and are used when the
+filesystem supports them, such as Btrfs and XFS. Hard links share the file itself and are only
+used for read-only files, and only when the trace can not write to them, which is not the case
+when the trace runs as root or within a user namespace. Every other file is copied. The staged file
+has the mode and modification time that a copy would have, so the materialized files are identical
+regardless of the method.
+"""
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from .core import InputFile, Project
+
+logger = logging.getLogger(__name__)
+
+#: The Linux ``FICLONE`` ioctl request, which clones the data of a file into another file
+FICLONE = 0x40049409
+
+#: Materialized by a reflink of the staged file
+METHOD_REFLINK = 'reflink'
+#: Materialized by a hard link to the staged file
+METHOD_HARDLINK = 'hardlink'
+#: Materialized by a copy of the staged file
+METHOD_COPY = 'copy'
+
+#: The errors that indicate that the filesystem does not support reflinks
+_REFLINK_UNSUPPORTED = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS)
+
+
+def reflink(source: Path, destination: Path) -> None:
+    """
+    Create a copy-on-write clone of a file. The destination must not exist.
+
+    :param source: the source file
+    :param destination: the destination file
+    :raises OSError: the filesystem does not support reflinks
+    """
+    with open(source, 'rb') as src, open(destination, 'xb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            destination.unlink()
+            raise
+
+
+class InputStager:
+    """
+    Stages static input files within each project's staging directory and materializes them into
+    trace directories. Each staged file is written to a temporary name and renamed into place, so
+    concurrent workers that stage the same input file never observe a partial file.
+    """
+
+    def __init__(self):
+        #: Reflinks are supported by the filesystem of the staging directory, or ``None`` if this
+        #: has not been checked yet
+        self.reflink_supported: Optional[bool] = None
+        #: The number of materialized files, keyed by method
+        self.materialized: Counter[str] = Counter()
+
+    def staged_path(self, project: Project, input_file: InputFile) -> Path:
+        """
+        :returns: the staged path of an input file. Input files with the same source and mode share
+            a staged path.
+        """
+        key = hashlib.sha256(f'{input_file.source}\0{input_file.mode}'.encode()).hexdigest()
+        return project.staging_directory() / f'{key[:16]}-{input_file.source.name}'
+
+    def stage(self, project: Project, input_file: InputFile) -> Path:
+        """
+        Stage a static input file, if it has not already been staged. The staged file has the
+        input file's mode, or the source file's mode, and the source file's access and modified
+        times.
+
+        :returns: the staged path
+        """
+        staged = self.staged_path(project, input_file)
+        if staged.exists():
+            return staged
+
+        logger.debug('staging static input file: %s', input_file.source)
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        temp_dir = Path(tempfile.mkdtemp(dir=staged.parent, prefix='.tmp-'))
+        try:
+            temp = temp_dir / staged.name
+            if input_file.source.is_dir():
+                shutil.copytree(input_file.source, temp)
+            else:
+                shutil.copy2(input_file.source, temp)
+                if input_file.mode:
+                    # chmod() keeps the modified time that copy2() preserved
+                    os.chmod(temp, int(input_file.mode, 8))
+            try:
+                temp.rename(staged)
+            except OSError:
+                # another worker staged the same input file first
+                if not staged.exists():
+                    raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return staged
+
+    def materialize(
+        self, project: Project, input_file: InputFile, destination: Path, hardlink: bool = True
+    ) -> None:
+        """
+        Stage a static input file and materialize it at the destination within a trace directory.
+
+        :param hardlink: read-only files can be hard linked, see :meth:`materialize_file`
+        """
+        staged = self.stage(project, input_file)
+        if staged.is_dir():
+            self._materialize_tree(staged, destination, hardlink)
+        else:
+            if not destination.parent.exists():
+                destination.parent.mkdir(parents=True)
+            self.materialize_file(staged, destination, hardlink)
+
+    def _materialize_tree(self, staged: Path, destination: Path, hardlink: bool) -> None:
+        destination.mkdir(parents=True)
+        directories = []
+        for dirpath, dirnames, filenames in os.walk(staged):
+            relative = Path(dirpath).relative_to(staged)
+            target = destination / relative
+            for name in dirnames:
+                (target / name).mkdir()
+            for name in filenames:
+                self.materialize_file(Path(dirpath, name), target / name, hardlink)
+            directories.append((Path(dirpath), target))
+
+        # copy the directory modes last, in case a directory is read-only
+        for source, target in reversed(directories):
+            shutil.copystat(source, target)
+
+    def materialize_file(self, staged: Path, destination: Path, hardlink: bool = True) -> None:
+        """
+        Materialize a staged file at the destination by a reflink, a hard link if the staged file
+        is read-only, or a copy. The destination has the staged file's mode and times.
+
+        :param hardlink: read-only files can be hard linked. This must be ``False`` when the trace
+            can write to read-only files, since a write would modify the staged file and every
+            other trace's file.
+        """
+        if self.reflink_supported is not False:
+            try:
+                reflink(staged, destination)
+            except OSError as err:
+                if err.errno not in _REFLINK_UNSUPPORTED:
+                    raise
+                logger.debug('reflinks are not supported: %s', err)
+                self.reflink_supported = False
+            else:
+                shutil.copystat(staged, destination)
+                self.reflink_supported = True
+                self.materialized[METHOD_REFLINK] += 1
+                return
+
+        if hardlink and not staged.stat().st_mode & 0o222:
+            # the file is read-only, so the trace can not modify the staged file
+            try:
+                os.link(staged, destination)
+            except OSError as err:
+                # the trace directory is on a different filesystem
+                logger.debug('failed to hard link static input file: %s', err)
+            else:
+                self.materialized[METHOD_HARDLINK] += 1
+                return
+
+        shutil.copy2(staged, destination)
+        self.materialized[METHOD_COPY] += 1
+
+    def cleanup(self, project: Project) -> None:
+        """
+        Remove the project's staged input files.
+        """
+        staging_directory = project.staging_directory()
+        if staging_directory.exists():
+            shutil.rmtree(staging_directory, ignore_errors=True)
+        if self.materialized:
+            logger.debug('materialized static input files: %s', dict(self.materialized))
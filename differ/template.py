@@ -6,8 +6,70 @@ templates.
 import os
 import shlex
 import socket
+from itertools import islice
+from typing import Any, Iterator, Optional, Union
+
+import jinja2
+from jinja2 import Environment, meta, nodes
+
+
+class Template(jinja2.Template):
+    """
+    A Jinja2 template that records whether it references the ``trace`` variable.
+    """
+
+    #: The template does not reference the ``trace`` variable, so it renders identical content for
+    #: every trace of a trace context
+    trace_independent: bool = False
+
+
+class TemplateEnvironment(Environment):
+    """
+    A Jinja2 Environment that inspects the variables that each template references when the
+    template is compiled.
+    """
+
+    template_class = Template
+
+    def from_string(
+        self,
+        source: Union[str, nodes.Template],
+        globals: Optional[dict[str, Any]] = None,
+        template_class: Optional[type[jinja2.Template]] = None,
+    ) -> jinja2.Template:
+        ast = self.parse(source) if isinstance(source, str) else source
+        template = super().from_string(ast, globals, template_class)
+        if isinstance(template, Template):
+            template.trace_independent = 'trace' not in meta.find_undeclared_variables(ast)
+        return template
+
+
+#: The number of output pieces that :func:`generate_chunks` joins into each chunk
+STREAM_BUFFER_SIZE = 1024
+
+
+def generate_chunks(template: jinja2.Template, **values: Any) -> Iterator[str]:
+    """
+    Render a template in chunks, so that large rendered content is never held in memory as a
+    single string. Jinja2 generates its output in many small pieces and writing each piece on its
+    own is much slower than :meth:`~jinja2.Template.render`, so every :data:`STREAM_BUFFER_SIZE`
+    pieces are joined into a single chunk.
+
+    :param values: the template variables
+    :returns: a generator that yields the rendered content in chunks
+    """
+    pieces = iter(template.generate(**values))
+    while chunk := list(islice(pieces, STREAM_BUFFER_SIZE)):
+        yield ''.join(chunk)
+
+
+def is_trace_independent(template: Any) -> bool:
+    """
+    :returns: ``True`` if the template was compiled by :data:`JINJA_ENVIRONMENT` and does not
+        reference the ``trace`` variable
+    """
+    return isinstance(template, Template) and template.trace_independent
 
-from jinja2 import Environment
 
 #: The Jinja2 Environment will custom filters.
 #:
@@ -17,7 +79,7 @@ from jinja2 import Environment
 #: And global variables.
 #:
 #: - ``env`` - :data:`os.environ`
-JINJA_ENVIRONMENT = Environment(
+JINJA_ENVIRONMENT = TemplateEnvironment(
     keep_trailing_newline=True,
 )
 
@@ -1,5 +1,5 @@
 import random
-from typing import Iterator, Optional
+from typing import Iterator, Optional, Sequence
 
 import exrex
 
@@ -55,6 +55,10 @@ class IntVariable(FuzzVariable):
         if self.count:
             yield from random.sample(range(self.minimum, self.maximum + 1), k=self.count)
 
+    def indexed_values(self, template: TraceTemplate) -> Optional[Sequence[int]]:
+        # sampled values are random and are only available from generate_values()
+        return None if self.count else self.values
+
 
 @register('str')
 class StringVariable(FuzzVariable):
@@ -95,5 +99,9 @@ class StringVariable(FuzzVariable):
         if self.pattern:
             yield from [self.generate_string(self.pattern) for _ in range(self.count)]
 
+    def indexed_values(self, template: TraceTemplate) -> Optional[Sequence[str]]:
+        # sampled values are random and are only available from generate_values()
+        return None if self.count else self.values
+
     def generate_string(self, regex: str) -> str:
         return exrex.getone(regex)
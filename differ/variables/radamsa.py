@@ -1,6 +1,7 @@
 import errno
 import logging
 import os
+import random
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
@@ -64,11 +65,19 @@ class RadamsaVariable(FuzzVariable):
     Because Radamsa can find new bugs, it is not recommended to expect an exit code for templates
     that have at least one Radamsa variable (see the
     :class:`~differ.comparators.primitives.ExitCodeComparator`).
+
+    Radamsa generates the same values for the same seed argument, so the seed argument of each
+    seed value is drawn once and reused when the values are generated again. This makes the
+    variable :attr:`~differ.core.FuzzVariable.reiterable` and its values are not cached.
     """
 
+    reiterable = True
+
     def __init__(self, name: str, config: dict):
         super().__init__(name, config)
         self.config = RadamsaConfig.parse(config)
+        #: The radamsa seed argument of each seed value, drawn on first use
+        self.seed_args: list[int] = []
 
         if not RADAMSA_BIN_FILENAME.is_file():
             raise FileNotFoundError(
@@ -76,15 +85,20 @@ class RadamsaVariable(FuzzVariable):
             )
 
     def generate_values(self, template: TraceTemplate) -> Iterator:
-        for seed in self.config.seeds:
-            yield from self._generate_from_seed(seed, self.config.count)
-
-    def _generate_from_seed(self, seed: str, count: int) -> list[str]:
+        for index, seed in enumerate(self.config.seeds):
+            if index == len(self.seed_args):
+                # Seed radamsa from the random module so that seeded runs generate identical
+                # values. The seed argument is drawn as the seed is reached, which keeps the
+                # order of random draws identical to a run that does not repeat the values.
+                self.seed_args.append(random.getrandbits(32))
+            yield from self._generate_from_seed(seed, self.config.count, self.seed_args[index])
+
+    def _generate_from_seed(self, seed: str, count: int, seed_arg: int) -> list[str]:
         if not seed.endswith('\n'):
             seed += '\n'
 
         proc = subprocess.Popen(
-            [str(RADAMSA_BIN_FILENAME), '--count', str(count)],
+            [str(RADAMSA_BIN_FILENAME), '--seed', str(seed_arg), '--count', str(count)],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -95,6 +109,6 @@ class RadamsaVariable(FuzzVariable):
         # returned values, filter out any empty values, and only return the first `count`
         # generated. For more information, see this comment:
         # https://github.com/trailofbits/differ/issues/15#issuecomment-1428471480
-        unique = set(stdout.decode(errors='replace').splitlines(keepends=False))
+        unique = dict.fromkeys(stdout.decode(errors='replace').splitlines(keepends=False))
         items = [item for item in unique if item]
         return items[:count]
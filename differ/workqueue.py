@@ -0,0 +1,364 @@
+"""
+A durable work queue that distributes trace contexts to worker processes. The queue is a SQLite
+database, which can be placed on storage that is shared by several hosts, and an artifact directory
+next to the database that workers upload the results of each trace context to.
+
+A coordinator publishes the pending trace contexts of a project and collects each result as it
+completes. Workers claim a single trace context at a time and hold a lease on it while it runs. A
+worker renews its lease periodically and the context is returned to the queue when the lease
+expires, which happens when a worker dies or loses access to the queue.
+"""
+import contextlib
+import logging
+import sqlite3
+import tarfile
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import yaml
+
+from .core import Project, TraceContext
+
+logger = logging.getLogger(__name__)
+
+#: The default amount of time, in seconds, that a worker holds a trace context before it is
+#: returned to the queue
+DEFAULT_LEASE_SECONDS = 300.0
+#: The default number of times a trace context is claimed before it is marked as failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    project_filename TEXT NOT NULL,
+    template_id TEXT NOT NULL,
+    context_id TEXT NOT NULL,
+    context_values TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER,
+    artifact TEXT,
+    collected INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (project, context_id)
+)
+"""
+
+
+@dataclass
+class QueueTask:
+    """
+    A trace context within the work queue.
+    """
+
+    #: The task id
+    id: int
+    #: The project name
+    project: str
+    #: The absolute path to the project file
+    project_filename: str
+    #: The template id
+    template_id: str
+    #: The trace context id
+    context_id: str
+    #: The trace context variable values
+    values: dict[str, Any]
+    #: The task state: ``pending``, ``leased``, ``done``, or ``failed``
+    state: str = 'pending'
+    #: The worker that holds the lease
+    worker: str = ''
+    #: The number of times the task has been claimed
+    attempts: int = 0
+    #: The number of errors reported for the trace context
+    errors: int = 0
+    #: The artifact bundle filename, relative to the queue's artifact directory
+    artifact: str = ''
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'QueueTask':
+        return cls(
+            id=row['id'],
+            project=row['project'],
+            project_filename=row['project_filename'],
+            template_id=row['template_id'],
+            context_id=row['context_id'],
+            values=yaml.safe_load(row['context_values']),
+            state=row['state'],
+            worker=row['worker'] or '',
+            attempts=row['attempts'],
+            errors=row['errors'] or 0,
+            artifact=row['artifact'] or '',
+        )
+
+    def create_context(self, project: Project) -> TraceContext:
+        """
+        :returns: the trace context of the task within the loaded project
+        """
+        for template in project.templates:
+            if template.id == self.template_id:
+                return TraceContext(template, self.values, id=self.context_id)
+        raise ValueError(f'template does not exist in project {project.name}: {self.template_id}')
+
+
+class WorkQueue:
+    """
+    A SQLite work queue of trace contexts. A new database connection is opened for every operation
+    so that a queue object can be used from multiple threads and forked processes.
+    """
+
+    def __init__(
+        self,
+        filename: Path,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        """
+        :param filename: the SQLite database filename, which is created if it does not exist
+        :param lease_seconds: the amount of time, in seconds, that a claimed task is leased
+        :param max_attempts: the number of times a task is claimed before it is marked as failed
+        """
+        self.filename = filename.absolute()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        #: The directory that artifact bundles are stored in
+        self.artifact_directory = self.filename.parent / f'{self.filename.name}.artifacts'
+        self.artifact_directory.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(str(self.filename), timeout=60.0, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def publish(
+        self, project: Project, project_filename: Path, contexts: Iterable[TraceContext]
+    ) -> int:
+        """
+        Publish trace contexts to the queue. Contexts that have already been published are ignored
+        so that an interrupted coordinator can publish the same contexts again.
+
+        :param project: the project
+        :param project_filename: the project file that workers load
+        :param contexts: the trace contexts to publish
+        :returns: the number of newly published contexts
+        """
+        rows = [
+            (
+                project.name,
+                str(project_filename.absolute()),
+                context.template.id,
+                context.id,
+                yaml.safe_dump(context.values),
+            )
+            for context in contexts
+        ]
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            before = db.total_changes
+            db.executemany(
+                'INSERT OR IGNORE INTO tasks (project, project_filename, template_id, context_id, '
+                'context_values) VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+            count = db.total_changes - before
+            db.execute('COMMIT')
+        return count
+
+    def claim(self, worker: str) -> Optional[QueueTask]:
+        """
+        Claim the next pending task. Tasks whose lease has expired are returned to the queue, or
+        marked as failed once they have been claimed ``max_attempts`` times, before a task is
+        claimed.
+
+        :param worker: the worker id
+        :returns: the claimed task or ``None`` if there are no pending tasks
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            self._expire_leases(db, now)
+            row = db.execute(
+                "SELECT * FROM tasks WHERE state = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if not row:
+                db.execute('COMMIT')
+                return None
+
+            db.execute(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ?, "
+                'attempts = attempts + 1 WHERE id = ?',
+                (worker, now + self.lease_seconds, row['id']),
+            )
+            db.execute('COMMIT')
+
+        task = QueueTask.from_row(row)
+        task.state = 'leased'
+        task.worker = worker
+        task.attempts += 1
+        return task
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float) -> None:
+        expired = db.execute(
+            "SELECT id, worker, attempts FROM tasks WHERE state = 'leased' AND lease_expires < ?",
+            (now,),
+        ).fetchall()
+        for row in expired:
+            logger.warning('lease expired for task %d held by worker %s', row['id'], row['worker'])
+            self._requeue(db, row['id'], row['attempts'])
+
+    def _requeue(self, db: sqlite3.Connection, task_id: int, attempts: int) -> None:
+        # the task is failed, and counted as a single error, once it has been claimed too often
+        state = 'failed' if attempts >= self.max_attempts else 'pending'
+        if state == 'failed':
+            logger.error('task %d failed after %d attempts', task_id, attempts)
+        db.execute(
+            'UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, errors = ? '
+            'WHERE id = ?',
+            (state, 1 if state == 'failed' else None, task_id),
+        )
+
+    def renew(self, task: QueueTask) -> bool:
+        """
+        Extend the lease of a claimed task.
+
+        :returns: ``True`` if the lease was renewed, ``False`` if the worker no longer holds the
+            lease
+        """
+        with self._connect() as db:
+            cursor = db.execute(
+                'UPDATE tasks SET lease_expires = ? '
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, task.id, task.worker),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, task: QueueTask) -> None:
+        """
+        Return a claimed task that could not be executed to the queue without waiting for its lease
+        to expire.
+        """
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND worker = ? AND state = 'leased'",
+                (task.id, task.worker),
+            ).fetchone()
+            if row:
+                self._requeue(db, task.id, row['attempts'])
+            db.execute('COMMIT')
+
+    def complete(self, task: QueueTask, errors: int, artifact: Optional[Path]) -> bool:
+        """
+        Mark a claimed task as done.
+
+        :param task: the claimed task
+        :param errors: the number of errors reported for the trace context
+        :param artifact: the artifact bundle, which must be within the artifact directory
+        :returns: ``True`` if the result was accepted, ``False`` if the worker no longer holds the
+            lease, in which case the result is discarded
+        """
+        artifact_name = artifact.name if artifact else None
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET state = 'done', errors = ?, artifact = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (errors, artifact_name, task.id, task.worker),
+            )
+            accepted = cursor.rowcount == 1
+
+        if not accepted:
+            logger.warning('discarding result of task %d, the lease was lost', task.id)
+            if artifact:
+                artifact.unlink(missing_ok=True)
+        return accepted
+
+    def collect(self, project_name: str) -> list[QueueTask]:
+        """
+        Get the finished tasks of a project that have not been acknowledged, see
+        :meth:`acknowledge`. Expired leases are returned to the queue first.
+
+        :returns: the tasks that are ``done`` or ``failed``
+        """
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            self._expire_leases(db, time.time())
+            db.execute('COMMIT')
+            rows = db.execute(
+                "SELECT * FROM tasks WHERE project = ? AND state IN ('done', 'failed') "
+                'AND collected = 0 ORDER BY id',
+                (project_name,),
+            ).fetchall()
+        return [QueueTask.from_row(row) for row in rows]
+
+    def acknowledge(self, task: QueueTask) -> None:
+        """
+        Mark a finished task as collected by the coordinator.
+        """
+        with self._connect() as db:
+            db.execute('UPDATE tasks SET collected = 1 WHERE id = ?', (task.id,))
+
+    def unfinished_count(self, project_name: Optional[str] = None) -> int:
+        """
+        :param project_name: only count the tasks of a project
+        :returns: the number of pending and leased tasks
+        """
+        query = "SELECT COUNT(*) FROM tasks WHERE state IN ('pending', 'leased')"
+        params: tuple = ()
+        if project_name is not None:
+            query += ' AND project = ?'
+            params = (project_name,)
+
+        with self._connect() as db:
+            return db.execute(query, params).fetchone()[0]
+
+    def create_artifact(self, task: QueueTask, project: Project) -> Path:
+        """
+        Bundle the context directory, reports, and crash results of a trace context into a
+        ``tar.gz`` archive within the artifact directory. The archive is written to a temporary
+        file and then renamed so that a partial bundle is never visible.
+
+        :returns: the artifact bundle filename
+        """
+        context_id = task.context_id
+        destination = self.artifact_directory / f'{task.project}-{context_id}-{task.id}.tar.gz'
+        with tempfile.NamedTemporaryFile(
+            dir=self.artifact_directory, prefix='.', suffix='.tar.gz', delete=False
+        ) as file:
+            with tarfile.open(fileobj=file, mode='w:gz') as tar:
+                context_dir = project.directory / f'trace-{context_id}'
+                if context_dir.is_dir():
+                    tar.add(context_dir, context_dir.name)
+                for filename in project.context_result_files(context_id):
+                    if filename.is_file():
+                        tar.add(filename, filename.name)
+
+        Path(file.name).rename(destination)
+        return destination
+
+    def extract_artifact(self, task: QueueTask, project: Project) -> None:
+        """
+        Extract the artifact bundle of a finished task into the project directory and remove the
+        bundle.
+        """
+        if not task.artifact:
+            return
+
+        artifact = self.artifact_directory / task.artifact
+        with tarfile.open(artifact, 'r:gz') as tar:
+            if hasattr(tarfile, 'tar_filter'):
+                # reject members that would be extracted outside of the project directory
+                tar.extractall(project.directory, filter='tar')
+            else:
+                tar.extractall(project.directory)  # pragma: no cover
+        artifact.unlink()
@@ -0,0 +1,109 @@
+"""
+Memory-backed trace workspace. Most trace contexts pass and their directories are never looked at
+again, so the workspace runs each trace context within a directory on a tmpfs filesystem, such as
+``/dev/shm``, and only persists the context directory to the report tree when it is needed. The
+context directory within the report tree is a symlink to the workspace directory while the context
+runs, so the trace paths are identical to a run on disk.
+"""
+import logging
+import os
+import shutil
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+#: The default tmpfs directory that workspaces are created within
+TMPFS_DIRECTORY = Path('/dev/shm')
+
+#: The workspace modes that are accepted by the ``--workspace`` argument
+WORKSPACE_DISK = 'disk'
+WORKSPACE_TMPFS = 'tmpfs'
+WORKSPACE_MODES = (WORKSPACE_DISK, WORKSPACE_TMPFS)
+
+
+def directory_size(path: Path) -> int:
+    """
+    :returns: the number of bytes allocated by the files within a directory
+    """
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in dirnames + filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+            except OSError:
+                # the file was removed by a concurrent trace context
+                pass
+    return size
+
+
+class TraceWorkspace:
+    """
+    A memory-backed workspace for trace context directories. The workspace is shared by the worker
+    processes of a run, which are forked after the workspace is created, so the size limit applies
+    to every trace context that is running.
+    """
+
+    def __init__(self, directory: Path = TMPFS_DIRECTORY, max_size: int = 0):
+        """
+        :param directory: the memory-backed directory that the workspace is created within
+        :param max_size: the maximum number of bytes that the workspace can use. A trace context is
+            run on disk, within the report tree, when the workspace has reached this size. ``0``
+            disables the limit.
+        """
+        #: The workspace root directory
+        self.root = directory / f'differ-{os.getpid()}'
+        #: The maximum size of the workspace, in bytes, ``0`` for no limit
+        self.max_size = max_size
+
+    def create(self, context_dir: Path) -> bool:
+        """
+        Create a context directory within the workspace and link it into the report tree.
+
+        :param context_dir: the context directory within the report tree, which must not exist
+        :returns: ``True`` if the context directory was created within the workspace, ``False`` if
+            the workspace is full and the context directory must be created on disk
+        """
+        if self.max_size and self.root.exists() and directory_size(self.root) >= self.max_size:
+            logger.debug('workspace is full, running trace context on disk: %s', context_dir.name)
+            return False
+
+        # the project directory names are unique within the report directory
+        directory = self.root / context_dir.parent.name / context_dir.name
+        directory.mkdir(parents=True)
+        context_dir.symlink_to(directory)
+        return True
+
+    def is_linked(self, context_dir: Path) -> bool:
+        """
+        :returns: ``True`` if the context directory is a link to a workspace directory
+        """
+        return context_dir.is_symlink() and context_dir.readlink().is_relative_to(self.root)
+
+    def persist(self, context_dir: Path) -> None:
+        """
+        Move a context directory from the workspace to the report tree, replacing the link.
+        """
+        if not self.is_linked(context_dir):
+            return
+
+        directory = context_dir.readlink()
+        context_dir.unlink()
+        # the trace directories contain symlinks to the binaries, which are preserved
+        shutil.copytree(directory, context_dir, symlinks=True)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def discard(self, context_dir: Path) -> None:
+        """
+        Remove a context directory from the workspace along with its link in the report tree.
+        """
+        if not self.is_linked(context_dir):
+            return
+
+        shutil.rmtree(context_dir.readlink(), ignore_errors=True)
+        context_dir.unlink()
+
+    def cleanup(self) -> None:
+        """
+        Remove the workspace.
+        """
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,71 @@
+import zipfile
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from differ import archive
+from differ.core import ARTIFACT_ARCHIVE_FILENAME, PcapConfig, Trace
+
+
+def make_context(tmp_path: Path) -> Path:
+    context_dir = tmp_path / 'trace-001-001'
+    for engine in ('__original__', 'x'):
+        trace_dir = context_dir / engine
+        trace_dir.mkdir(parents=True)
+        (trace_dir / '__differ-stdout.bin').write_bytes(f'{engine} stdout'.encode())
+        (trace_dir / '__differ-stderr.bin').write_bytes(b'')
+        (trace_dir / 'capture.pcap').write_bytes(b'pcap')
+        (trace_dir / 'input.txt').write_text('input')
+        (trace_dir / 'binary').symlink_to('/bin/true')
+    (context_dir / 'context.yml').write_text('values: {}')
+    return context_dir
+
+
+class TestArchive:
+    def test_pack_context(self, tmp_path):
+        context_dir = make_context(tmp_path)
+        template = MagicMock(pcap=PcapConfig(Path('capture.pcap'), 'lo'))
+
+        assert archive.pack_context(context_dir, template) == 6
+        with zipfile.ZipFile(context_dir / ARTIFACT_ARCHIVE_FILENAME) as file:
+            assert sorted(file.namelist()) == [
+                '__original__/__differ-stderr.bin',
+                '__original__/__differ-stdout.bin',
+                '__original__/capture.pcap',
+                'x/__differ-stderr.bin',
+                'x/__differ-stdout.bin',
+                'x/capture.pcap',
+            ]
+            assert file.getinfo('x/__differ-stdout.bin').compress_type == zipfile.ZIP_LZMA
+
+        assert not (context_dir / 'x' / '__differ-stdout.bin').exists()
+        assert (context_dir / 'x' / 'input.txt').is_file()
+        assert (context_dir / 'x' / 'binary').is_symlink()
+        assert (context_dir / 'context.yml').is_file()
+        assert not (context_dir / f'.{ARTIFACT_ARCHIVE_FILENAME}.tmp').exists()
+
+    def test_pack_context_empty(self, tmp_path):
+        context_dir = tmp_path / 'trace-001-001'
+        (context_dir / '__original__').mkdir(parents=True)
+        assert archive.pack_context(context_dir, MagicMock(pcap=None)) == 0
+        assert not (context_dir / ARTIFACT_ARCHIVE_FILENAME).exists()
+
+    def test_read_artifact(self, tmp_path):
+        context_dir = make_context(tmp_path)
+        archive.pack_context(context_dir, MagicMock(pcap=None))
+        trace = Trace(Path('/bin/true'), MagicMock(), context_dir / 'x', 'x')
+
+        assert trace.read_stdout() == b'x stdout'
+        assert trace.read_stderr() == b''
+        assert trace.has_artifact(trace.stdout_path)
+        assert trace.read_artifact(context_dir / 'x' / 'input.txt') == b'input'
+        assert not trace.has_artifact(context_dir / 'x' / 'missing.bin')
+        with pytest.raises(FileNotFoundError):
+            trace.read_artifact(context_dir / 'x' / 'missing.bin')
+
+    def test_read_artifact_no_archive(self, tmp_path):
+        trace = Trace(Path('/bin/true'), MagicMock(), tmp_path / 'x', 'x')
+        assert not trace.has_artifact(trace.stdout_path)
+        with pytest.raises(FileNotFoundError):
+            trace.read_stdout()
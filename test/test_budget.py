@@ -0,0 +1,168 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from differ import budget as budget_module
+from differ.budget import ErrorBudget, TimeBudget
+from differ.core import DebloatedBinary, Project, TraceContext, TraceTemplate
+
+
+def make_project(tmp_path: Path) -> Project:
+    return Project(
+        'test',
+        tmp_path,
+        Path('/bin/true'),
+        debloaters={
+            'a': DebloatedBinary('a', Path('/bin/true')),
+            'b': DebloatedBinary('b', Path('/bin/true')),
+        },
+        templates=[TraceTemplate(id='001'), TraceTemplate(id='002')],
+    )
+
+
+class TestErrorBudget:
+    def test_disabled(self, tmp_path):
+        project = make_project(tmp_path)
+        context = TraceContext(project.templates[0], {}, id='001-001')
+        budget = ErrorBudget()
+        assert not budget.enabled
+
+        budget.record(project, context, 3)
+        assert not budget.skip_context(project, context)
+        assert budget.skipped_debloaters(project) == []
+
+    def test_max_errors_per_template(self, tmp_path):
+        project = make_project(tmp_path)
+        first = TraceContext(project.templates[0], {}, id='001-001')
+        other = TraceContext(project.templates[1], {}, id='002-001')
+        budget = ErrorBudget(max_errors_per_template=2)
+        assert budget.enabled
+
+        budget.record(project, first, 1)
+        assert not budget.skip_context(project, first)
+        budget.record(project, first, 1)
+        assert budget.skip_context(project, first)
+        assert budget.skip_context(project, first)
+        assert not budget.skip_context(project, other)
+
+        assert budget.skipped_contexts == {('test', '001'): 2}
+        # each skipped context has an original trace and two debloated traces
+        assert budget.skipped_trace_count(project) == 6
+
+    def test_template_exhausted(self, tmp_path):
+        project = make_project(tmp_path)
+        context = TraceContext(project.templates[0], {}, id='001-001')
+        budget = ErrorBudget(max_errors_per_template=1)
+
+        assert not budget.template_exhausted(project, project.templates[0])
+        budget.record(project, context, 1)
+        assert budget.template_exhausted(project, project.templates[0])
+        assert not budget.template_exhausted(project, project.templates[1])
+        # checking the template does not count skipped contexts
+        assert budget.skipped_contexts == {}
+
+    def test_max_errors_per_debloater(self, tmp_path):
+        project = make_project(tmp_path)
+        context = TraceContext(project.templates[0], {}, id='001-001')
+        (tmp_path / 'report-a-error-001-001.yml').touch()
+        budget = ErrorBudget(max_errors_per_debloater=1)
+
+        budget.record(project, context, 1)
+        assert not budget.skip_context(project, context)
+        assert budget.skipped_debloaters(project) == ['a']
+        assert budget.skipped_traces == {('test', 'a'): 1}
+        assert budget.skipped_trace_count(project) == 1
+
+    def test_fail_fast(self, tmp_path):
+        project = make_project(tmp_path)
+        context = TraceContext(project.templates[0], {}, id='001-001')
+        other = TraceContext(project.templates[1], {}, id='002-001')
+        budget = ErrorBudget(fail_fast=True)
+
+        budget.record(project, context, 0)
+        assert not budget.stopped
+        budget.record(project, context, 1)
+        assert budget.stopped
+        assert budget.skip_context(project, other)
+
+    def test_log_summary(self, tmp_path):
+        budget = ErrorBudget(fail_fast=True)
+        budget.skipped_contexts[('test', '001')] = 1
+        budget.skipped_traces[('other', 'a')] = 1
+        budget.log_summary(MagicMock())
+        budget.log_summary()
+
+
+class TestTimeBudget:
+    @patch.object(budget_module.time, 'monotonic')
+    def test_disabled(self, mock_monotonic, tmp_path):
+        mock_monotonic.return_value = 100.0
+        project = make_project(tmp_path)
+        context = TraceContext(project.templates[0], {}, id='001-001')
+        budget = TimeBudget()
+
+        budget.start_project(project)
+        budget.start_template(project, project.templates[0], 2)
+        mock_monotonic.return_value = 1e9
+        assert not budget.skip_context(project, context)
+        assert budget.template_deadlines == {}
+
+    @patch.object(budget_module.time, 'monotonic')
+    def test_project_budget_split(self, mock_monotonic, tmp_path):
+        mock_monotonic.return_value = 100.0
+        project = make_project(tmp_path)
+        first = TraceContext(project.templates[0], {}, id='001-001')
+        second = TraceContext(project.templates[1], {}, id='002-001')
+        budget = TimeBudget(project_seconds=60.0)
+
+        budget.start_project(project)
+        budget.start_template(project, project.templates[0], 2)
+        assert budget.template_deadlines[('test', '001')] == 130.0
+        mock_monotonic.return_value = 129.0
+        assert not budget.skip_context(project, first)
+        mock_monotonic.return_value = 130.0
+        assert budget.skip_context(project, first)
+
+        # the first template finished early, the second template gets the remaining time
+        mock_monotonic.return_value = 110.0
+        budget.start_template(project, project.templates[1], 1)
+        assert budget.template_deadlines[('test', '002')] == 160.0
+        mock_monotonic.return_value = 160.0
+        assert budget.skip_context(project, second)
+        assert budget.skip_context(project, second)
+
+        assert budget.skipped_contexts == {('test', '001'): 1, ('test', '002'): 2}
+        assert budget.skipped_trace_count(project) == 9
+
+    @patch.object(budget_module.time, 'monotonic')
+    def test_template_budget(self, mock_monotonic, tmp_path):
+        mock_monotonic.return_value = 100.0
+        project = make_project(tmp_path)
+        project.templates[1].time_budget = 5.0
+        budget = TimeBudget(project_seconds=60.0, template_seconds=10.0)
+
+        budget.start_project(project)
+        budget.start_template(project, project.templates[0], 2)
+        budget.start_template(project, project.templates[1], 1)
+        assert budget.template_deadlines == {('test', '001'): 110.0, ('test', '002'): 105.0}
+
+    @patch.object(budget_module.time, 'monotonic')
+    def test_template_exhausted(self, mock_monotonic, tmp_path):
+        mock_monotonic.return_value = 100.0
+        project = make_project(tmp_path)
+        budget = TimeBudget(template_seconds=10.0)
+
+        budget.start_template(project, project.templates[0])
+        assert not budget.template_exhausted(project, project.templates[0])
+        mock_monotonic.return_value = 110.0
+        assert budget.template_exhausted(project, project.templates[0])
+        assert budget.expired == {('test', '001')}
+        # the template stays expired
+        mock_monotonic.return_value = 100.0
+        assert budget.template_exhausted(project, project.templates[0])
+        assert budget.skipped_contexts == {}
+
+    def test_log_summary(self):
+        budget = TimeBudget()
+        budget.skipped_contexts[('test', '001')] = 1
+        budget.log_summary(MagicMock())
+        budget.log_summary()
@@ -0,0 +1,115 @@
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from differ import cache
+from differ.core import Comparator, TraceHook
+
+
+class SetupHook(TraceHook):
+    def setup(self, trace):
+        pass
+
+
+def make_trace(tmp_path: Path) -> MagicMock:
+    binary = tmp_path / 'binary'
+    binary.write_bytes(b'\x7fELF')
+    cwd = tmp_path / 'trace'
+    cwd.mkdir()
+    (cwd / 'binary').symlink_to(binary)
+    (cwd / 'input.txt').write_text('hello')
+    trace = MagicMock(binary=cwd / 'binary', cwd=cwd, arguments='-x input.txt')
+    trace.context.template.hooks = []
+    return trace
+
+
+class TestFileDigest:
+    def test_file_digest(self, tmp_path):
+        path = tmp_path / 'file'
+        path.write_text('hello')
+        assert cache.file_digest(path) == (
+            '2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824'
+        )
+
+
+class TestTraceCache:
+    def test_is_cacheable(self, tmp_path):
+        trace = make_trace(tmp_path)
+        trace_cache = cache.TraceCache(tmp_path / 'cache')
+        trace.context.template.hooks = [Comparator({})]
+        assert trace_cache.is_cacheable(trace)
+        trace.context.template.hooks = [Comparator({}), SetupHook()]
+        assert not trace_cache.is_cacheable(trace)
+
+    def test_key(self, tmp_path):
+        trace = make_trace(tmp_path)
+        project = MagicMock(link_filename='')
+        trace_cache = cache.TraceCache(tmp_path / 'cache')
+
+        key = trace_cache.key(project, trace, trace.cwd, False)
+        assert key == trace_cache.key(project, trace, trace.cwd, False)
+        assert key != trace_cache.key(project, trace, trace.cwd, True)
+
+        trace.arguments = '-y input.txt'
+        assert key != trace_cache.key(project, trace, trace.cwd, False)
+        trace.arguments = '-x input.txt'
+
+        (trace.cwd / 'input.txt').write_text('world')
+        assert key != trace_cache.key(project, trace, trace.cwd, False)
+
+    def test_store_restore(self, tmp_path):
+        trace = make_trace(tmp_path)
+        trace.process = subprocess.CompletedProcess(['./binary', '-x'], 3)
+        trace.process_status = 768
+        trace.timed_out = False
+        trace.setup_script = None
+        trace.teardown_script = subprocess.CompletedProcess(['./teardown.sh'], 0)
+        trace.concurrent_script = None
+        (trace.cwd / 'stdout.bin').write_bytes(b'output')
+        (trace.cwd / 'input.txt').unlink()
+
+        trace_cache = cache.TraceCache(tmp_path / 'cache')
+        trace_cache.store(trace, 'abcdef')
+        assert (tmp_path / 'cache' / 'ab' / 'abcdef' / 'trace.yml').is_file()
+
+        (tmp_path / 'restored').mkdir()
+        restored = make_trace(tmp_path / 'restored')
+        assert trace_cache.restore(restored, 'abcdef')
+        assert restored.process.args == ['./binary', '-x']
+        assert restored.process.returncode == 3
+        assert restored.process_status == 768
+        assert restored.timed_out is False
+        assert restored.setup_script is None
+        assert restored.teardown_script.returncode == 0
+        assert restored.concurrent_script is None
+        assert (restored.cwd / 'stdout.bin').read_bytes() == b'output'
+        assert not (restored.cwd / 'input.txt').exists()
+        # the prepared binary link is kept
+        assert (restored.cwd / 'binary').resolve() == tmp_path / 'restored' / 'binary'
+
+    def test_restore_replaces_linked_file(self, tmp_path):
+        trace = make_trace(tmp_path)
+        trace.process = subprocess.CompletedProcess(['./binary'], 0)
+        trace.process_status = 0
+        trace.timed_out = False
+        trace.setup_script = trace.teardown_script = trace.concurrent_script = None
+        (trace.cwd / 'input.txt').write_text('changed')
+
+        trace_cache = cache.TraceCache(tmp_path / 'cache')
+        trace_cache.store(trace, 'abcdef')
+
+        (tmp_path / 'restored').mkdir()
+        restored = make_trace(tmp_path / 'restored')
+        staged = tmp_path / 'staged.txt'
+        staged.write_text('hello')
+        staged.chmod(0o444)
+        (restored.cwd / 'input.txt').unlink()
+        (restored.cwd / 'input.txt').hardlink_to(staged)
+
+        assert trace_cache.restore(restored, 'abcdef')
+        assert (restored.cwd / 'input.txt').read_text() == 'changed'
+        assert staged.read_text() == 'hello'
+
+    def test_restore_miss(self, tmp_path):
+        trace_cache = cache.TraceCache(tmp_path / 'cache')
+        assert not trace_cache.restore(MagicMock(), 'abcdef')
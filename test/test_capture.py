@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock, patch
+
+from differ import capture
+
+#: A fake tcpdump that reports it is listening and writes a "packet" when it is interrupted
+FAKE_TCPDUMP = """
+trap 'echo flushed >> capture.pcap; exit 0' INT
+echo 'listening on lo, link-type EN10MB' >&2
+while true; do sleep 0.01; done
+"""
+
+
+class TestPacketCapture:
+    def test_start_stop(self, tmp_path):
+        pcap_path = tmp_path / 'capture.pcap'
+        pcap = capture.PacketCapture(['bash', '-c', FAKE_TCPDUMP], pcap_path, tmp_path)
+        pcap.start()
+        assert pcap.process.poll() is None
+        assert capture.LISTENING_MESSAGE in pcap.output
+
+        pcap.stop()
+        assert pcap.process.returncode == 0
+        assert pcap_path.read_text() == 'flushed\n'
+
+    def test_start_exited(self, tmp_path):
+        pcap = capture.PacketCapture(
+            ['sh', '-c', 'echo permission denied >&2; exit 1'], tmp_path / 'x.pcap', tmp_path
+        )
+        pcap.start()
+        assert pcap.output == b'permission denied\n'
+        pcap.stop()
+        assert pcap.process.returncode == 1
+
+    def test_start_timeout(self, tmp_path):
+        pcap = capture.PacketCapture(['sleep', '10'], tmp_path / 'x.pcap', tmp_path)
+        pcap.start(timeout=0.05)
+        assert pcap.process.poll() is None
+        pcap.process.kill()
+        pcap.process.wait()
+
+    @patch.object(capture.time, 'sleep')
+    @patch.object(capture.time, 'monotonic')
+    def test_drain(self, mock_time, mock_sleep):
+        clock = iter(range(100))
+        mock_time.side_effect = lambda: next(clock) * capture.DRAIN_INTERVAL
+        pcap = capture.PacketCapture([], MagicMock(), MagicMock())
+        pcap._pcap_size = MagicMock(side_effect=[10, 20, 20, 20, 20, 20])
+        pcap.drain()
+        # the file grew after the first check and then remained unchanged for DRAIN_QUIET_TIME
+        assert pcap._pcap_size.call_count == 6
+        assert mock_sleep.call_count == 5
+
+    @patch.object(capture.time, 'sleep')
+    def test_drain_timeout(self, mock_sleep):
+        pcap = capture.PacketCapture([], MagicMock(), MagicMock())
+        pcap._pcap_size = MagicMock(side_effect=range(1000))
+        with patch.object(capture, 'DRAIN_TIMEOUT', 0.0):
+            pcap.drain()
+        mock_sleep.assert_not_called()
+
+    def test_stop_exited(self):
+        pcap = capture.PacketCapture([], MagicMock(), MagicMock())
+        pcap.process = MagicMock()
+        pcap.process.poll.return_value = 1
+        pcap.process.communicate.return_value = (None, b'error')
+        pcap.drain = MagicMock()
+
+        pcap.stop()
+        pcap.drain.assert_not_called()
+        pcap.process.send_signal.assert_not_called()
+        assert pcap.output == b'error'
@@ -17,33 +17,33 @@ class TestHookScriptComparator:
     def test_compare_ok(self):
         original = MagicMock()
         original.setup_script.returncode = 0
-        original.setup_script_output_path.read_bytes.return_value = b'hello'
+        original.read_artifact.return_value = b'hello'
 
         debloated = MagicMock()
         debloated.setup_script.returncode = 0
-        debloated.setup_script_output_path.read_bytes.return_value = b'hello'
+        debloated.read_artifact.return_value = b'hello'
 
         ext = HookComparator()
         assert ext.compare(original, debloated) == ComparisonResult.success(ext, debloated)
-        original.setup_script_output_path.read_bytes.assert_called_once()
-        debloated.setup_script_output_path.read_bytes.assert_called_once()
+        original.read_artifact.assert_called_once_with(original.setup_script_output_path)
+        debloated.read_artifact.assert_called_once_with(debloated.setup_script_output_path)
 
     def test_compare_skip(self):
         original = MagicMock(setup_script=None)
         debloated = MagicMock(setup_script=None)
         ext = HookComparator()
         assert ext.compare(original, debloated) == ComparisonResult.success(ext, debloated)
-        original.setup_script_output_path.read_bytes.assert_not_called()
-        debloated.setup_script_output_path.read_bytes.assert_not_called()
+        original.read_artifact.assert_not_called()
+        debloated.read_artifact.assert_not_called()
 
     def test_compare_returncode(self):
         original = MagicMock()
         original.setup_script.returncode = 0
-        original.setup_script_output_path.read_bytes.return_value = b'hello'
+        original.read_artifact.return_value = b'hello'
 
         debloated = MagicMock()
         debloated.setup_script.returncode = 1
-        debloated.setup_script_output_path.read_bytes.return_value = b'hello'
+        debloated.read_artifact.return_value = b'hello'
 
         ext = HookComparator()
         result = ext.compare(original, debloated)
@@ -54,11 +54,11 @@ class TestHookScriptComparator:
     def test_compare_output(self):
         original = MagicMock()
         original.setup_script.returncode = 0
-        original.setup_script_output_path.read_bytes.return_value = b'hello'
+        original.read_artifact.return_value = b'hello'
 
         debloated = MagicMock()
         debloated.setup_script.returncode = 0
-        debloated.setup_script_output_path.read_bytes.return_value = b'goodbye'
+        debloated.read_artifact.return_value = b'goodbye'
 
         ext = HookComparator()
         result = ext.compare(original, debloated)
@@ -67,10 +67,10 @@ class TestHookScriptComparator:
     def test_compare_skip_exit_code(self):
         original = MagicMock()
         original.setup_script.returncode = 0
-        original.setup_script_output_path.read_bytes.return_value = b'hello'
+        original.read_artifact.return_value = b'hello'
         debloated = MagicMock()
         debloated.setup_script.returncode = 1
-        debloated.setup_script_output_path.read_bytes.return_value = b'hello'
+        debloated.read_artifact.return_value = b'hello'
 
         ext = HookComparator({'exit_code': False})
         assert ext.compare(original, debloated).status is ComparisonStatus.success
@@ -78,11 +78,11 @@ class TestHookScriptComparator:
     def test_compare_exit_code_config(self):
         original = MagicMock()
         original.setup_script.returncode = 0
-        original.setup_script_output_path.read_bytes.return_value = b'hello'
+        original.read_artifact.return_value = b'hello'
 
         debloated = MagicMock()
         debloated.setup_script.returncode = 1
-        debloated.setup_script_output_path.read_bytes.return_value = b'hello'
+        debloated.read_artifact.return_value = b'hello'
 
         ext = HookComparator({'exit_code': {'expect': 0}})
         result = ext.compare(original, debloated)
@@ -93,11 +93,11 @@ class TestHookScriptComparator:
     def test_compare_skip_output(self):
         original = MagicMock()
         original.setup_script.returncode = 0
-        original.setup_script_output_path.read_bytes.return_value = b'hello'
+        original.read_artifact.return_value = b'hello'
 
         debloated = MagicMock()
         debloated.setup_script.returncode = 0
-        debloated.setup_script_output_path.read_bytes.return_value = b'goodbye'
+        debloated.read_artifact.return_value = b'goodbye'
 
         ext = HookComparator({'output': False})
         result = ext.compare(original, debloated)
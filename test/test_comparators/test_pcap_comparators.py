@@ -11,7 +11,7 @@ from differ.comparators.pcap import (
     PcapComparatorConfig,
     Protocol,
 )
-from differ.core import ComparisonResult
+from differ.core import ComparisonResult, PortRef
 
 TCP_CONFIG = {
     'filename': 'capture.pcap',
@@ -200,8 +200,10 @@ class TestPcapComparator:
         ext.extract_flows = MagicMock()
 
         assert ext.verify_original(trace) is None
-        mock_rdpcap.assert_called_once_with(pcap_file.open.return_value)
-        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value)
+        trace.has_artifact.assert_called_once_with(pcap_file)
+        trace.open_artifact.assert_called_once_with(pcap_file)
+        mock_rdpcap.assert_called_once_with(trace.open_artifact.return_value)
+        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value, 8080)
         assert trace.cache[ext.flow_cache_key()] is ext.extract_flows.return_value
 
     @patch('differ.comparators.pcap.rdpcap')
@@ -221,8 +223,8 @@ class TestPcapComparator:
     @patch('differ.comparators.pcap.rdpcap')
     def test_verify_original_no_file(self, mock_rdpcap):
         pcap_file = MagicMock()
-        pcap_file.is_file.return_value = False
         trace = MagicMock(cache={})
+        trace.has_artifact.return_value = False
         ext = PcapComparator(TCP_CONFIG)
         ext.config.pcap_filename = MagicMock(return_value=pcap_file)
         ext._filter_pcap = MagicMock()
@@ -265,16 +267,17 @@ class TestPcapComparator:
         orig.cache = {ext.flow_cache_key(): orig_flows}
 
         assert ext.compare(orig, debloated) == ComparisonResult.success(ext, debloated)
-        mock_rdpcap.assert_called_once_with(pcap_file.open.return_value)
-        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value)
-        ext.extract_flows.assert_called_once_with(ext._filter_pcap.return_value)
+        debloated.open_artifact.assert_called_once_with(pcap_file)
+        mock_rdpcap.assert_called_once_with(debloated.open_artifact.return_value)
+        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value, 8080)
+        ext.extract_flows.assert_called_once_with(ext._filter_pcap.return_value, 8080)
         ext.compare_flows.assert_called_once_with(orig_flows, ext.extract_flows.return_value)
 
     def test_compare_no_file(self):
         pcap_file = MagicMock()
-        pcap_file.is_file.return_value = False
         orig = MagicMock()
         debloated = MagicMock()
+        debloated.has_artifact.return_value = False
 
         ext = PcapComparator(TCP_CONFIG)
         ext.config.pcap_filename = MagicMock(return_value=pcap_file)
@@ -297,9 +300,10 @@ class TestPcapComparator:
         orig.cache = {ext.flow_cache_key(): orig_flows}
 
         assert ext.compare(orig, debloated) == ComparisonResult.error(ext, debloated, 'uh oh')
-        mock_rdpcap.assert_called_once_with(pcap_file.open.return_value)
-        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value)
-        ext.extract_flows.assert_called_once_with(ext._filter_pcap.return_value)
+        debloated.open_artifact.assert_called_once_with(pcap_file)
+        mock_rdpcap.assert_called_once_with(debloated.open_artifact.return_value)
+        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value, 8080)
+        ext.extract_flows.assert_called_once_with(ext._filter_pcap.return_value, 8080)
         ext.compare_flows.assert_called_once_with(orig_flows, ext.extract_flows.return_value)
 
     @patch('differ.comparators.pcap.rdpcap')
@@ -318,8 +322,9 @@ class TestPcapComparator:
         orig.cache = {ext.flow_cache_key(): orig_flows}
 
         assert ext.compare(orig, debloated) == ComparisonResult.success(ext, debloated)
-        mock_rdpcap.assert_called_once_with(pcap_file.open.return_value)
-        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value)
+        debloated.open_artifact.assert_called_once_with(pcap_file)
+        mock_rdpcap.assert_called_once_with(debloated.open_artifact.return_value)
+        ext._filter_pcap.assert_called_once_with(mock_rdpcap.return_value, 8080)
         ext.extract_flows.assert_not_called()
         ext.compare_flows.assert_not_called()
 
@@ -342,3 +347,33 @@ class TestPcapComparator:
         assert result == ComparisonResult.error(ext, debloated, result.details)
         ext.extract_flows.assert_not_called()
         ext.compare_flows.assert_not_called()
+
+
+class TestPcapComparatorPortRef:
+    def test_parse_port_ref(self):
+        config = PcapComparatorConfig.parse(
+            {'filename': 'capture.pcap', 'protocol': 'tcp', 'port': {'port': 'http'}}
+        )
+        assert isinstance(config.port, PortRef)
+        assert config.describe_filter() == 'tcp/*:{http}'
+        assert config.get_port(MagicMock(ports={'http': 4000})) == 4000
+
+    def test_parse_variable_ref(self):
+        config = PcapComparatorConfig.parse(
+            {'filename': 'capture.pcap', 'protocol': 'tcp', 'port': {'variable': 'port'}}
+        )
+        trace = MagicMock()
+        trace.context.values = {'port': '4001'}
+        assert config.get_port(trace) == 4001
+
+    @patch.object(Payload, 'extract')
+    def test_extract_flows_port_ref(self, mock_extract):
+        packet = {
+            IP: MagicMock(src='127.0.0.1', dst='127.0.0.1'),
+            TCP: MagicMock(sport=50000, dport=4000),
+        }
+        mock_extract.return_value = None
+        ext = PcapComparator(
+            {'filename': 'capture.pcap', 'protocol': 'tcp', 'port': {'port': 'http'}}
+        )
+        assert ext.extract_flows([packet], 4000) == [Flow('127.0.0.1:50000', '127.0.0.1:{http}')]
@@ -27,8 +27,13 @@ class TestInputFile:
         ifile = core.InputFile(src, Path('/etc'))
         assert ifile.template is mock_env.from_string.return_value
         mock_env.from_string.assert_called_once_with(src.read_text.return_value)
-        src.read_text.assert_called_once_with()
+        src.read_text.assert_called_once_with(encoding='utf-8', errors='surrogateescape')
 
     def test_load_dict(self):
         ifile = core.InputFile.load_dict({'source': '/path/to/file', 'mode': 777})
         assert ifile == core.InputFile(Path('/path/to/file'), mode='777')
+
+    def test_load_dict_binary(self):
+        ifile = core.InputFile.load_dict({'source': '/path/to/file.gz', 'binary': True})
+        assert ifile.binary
+        assert ifile.static
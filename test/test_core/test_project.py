@@ -115,3 +115,20 @@ class TestProject:
         assert project.context_directory(context) == Path('/') / 'trace-blah'
         assert project.trace_directory(context, 'chisel') == Path('/') / 'trace-blah' / 'chisel'
         assert project.crash_filename(trace) == Path('/') / 'crash-chisel-blah.yml'
+
+    def test_failed_engines(self, tmp_path):
+        project = core.Project(
+            'proj',
+            tmp_path,
+            Path('original'),
+            debloaters={
+                'a': core.DebloatedBinary('a', Path('a')),
+                'b': core.DebloatedBinary('b', Path('b')),
+                'c': core.DebloatedBinary('c', Path('c')),
+            },
+        )
+        (tmp_path / 'report-a-error-001.yml').touch()
+        (tmp_path / 'crash-b-001.yml').touch()
+        (tmp_path / 'report-c-success-001.yml').touch()
+        assert project.failed_engines('001') == ['a', 'b']
+        assert project.failed_engines('002') == []
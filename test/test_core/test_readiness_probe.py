@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from differ import core
+
+
+class TestReadinessProbe:
+    def test_load_dict(self):
+        probe = core.ReadinessProbe.load_dict(
+            {'port': 8080, 'file': 'server.pid', 'stdout': 'listening', 'interval': 0.1}
+        )
+        assert probe.port == 8080
+        assert probe.file == 'server.pid'
+        assert probe.stdout.pattern == b'listening'
+        assert probe.interval == 0.1
+        assert probe.timeout == 10.0
+
+    def test_load_dict_empty(self):
+        with pytest.raises(ValueError):
+            core.ReadinessProbe.load_dict({'timeout': 5})
+
+    def test_load_dict_port_number(self):
+        assert core.ReadinessProbe.load_dict({'port': '8080'}).port == 8080
+
+    def test_load_dict_port_invalid(self):
+        with pytest.raises(ValueError):
+            core.ReadinessProbe.load_dict({'port': 70000})
+
+    def test_template_ready_port(self):
+        template = core.TraceTemplate.load_dict(
+            {'ports': ['http'], 'concurrent': {'run': 'curl', 'ready': {'port': 'http'}}}
+        )
+        assert template.concurrent.ready.port == 'http'
+
+    def test_template_ready_port_unknown(self):
+        with pytest.raises(ValueError):
+            core.TraceTemplate.load_dict(
+                {'ports': ['http'], 'concurrent': {'run': 'curl', 'ready': {'port': 'admin'}}}
+            )
+
+    def test_concurrent_hook_ready(self):
+        hook = core.ConcurrentHook.load_dict({'run': 'curl', 'ready': {'port': 'http'}})
+        assert hook.ready == core.ReadinessProbe(port='http')
+
+    @patch.object(core, 'is_port_listening')
+    def test_is_ready_port(self, mock_listening):
+        trace = MagicMock(ports={'http': 9000})
+        mock_listening.return_value = True
+        assert core.ReadinessProbe(port=8080).is_ready(trace) is True
+        assert core.ReadinessProbe(port='http').is_ready(trace) is True
+        mock_listening.return_value = False
+        assert core.ReadinessProbe(port=8080).is_ready(trace) is False
+        assert [c.args for c in mock_listening.call_args_list] == [
+            (trace.process.pid, 8080),
+            (trace.process.pid, 9000),
+            (trace.process.pid, 8080),
+        ]
+
+    def test_is_ready_file(self):
+        trace = MagicMock()
+        (trace.cwd / 'server.pid').exists.return_value = False
+        assert core.ReadinessProbe(file='server.pid').is_ready(trace) is False
+        (trace.cwd / 'server.pid').exists.return_value = True
+        assert core.ReadinessProbe(file='server.pid').is_ready(trace) is True
+
+    def test_is_ready_stdout(self):
+        trace = MagicMock()
+        probe = core.ReadinessProbe.load_dict({'stdout': r'listening on \d+'})
+        trace.stdout_path.read_bytes.return_value = b'starting\n'
+        assert probe.is_ready(trace) is False
+        trace.stdout_path.read_bytes.return_value = b'starting\nlistening on 80\n'
+        assert probe.is_ready(trace) is True
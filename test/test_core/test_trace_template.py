@@ -1,5 +1,7 @@
 from unittest.mock import call, patch
 
+import pytest
+
 from differ import core
 
 
@@ -44,3 +46,36 @@ class TestTraceTemplate:
             call('world'),
             call('goodbye'),
         ]
+
+    def test_load_dict_parallel_debloaters(self):
+        assert not core.TraceTemplate.load_dict({}).parallel_debloaters
+        assert core.TraceTemplate.load_dict({'parallel_debloaters': True}).parallel_debloaters
+
+    def test_load_dict_ports_list(self):
+        template = core.TraceTemplate.load_dict({'ports': ['http', 'admin']})
+        assert template.ports == {'http': 'tcp', 'admin': 'tcp'}
+
+    def test_load_dict_ports_dict(self):
+        template = core.TraceTemplate.load_dict({'ports': {'http': 'tcp', 'dns': 'udp'}})
+        assert template.ports == {'http': 'tcp', 'dns': 'udp'}
+
+    def test_load_dict_ports_invalid(self):
+        with pytest.raises(ValueError):
+            core.TraceTemplate.load_dict({'ports': {'http': 'sctp'}})
+
+    def test_load_dict_time_budget(self):
+        assert core.TraceTemplate.load_dict({'time_budget': 30}).time_budget == 30.0
+        assert core.TraceTemplate.load_dict({}).time_budget == 0.0
+
+    def test_load_dict_generator(self):
+        template = core.TraceTemplate.load_dict({'generator': 'pairwise'})
+        assert (template.generator, template.generator_config) == ('pairwise', {})
+
+        template = core.TraceTemplate.load_dict({'generator': {'type': 't-way', 'strength': 3}})
+        assert (template.generator, template.generator_config) == ('t-way', {'strength': 3})
+
+        assert core.TraceTemplate.load_dict({}).generator == 'combination'
+
+    def test_load_dict_generator_invalid(self):
+        with pytest.raises(ValueError):
+            core.TraceTemplate.load_dict({'generator': 'invalid'})
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest
+
+from differ import dedupe
+from differ.core import Project, TraceContext, TraceTemplate
+from differ.variables.primitives import IntVariable
+
+
+def make_project(tmp_path: Path) -> Project:
+    return Project(
+        'test',
+        tmp_path,
+        Path('/bin/true'),
+        templates=[
+            TraceTemplate(arguments='--value {{x}}', id='001'),
+            TraceTemplate(arguments='--value {{x}}', id='002'),
+        ],
+    )
+
+
+class TestContextFingerprint:
+    def test_rendered_inputs(self):
+        template = TraceTemplate(arguments='{{x}} {{trace.cwd}}/{{trace.context.id}}', id='001')
+        first = TraceContext(template, {'x': 1, 'unused': 'a'}, id='001-001')
+        second = TraceContext(template, {'x': 1, 'unused': 'b'}, id='001-002')
+        other = TraceContext(template, {'x': 2, 'unused': 'a'}, id='001-003')
+
+        assert dedupe.context_fingerprint(first) == dedupe.context_fingerprint(second)
+        assert dedupe.context_fingerprint(first) != dedupe.context_fingerprint(other)
+
+    def test_stdin(self):
+        template = TraceTemplate(stdin='{{x}}', id='001')
+        first = TraceContext(template, {'x': 1}, id='001-001')
+        other = TraceContext(template, {'x': 2}, id='001-002')
+        assert dedupe.context_fingerprint(first) != dedupe.context_fingerprint(other)
+
+    def test_hook_variable(self):
+        template = TraceTemplate(variables={'x': IntVariable('x', {'values': [1, 2]})}, id='001')
+        first = TraceContext(template, {'x': 1}, id='001-001')
+        other = TraceContext(template, {'x': 2}, id='001-002')
+        assert dedupe.context_fingerprint(first) == dedupe.context_fingerprint(other)
+
+        # the variable's value is part of the fingerprint when it has custom hooks
+        class HookVariable(IntVariable):
+            def setup(self, trace):
+                pass
+
+        template.variables = {'x': HookVariable('x', {'values': [1, 2]})}
+        assert dedupe.context_fingerprint(first) != dedupe.context_fingerprint(other)
+
+    def test_include_options(self):
+        first = TraceContext(TraceTemplate(arguments='{{x}}'), {'x': 1})
+        other = TraceContext(TraceTemplate(arguments='{{x}}', expect_success=False), {'x': 1})
+        assert dedupe.context_fingerprint(first) == dedupe.context_fingerprint(other)
+        assert dedupe.context_fingerprint(
+            first, include_options=True
+        ) != dedupe.context_fingerprint(other, include_options=True)
+
+
+class TestContextDeduplicator:
+    def test_template_scope(self, tmp_path):
+        project = make_project(tmp_path)
+        first, second = project.templates
+        deduplicator = dedupe.ContextDeduplicator()
+
+        assert deduplicator.check(project, TraceContext(first, {'x': 1}, id='001-001')) is None
+        assert deduplicator.check(project, TraceContext(first, {'x': 2}, id='001-002')) is None
+        assert (
+            deduplicator.check(project, TraceContext(first, {'x': 1}, id='001-003')) == '001-001'
+        )
+        # the same context is not a duplicate of itself
+        assert deduplicator.check(project, TraceContext(first, {'x': 1}, id='001-001')) is None
+        assert deduplicator.check(project, TraceContext(second, {'x': 1}, id='002-001')) is None
+        assert deduplicator.duplicates == {('test', '001'): 1}
+        deduplicator.log_summary()
+
+    def test_project_scope(self, tmp_path):
+        project = make_project(tmp_path)
+        first, second = project.templates
+        deduplicator = dedupe.ContextDeduplicator(dedupe.SCOPE_PROJECT)
+
+        assert deduplicator.check(project, TraceContext(first, {'x': 1}, id='001-001')) is None
+        assert deduplicator.check(project, TraceContext(second, {'x': 1}, id='002-001')) == (
+            '001-001'
+        )
+
+    def test_disabled(self, tmp_path):
+        project = make_project(tmp_path)
+        deduplicator = dedupe.ContextDeduplicator(dedupe.SCOPE_NONE)
+        context = TraceContext(project.templates[0], {'x': 1}, id='001-001')
+        assert deduplicator.check(project, context) is None
+        assert deduplicator.check(project, TraceContext(context.template, {'x': 1})) is None
+
+    def test_invalid_scope(self):
+        with pytest.raises(ValueError):
+            dedupe.ContextDeduplicator('invalid')
@@ -0,0 +1,173 @@
+import asyncio
+import signal
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from differ import async_executor
+from differ.async_executor import AsyncExecutor
+from differ.core import ConcurrentHookMode
+
+
+class TestAsyncExecutor:
+    def test_run_contexts_bounded(self):
+        project = MagicMock()
+        contexts = [MagicMock(), MagicMock(), MagicMock(), MagicMock()]
+        active = []
+        peak = []
+
+        async def run_context_async(project, context, skip_debloaters=()):
+            active.append(context)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.remove(context)
+            return contexts.index(context)
+
+        app = AsyncExecutor(Path('/'), jobs=2)
+        app.run_context_async = run_context_async
+
+        results = dict(app.run_contexts(project, contexts))
+
+        assert results == {context: i for i, context in enumerate(contexts)}
+        assert max(peak) == 2
+
+    def test_run_contexts_lazy(self):
+        generated = []
+
+        def generate_contexts():
+            for i in range(5):
+                generated.append(i)
+                yield MagicMock()
+
+        async def run_context_async(project, context, skip_debloaters=()):
+            await asyncio.sleep(0)
+            return 0
+
+        app = AsyncExecutor(Path('/'), jobs=2)
+        app.run_context_async = run_context_async
+
+        results = app.run_contexts(MagicMock(), generate_contexts())
+        next(results)
+        # two contexts were started and the next context replaced the first completed context
+        assert len(generated) == 3
+        assert len(list(results)) == 4
+
+    def test_run_trace_async_error_cleanup(self):
+        trace = MagicMock()
+        cwd = MagicMock()
+        app = AsyncExecutor(Path('/'))
+        app._prepare_trace = MagicMock(return_value=([], cwd, MagicMock()))
+        app._restore_cached_trace = MagicMock(return_value=False)
+        app._start_packet_capture = MagicMock()
+        app._setup_trace = MagicMock(side_effect=OSError('setup failed'))
+        app._cleanup_trace = MagicMock()
+
+        with pytest.raises(OSError):
+            asyncio.run(app.run_trace_async(MagicMock(), trace))
+
+        app._start_packet_capture.return_value.stop.assert_called_once()
+        app._cleanup_trace.assert_called_once_with(trace, cwd, True)
+
+    def test_wait_exited(self):
+        process = subprocess.Popen(['true'])
+        app = AsyncExecutor(Path('/'))
+        assert asyncio.run(app._wait_exited(process.pid, 5.0)) is True
+        # the process has not been reaped
+        assert process.wait() == 0
+
+    def test_wait_exited_timeout(self):
+        process = subprocess.Popen(['sleep', '10'])
+        app = AsyncExecutor(Path('/'))
+        try:
+            assert asyncio.run(app._wait_exited(process.pid, 0.05)) is False
+        finally:
+            process.kill()
+            process.wait()
+
+    def test_wait_exited_reaped(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        app = AsyncExecutor(Path('/'))
+        assert asyncio.run(app._wait_exited(process.pid, 0.05)) is True
+
+    @patch.object(async_executor.os, 'pidfd_open', side_effect=OSError)
+    def test_wait_exited_poll(self, mock_pidfd_open):
+        app = AsyncExecutor(Path('/'))
+        process = subprocess.Popen(['sleep', '10'])
+        try:
+            assert asyncio.run(app._wait_exited(process.pid, 0.05)) is False
+        finally:
+            process.kill()
+
+        assert asyncio.run(app._wait_exited(process.pid, 5.0)) is True
+        process.wait()
+        mock_pidfd_open.assert_called()
+
+    def test_wait_process_async(self):
+        process = subprocess.Popen(['sh', '-c', 'exit 3'])
+        app = AsyncExecutor(Path('/'))
+        running, status = asyncio.run(app._wait_process_async(process, 1e12))
+        assert running is False
+        assert async_executor.os.waitstatus_to_exitcode(status) == 3
+
+    def test_monitor_trace_async_timeout(self):
+        trace = MagicMock(process=subprocess.Popen(['sleep', '10']), timed_out=False)
+        trace.context.template.timeout.seconds = 0.05
+        trace.context.template.concurrent = None
+
+        app = AsyncExecutor(Path('/'))
+        asyncio.run(app._monitor_trace_async(trace, MagicMock()))
+
+        assert trace.timed_out is True
+        assert trace.process.returncode == -signal.SIGTERM
+
+    def test_monitor_trace_async_client(self):
+        trace = MagicMock(process=subprocess.Popen(['sleep', '10']), timed_out=False)
+        trace.context.template.timeout.seconds = 10
+        trace.context.template.concurrent.delay = 0.05
+        trace.context.template.concurrent.ready = None
+        trace.context.template.concurrent.mode = ConcurrentHookMode.client
+
+        def launch_concurrent_script(trace, cwd):
+            trace.concurrent_script = subprocess.Popen(['sh', '-c', 'exit 2'])
+
+        app = AsyncExecutor(Path('/'))
+        app._launch_concurrent_script = MagicMock(side_effect=launch_concurrent_script)
+        asyncio.run(app._monitor_trace_async(trace, MagicMock()))
+
+        # the client completed, so the trace was interrupted rather than timing out
+        assert trace.timed_out is False
+        assert trace.concurrent_script.returncode == 2
+        assert trace.process.returncode == -signal.SIGINT
+
+    def test_teardown_trace_async_terminate(self):
+        trace = MagicMock(concurrent_script=subprocess.Popen(['sleep', '10']))
+        app = AsyncExecutor(Path('/'))
+        app._run_teardown_hooks = MagicMock()
+        app._concurrent_script_wait_time = MagicMock(return_value=0.05)
+
+        asyncio.run(app._teardown_trace_async(trace, MagicMock()))
+
+        app._run_teardown_hooks.assert_called_once()
+        assert trace.concurrent_script.returncode == -signal.SIGTERM
+
+    def test_monitor_trace_async_ready(self):
+        trace = MagicMock(process=subprocess.Popen(['sleep', '10']), timed_out=False)
+        trace.context.template.timeout.seconds = 10
+        trace.context.template.concurrent.mode = None
+        trace.context.template.concurrent.ready.interval = 0.01
+        trace.context.template.concurrent.ready.timeout = 5.0
+        trace.context.template.concurrent.ready.is_ready.side_effect = [False, True]
+
+        def launch_concurrent_script(trace, cwd):
+            trace.process.kill()
+
+        app = AsyncExecutor(Path('/'))
+        app._launch_concurrent_script = MagicMock(side_effect=launch_concurrent_script)
+        asyncio.run(app._monitor_trace_async(trace, MagicMock()))
+
+        assert trace.context.template.concurrent.ready.is_ready.call_count == 2
+        app._launch_concurrent_script.assert_called_once()
+        assert trace.process.returncode == -signal.SIGKILL
@@ -2,6 +2,22 @@ from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
 
 from differ import executor
+from differ.core import InputFile
+
+
+def make_trace(tmp_path: Path, engine: str) -> MagicMock:
+    trace = MagicMock(cwd=tmp_path / 'trace-001-001' / engine)
+    trace.cwd.mkdir(parents=True)
+    return trace
+
+
+def write_content(content: str, writes: list):
+    def write(filename: Path) -> None:
+        writes.append(filename)
+        filename.write_text(content)
+        filename.chmod(0o640)
+
+    return write
 
 
 class TestExecutorInputFiles:
@@ -35,15 +51,15 @@ class TestExecutorInputFiles:
         trace = MagicMock()
         trace.context.values = {'x': 1}
         dest = ifile.get_destination.return_value = Path('/asdf')
-        content = ifile.template.render.return_value
+        chunks = ifile.template.generate.return_value = ['a', 'b']
         app = executor.Executor(Path('/'))
         app.set_input_file_mode = MagicMock()
         app.generate_input_file(trace, ifile)
 
         ifile.get_destination.assert_called_once_with(trace.cwd)
-        ifile.template.render.assert_called_once_with(trace=trace, **trace.context.values)
-        mock_file.assert_called_once_with(dest, 'w')
-        mock_file().write.assert_called_once_with(content)
+        mock_file.assert_called_once_with(dest, 'w', encoding='utf-8', errors='surrogateescape')
+        assert list(mock_file().writelines.call_args.args[0]) == [''.join(chunks)]
+        ifile.template.generate.assert_called_once_with(trace=trace, **trace.context.values)
         app.set_input_file_mode.assert_called_once_with(ifile, dest)
 
     @patch.object(executor, 'open', new_callable=mock_open)
@@ -54,68 +70,102 @@ class TestExecutorInputFiles:
         dest = ifile.get_destination.return_value = MagicMock()
         dest.parent.exists.return_value = False
 
-        content = ifile.template.render.return_value
+        chunks = ifile.template.generate.return_value = ['a', 'b']
         app = executor.Executor(Path('/'))
         app.set_input_file_mode = MagicMock()
         app.generate_input_file(trace, ifile)
 
         ifile.get_destination.assert_called_once_with(trace.cwd)
-        ifile.template.render.assert_called_once_with(trace=trace, **trace.context.values)
-        mock_file.assert_called_once_with(dest, 'w')
-        mock_file().write.assert_called_once_with(content)
+        mock_file.assert_called_once_with(dest, 'w', encoding='utf-8', errors='surrogateescape')
+        assert list(mock_file().writelines.call_args.args[0]) == [''.join(chunks)]
+        ifile.template.generate.assert_called_once_with(trace=trace, **trace.context.values)
         app.set_input_file_mode.assert_called_once_with(ifile, dest)
         dest.parent.mkdir.assert_called_once_with(parents=True)
 
-    @patch.object(executor.shutil, 'copy')
-    def test_copy_input_files(self, mock_copy):
+    def test_copy_input_files(self):
         trace = MagicMock()
+        project = MagicMock()
         input_files = trace.context.template.input_files = [
-            MagicMock(static=True, source=MagicMock(is_dir=MagicMock(return_value=False))),
-            MagicMock(static=False, source=MagicMock(is_dir=MagicMock(return_value=False))),
+            MagicMock(static=True),
+            MagicMock(static=False),
         ]
 
         static_dest = input_files[0].get_destination.return_value
         app = executor.Executor(Path('/'))
-        app.set_input_file_mode = MagicMock()
+        app.stager = MagicMock()
         app.generate_input_file = MagicMock()
 
-        app.copy_input_files(trace)
+        app.copy_input_files(project, trace)
 
         input_files[0].get_destination.assert_called_once_with(trace.cwd)
-        mock_copy.assert_called_once_with(str(input_files[0].source), str(static_dest))
-        app.set_input_file_mode.assert_called_once_with(input_files[0], static_dest)
-
+        app.stager.materialize.assert_called_once_with(
+            project, input_files[0], static_dest, app.can_hardlink(trace)
+        )
         app.generate_input_file.assert_called_once_with(trace, input_files[1])
 
-    @patch.object(executor.shutil, 'copytree')
-    def test_copy_input_files_static_directory(self, mock_copytree):
-        input_file = MagicMock(static=True)
-        input_file.source.is_dir.return_value = True
+    @patch.object(executor.os, 'geteuid')
+    def test_can_hardlink(self, mock_geteuid):
         trace = MagicMock()
-        trace.context.template.input_files = [input_file]
-
+        trace.context.template.network_namespace = False
         app = executor.Executor(Path('/'))
-        app.copy_input_files(trace)
-
-        mock_copytree.assert_called_once_with(
-            input_file.source, input_file.get_destination.return_value
-        )
+        mock_geteuid.return_value = 1000
+        assert app.can_hardlink(trace)
 
-    @patch.object(executor.shutil, 'copy')
-    def test_copy_input_files_mkdir(self, mock_copy):
-        input_file = MagicMock(static=True)
-        input_file.source.is_dir.return_value = False
-        dest = input_file.get_destination.return_value
-        dest.parent.exists.return_value = False
+        trace.context.template.network_namespace = True
+        assert not app.can_hardlink(trace)
 
-        trace = MagicMock()
-        trace.context.template.input_files = [input_file]
+        trace.context.template.network_namespace = False
+        app.network_namespace = True
+        assert not app.can_hardlink(trace)
 
-        ext = executor.Executor(Path('/'))
-        ext.set_input_file_mode = MagicMock()
+        app.network_namespace = False
+        mock_geteuid.return_value = 0
+        assert not app.can_hardlink(trace)
 
-        ext.copy_input_files(trace)
+    def test_generate_input_file_non_utf8(self, tmp_path):
+        source = tmp_path / 'input.txt'
+        source.write_bytes(b'\xff\xfe{{x}}\x80')
+        trace = make_trace(tmp_path, '__original__')
+        trace.context.values = {'x': 1}
+        app = executor.Executor(Path('/'))
+        app.generate_input_file(trace, InputFile(source, Path('output.txt')))
+        assert (trace.cwd / 'output.txt').read_bytes() == b'\xff\xfe1\x80'
 
-        dest.parent.mkdir.assert_called_once_with(parents=True)
-        mock_copy.assert_called_once_with(str(input_file.source), str(dest))
-        ext.set_input_file_mode.assert_called_once_with(input_file, dest)
+    def test_write_rendered_file_shared(self, tmp_path):
+        app = executor.Executor(Path('/'))
+        writes = []
+        for engine in ('__original__', 'a', 'b'):
+            trace = make_trace(tmp_path, engine)
+            filename = trace.cwd / 'sub' / 'input.txt'
+            filename.parent.mkdir()
+            app.write_rendered_file(trace, True, filename, write_content('1', writes))
+            assert filename.read_text() == '1'
+            assert filename.stat().st_mode & 0o777 == 0o640
+
+        # the template is rendered once for the context
+        assert len(writes) == 1
+        shared = tmp_path / 'trace-001-001' / executor.RENDERED_DIRNAME / 'sub' / 'input.txt'
+        assert shared.read_text() == '1'
+
+    def test_write_rendered_file_trace_dependent(self, tmp_path):
+        app = executor.Executor(Path('/'))
+        writes = []
+        for engine in ('__original__', 'a'):
+            trace = make_trace(tmp_path, engine)
+            filename = trace.cwd / 'input.txt'
+            app.write_rendered_file(trace, False, filename, write_content('1', writes))
+
+        assert writes == [
+            tmp_path / 'trace-001-001' / '__original__' / 'input.txt',
+            tmp_path / 'trace-001-001' / 'a' / 'input.txt',
+        ]
+        assert not (tmp_path / 'trace-001-001' / executor.RENDERED_DIRNAME).exists()
+
+    def test_write_rendered_file_outside_trace(self, tmp_path):
+        trace = make_trace(tmp_path, '__original__')
+        writes = []
+        filename = tmp_path / 'input.txt'
+        executor.Executor(Path('/')).write_rendered_file(
+            trace, True, filename, write_content('1', writes)
+        )
+        assert writes == [filename]
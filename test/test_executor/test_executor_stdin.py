@@ -1,5 +1,5 @@
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, call, mock_open, patch
 
 from differ import executor
 
@@ -21,6 +21,7 @@ class TestExecutorTraceStdin:
         app = executor.Executor(Path('/'))
         assert app.create_stdin_file(trace) is trace.context.template.stdin
 
+    @patch('differ.template.STREAM_BUFFER_SIZE', 1)
     @patch.object(executor, 'open', new_callable=mock_open)
     def test_create_stdin_file_str(self, mock_file):
         trace = MagicMock()
@@ -28,13 +29,14 @@ class TestExecutorTraceStdin:
         trace.cwd = Path('/path/to/trace')
         trace.context.values = {'x': 1}
         template = trace.context.template.stdin_template
+        template.generate.return_value = ['a', '\udcff']
 
         app = executor.Executor(Path('/'))
         assert app.create_stdin_file(trace) is trace.default_stdin_path
 
         mock_file.assert_called_once_with(trace.default_stdin_path, 'wb')
-        mock_file().write.assert_called_once_with(template.render.return_value.encode.return_value)
-        template.render.assert_called_once_with(trace=trace, **trace.context.values)
+        mock_file().write.assert_has_calls([call(b'a'), call(b'\xff')])
+        template.generate.assert_called_once_with(trace=trace, **trace.context.values)
 
     @patch.object(executor, 'open', new_callable=mock_open)
     def test_create_stdin_file_empty_str(self, mock_file):
@@ -31,6 +31,21 @@ class TestExecutorGenerateTraces:
             trace=trace, **context.values
         )
 
+    @patch.object(executor, 'Trace')
+    def test_create_trace_ports(self, mock_trace_cls):
+        project = MagicMock()
+        context = MagicMock(values={})
+        context.template.ports = {'http': 'tcp'}
+        cwd = project.trace_directory.return_value = MagicMock()
+        cwd.exists.return_value = False
+
+        app = executor.Executor(Path('/'))
+        app.port_allocator = MagicMock()
+        trace = app.create_trace(project, context, MagicMock(), '_engine_')
+
+        app.port_allocator.allocate_ports.assert_called_once_with({'http': 'tcp'})
+        assert trace.ports is app.port_allocator.allocate_ports.return_value
+
     @patch.object(executor, 'Trace')
     def test_create_trace_error(self, mock_trace_cls):
         project = MagicMock()
@@ -48,28 +63,28 @@ class TestExecutorGenerateTraces:
 
         project.trace_directory.assert_called_once_with(context, engine)
 
-    @patch.object(executor, 'CombinationParameterGenerator')
-    def test_generate_paramter(self, mock_param_gen_cls):
+    @patch.object(executor, 'create_generator')
+    def test_generate_paramter(self, mock_create_generator):
         template = MagicMock()
         value_sets = [{'x': 1}, {'y': 2}]
-        param_gen = mock_param_gen_cls.return_value
+        param_gen = mock_create_generator.return_value
         param_gen.generate.return_value = value_sets
 
         app = executor.Executor(Path('/'))
-        assert app.generate_parameters(template) == value_sets
-        mock_param_gen_cls.assert_called_once_with(template)
+        assert list(app.generate_parameters(template)) == value_sets
+        mock_create_generator.assert_called_once_with(template)
         param_gen.generate.assert_called_once()
 
-    @patch.object(executor, 'CombinationParameterGenerator')
-    def test_generate_paramter_max(self, mock_param_gen_cls):
+    @patch.object(executor, 'create_generator')
+    def test_generate_paramter_max(self, mock_create_generator):
         template = MagicMock()
         value_sets = [{'x': 1}, {'y': 2}]
-        param_gen = mock_param_gen_cls.return_value
+        param_gen = mock_create_generator.return_value
         param_gen.generate.return_value = value_sets
 
         app = executor.Executor(Path('/'), max_permutations=1)
-        assert app.generate_parameters(template) == [value_sets[0]]
-        mock_param_gen_cls.assert_called_once_with(template)
+        assert list(app.generate_parameters(template)) == [value_sets[0]]
+        mock_create_generator.assert_called_once_with(template)
         param_gen.generate.assert_called_once()
 
     def test_generate_contexts(self):
@@ -77,7 +92,17 @@ class TestExecutorGenerateTraces:
         template = MagicMock(id='test')
         app = executor.Executor(Path('/'))
         app.generate_parameters = MagicMock(return_value=[{'x': 1}, {'y': 2}])
-        assert app.generate_contexts(project, template) == [
+        assert list(app.generate_contexts(project, template)) == [
             TraceContext(template, {'x': 1}, id=f'test-001'),
             TraceContext(template, {'y': 2}, id=f'test-002'),
         ]
+
+    def test_generate_parameters_lazy(self):
+        template = MagicMock()
+        app = executor.Executor(Path('/'))
+        with patch.object(executor, 'create_generator') as mock_create_generator:
+            parameters = app.generate_parameters(template)
+            # nothing is generated until the first value is requested
+            mock_create_generator.assert_not_called()
+            mock_create_generator.return_value.generate.return_value = iter([{'x': 1}])
+            assert next(parameters) == {'x': 1}
@@ -1,5 +1,5 @@
 from pathlib import Path
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
@@ -100,3 +100,175 @@ class TestExecutorRunContext:
         app.compare_trace.assert_called_once_with(project, original_trace, debloated_trace)
         app.check_trace_crash.assert_called_once_with(debloated_trace)
         app.get_errors.assert_called_once_with(debloated_trace, [], crash)
+
+    def test_run_context_parallel_debloaters(self):
+        debloater1 = MagicMock()
+        debloater2 = MagicMock()
+        project = MagicMock(debloaters={'x': debloater1, 'y': debloater2})
+        context = MagicMock()
+        context_dir = project.context_directory.return_value
+        context_dir.exists.return_value = False
+        original_trace = MagicMock()
+
+        app = executor.Executor(Path('/'), parallel_debloaters=True)
+        app.create_trace = MagicMock(return_value=original_trace)
+        app.run_trace = MagicMock()
+        app.check_original_trace = MagicMock(return_value=None)
+        app.run_debloated_trace = MagicMock(side_effect=[1, 0])
+
+        assert app.run_context(project, context) == 1
+        # every trace of the context runs from its own directory
+        app.run_trace.assert_called_once_with(project, original_trace, link_cwd=False)
+        assert app.run_debloated_trace.call_count == 2
+        app.run_debloated_trace.assert_any_call(
+            project, context, original_trace, debloater1, link_cwd=False
+        )
+        app.run_debloated_trace.assert_any_call(
+            project, context, original_trace, debloater2, link_cwd=False
+        )
+
+    def test_run_debloaters_concurrently(self):
+        template = executor.TraceTemplate()
+        app = executor.Executor(Path('/'))
+        assert not app.run_debloaters_concurrently(template, 2)
+
+        template.parallel_debloaters = True
+        assert app.run_debloaters_concurrently(template, 2)
+        assert not app.run_debloaters_concurrently(template, 1)
+
+        template.parallel_debloaters = False
+        app.parallel_debloaters = True
+        assert app.run_debloaters_concurrently(template, 2)
+
+    def test_run_context_serial_debloaters(self):
+        project = MagicMock(debloaters={'x': MagicMock(), 'y': MagicMock()})
+        context = MagicMock()
+        context.template.parallel_debloaters = False
+        project.context_directory.return_value.exists.return_value = False
+        original_trace = MagicMock()
+
+        app = executor.Executor(Path('/'))
+        app.create_trace = MagicMock(return_value=original_trace)
+        app.run_trace = MagicMock()
+        app.check_original_trace = MagicMock(return_value=None)
+        app.run_debloated_trace = MagicMock(return_value=0)
+
+        assert app.run_context(project, context) == 0
+        app.run_trace.assert_called_once_with(project, original_trace, link_cwd=True)
+        assert [c.kwargs for c in app.run_debloated_trace.call_args_list] == [{}, {}]
+
+    def test_run_context_store_cache(self):
+        project = MagicMock(debloaters={})
+        context = MagicMock()
+        project.context_directory.return_value.exists.return_value = False
+        original_trace = MagicMock(cache_key='abc')
+
+        app = executor.Executor(Path('/'))
+        app.trace_cache = MagicMock()
+        app.create_trace = MagicMock(return_value=original_trace)
+        app.run_trace = MagicMock()
+        app.check_original_trace = MagicMock(return_value=None)
+
+        assert app.run_context(project, context) == 0
+        app.trace_cache.store.assert_called_once_with(original_trace, 'abc')
+
+    def test_run_context_crash_not_cached(self):
+        project = MagicMock(debloaters={})
+        context = MagicMock()
+        project.context_directory.return_value.exists.return_value = False
+
+        app = executor.Executor(Path('/'))
+        app.trace_cache = MagicMock()
+        app.create_trace = MagicMock(return_value=MagicMock(cache_key='abc'))
+        app.run_trace = MagicMock()
+        app.check_original_trace = MagicMock(return_value=MagicMock())
+
+        assert app.run_context(project, context) == 1
+        app.trace_cache.store.assert_not_called()
+
+    def test_run_context_skip_debloaters(self):
+        debloater1 = MagicMock(engine='x')
+        debloater2 = MagicMock(engine='y')
+        project = MagicMock(debloaters={'x': debloater1, 'y': debloater2})
+        context = MagicMock()
+        project.context_directory.return_value.exists.return_value = False
+        original_trace = MagicMock()
+
+        app = executor.Executor(Path('/'))
+        app.create_trace = MagicMock(return_value=original_trace)
+        app.run_trace = MagicMock()
+        app.check_original_trace = MagicMock(return_value=None)
+        app.run_debloated_trace = MagicMock(return_value=0)
+
+        assert app.run_context(project, context, ['x']) == 0
+        app.run_debloated_trace.assert_called_once_with(
+            project, context, original_trace, debloater2
+        )
+
+    def test_finish_context(self, tmp_path):
+        project = MagicMock()
+        context_dir = project.context_directory.return_value = tmp_path / 'trace-001-001'
+        (context_dir / executor.RENDERED_DIRNAME).mkdir(parents=True)
+        (context_dir / '__original__').mkdir()
+        context = MagicMock()
+
+        executor.Executor(Path('/')).finish_context(project, context)
+        project.context_directory.assert_called_once_with(context)
+        assert not (context_dir / executor.RENDERED_DIRNAME).exists()
+        assert (context_dir / '__original__').exists()
+
+    def test_finish_context_workspace(self):
+        project = MagicMock()
+        context_dir = project.context_directory.return_value
+        app = executor.Executor(Path('/'), workspace=Path('/dev/shm'))
+        app.workspace = MagicMock()
+
+        app.finish_context(project, MagicMock(), 0)
+        app.workspace.discard.assert_called_once_with(context_dir)
+
+        for errors in (None, 1):
+            app.workspace.reset_mock()
+            app.finish_context(project, MagicMock(), errors)
+            app.workspace.persist.assert_called_once_with(context_dir)
+            app.workspace.discard.assert_not_called()
+
+    def test_finish_context_workspace_report_successes(self):
+        project = MagicMock()
+        app = executor.Executor(Path('/'), report_successes=True, workspace=Path('/dev/shm'))
+        app.workspace = MagicMock()
+        app.finish_context(project, MagicMock(), 0)
+        app.workspace.persist.assert_called_once_with(project.context_directory.return_value)
+
+    def test_create_context_directory_workspace(self):
+        project = MagicMock()
+        context = MagicMock()
+        context_dir = project.context_directory.return_value
+        context_dir.exists.return_value = False
+        app = executor.Executor(Path('/'))
+        app.workspace = MagicMock()
+        app.workspace.create.return_value = True
+
+        assert app.create_context_directory(project, context) is context_dir
+        app.workspace.create.assert_called_once_with(context_dir)
+        context_dir.mkdir.assert_not_called()
+        context.save.assert_called_once_with(context_dir / 'context.yml')
+
+        app.workspace.create.return_value = False
+        app.create_context_directory(project, context)
+        context_dir.mkdir.assert_called_once_with()
+
+    @patch.object(executor, 'pack_context')
+    def test_finish_context_archive(self, mock_pack):
+        project = MagicMock()
+        context = MagicMock()
+        app = executor.Executor(Path('/'), archive_artifacts=True)
+        app.finish_context(project, context, 0)
+        mock_pack.assert_called_once_with(project.context_directory.return_value, context.template)
+
+    @patch.object(executor, 'pack_context')
+    def test_finish_context_archive_workspace_discard(self, mock_pack):
+        app = executor.Executor(Path('/'), archive_artifacts=True)
+        app.workspace = MagicMock()
+        app.finish_context(MagicMock(), MagicMock(), 0)
+        mock_pack.assert_not_called()
+        app.workspace.discard.assert_called_once()
@@ -1,14 +1,17 @@
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import pytest
+import yaml
 
 from differ import executor
+from differ.core import TimeoutConstraint
 
 
 class TestExecutorRunProject:
-    def test_run_project_error_count(self):
-        template = MagicMock()
+    @patch.object(executor, 'RunJournal')
+    def test_run_project_error_count(self, mock_journal_cls):
+        template = MagicMock(time_budget=0)
         context = MagicMock()
         project = MagicMock(templates=[template], debloaters={'x': MagicMock()})
         project.directory.exists.return_value = False
@@ -16,11 +19,15 @@ class TestExecutorRunProject:
         app = executor.Executor(Path('/'))
         app.generate_contexts = MagicMock(return_value=[context])
         app.run_context = MagicMock(return_value=1)
+        app.retention = MagicMock()
 
         assert app.run_project(project) == 1
         project.directory.mkdir.assert_called_once()
+        app.retention.context_finished.assert_called_once_with(project, context.id, 1)
         app.generate_contexts.assert_called_once_with(project, template)
-        app.run_context.assert_called_once_with(project, context)
+        app.run_context.assert_called_once_with(project, context, [])
+        mock_journal_cls.return_value.start.assert_called_once()
+        mock_journal_cls.return_value.record.assert_called_once_with(context.id, 1)
 
     def test_run_project_exists(self):
         project = MagicMock(templates=[], debloaters={'x': MagicMock()})
@@ -31,17 +38,19 @@ class TestExecutorRunProject:
         with pytest.raises(FileExistsError):
             app.run_project(project)
 
-    @patch.object(executor.shutil, 'rmtree')
-    def test_run_project_exists_rmtree(self, mock_rmtree):
+    @patch.object(executor, 'RunJournal')
+    @patch('differ.retention.remove_tree')
+    def test_run_project_exists_remove_tree(self, mock_remove_tree, mock_journal_cls):
         project = MagicMock(templates=[], debloaters={'x': MagicMock()})
         project.directory.exists.return_value = True
+        project.staging_directory.return_value.exists.return_value = False
 
         app = executor.Executor(Path('/'), overwrite_existing_report=True)
         app.generate_contexts = MagicMock(return_value=[])
         app.run_context = MagicMock(return_value=0)
 
         assert app.run_project(project) == 0
-        mock_rmtree.assert_called_once_with(project.directory)
+        mock_remove_tree.assert_called_once_with(project.directory)
         project.directory.mkdir.assert_called_once()
 
     def test_setup_root_mkdir(self):
@@ -51,3 +60,387 @@ class TestExecutorRunProject:
         app = executor.Executor(root)
         app.setup()
         root.mkdir.assert_called_once()
+
+    def test_run_template_jobs(self):
+        template = MagicMock()
+        project = MagicMock(templates=[template], debloaters={'x': MagicMock()})
+        contexts = [
+            executor.TraceContext(template, {'x': 1}, id='test-001'),
+            executor.TraceContext(template, {'x': 2}, id='test-002'),
+        ]
+
+        app = executor.Executor(Path('/'), jobs=2, dedupe='none')
+        app.generate_contexts = MagicMock(return_value=contexts)
+        app.run_context = MagicMock(return_value=1)
+
+        assert app.run_template(project, template) == (4, 2)
+        assert executor._POOL_STATE is None
+
+    def test_setup_project_resume(self, tmp_path):
+        project = executor.Project(
+            'test',
+            tmp_path / 'test',
+            Path('/bin/true'),
+            debloaters={'x': executor.DebloatedBinary('x', Path('/bin/true'))},
+        )
+        project.directory.mkdir()
+        (project.directory / 'journal.yml').write_text('{seed: 10}\n{context: t-001, errors: 1}\n')
+        (project.directory / 'trace-t-001').mkdir()
+        (project.directory / 'trace-t-002' / 'x').mkdir(parents=True)
+        (project.directory / 'report-x-error-t-001.yml').touch()
+        (project.directory / 'report-x-error-t-002.yml').touch()
+
+        app = executor.Executor(Path('/'), resume=True)
+        app.setup_project(project)
+
+        assert app.journal.seed == 10
+        assert app.journal.completed == {'t-001': 1}
+        assert sorted(path.name for path in project.directory.iterdir()) == [
+            'journal.yml',
+            'report-x-error-t-001.yml',
+            'trace-t-001',
+        ]
+
+    def test_remove_context_workspace_link(self, tmp_path):
+        project = executor.Project('test', tmp_path / 'test', Path('/bin/true'))
+        project.directory.mkdir()
+        directory = tmp_path / 'shm' / 'trace-t-001-abc'
+        directory.mkdir(parents=True)
+        (project.directory / 'trace-t-001').symlink_to(directory)
+
+        executor.Executor(Path('/')).remove_context(project, 't-001')
+        assert not (project.directory / 'trace-t-001').is_symlink()
+        assert not directory.exists()
+
+    def test_setup_project_resume_no_journal(self, tmp_path):
+        project = executor.Project('test', tmp_path, Path('/bin/true'))
+        app = executor.Executor(Path('/'), resume=True)
+        with pytest.raises(FileNotFoundError):
+            app.setup_project(project)
+
+    def test_run_template_resume(self):
+        template = MagicMock()
+        project = MagicMock(templates=[template], debloaters={'x': MagicMock()})
+        contexts = [
+            executor.TraceContext(template, {'x': 1}, id='test-001'),
+            executor.TraceContext(template, {'x': 2}, id='test-002'),
+        ]
+
+        app = executor.Executor(Path('/'), dedupe='none')
+        app.journal = MagicMock(completed={'test-001': 1})
+        app.generate_contexts = MagicMock(return_value=contexts)
+        app.run_context = MagicMock(return_value=0)
+
+        assert app.run_template(project, template) == (4, 1)
+        app.run_context.assert_called_once_with(project, contexts[1], [])
+        app.journal.record.assert_called_once_with('test-002', 0)
+
+    def test_pending_contexts_duplicate(self, tmp_path):
+        template = executor.TraceTemplate(arguments='{{x}}', id='001')
+        project = executor.Project('test', tmp_path, Path('/bin/true'), templates=[template])
+        contexts = [
+            executor.TraceContext(template, {'x': 1}, id='001-001'),
+            executor.TraceContext(template, {'x': 2}, id='001-002'),
+            executor.TraceContext(template, {'x': 1}, id='001-003'),
+        ]
+
+        app = executor.Executor(Path('/'))
+        app.generate_contexts = MagicMock(return_value=contexts)
+
+        assert list(app.pending_contexts(project, template, {})) == contexts[:2]
+        alias = yaml.safe_load(project.alias_filename('001-003').read_text())
+        assert alias == {'context': '001-003', 'alias': '001-001', 'values': {'x': 1}}
+
+    def test_generate_contexts_seed(self):
+        template = MagicMock(id='test')
+        app = executor.Executor(Path('/'))
+        app.journal = MagicMock(seed=10)
+        app.generate_parameters = lambda template: [{'x': executor.random.random()}]
+
+        first = list(app.generate_contexts(MagicMock(), template))
+        second = list(app.generate_contexts(MagicMock(), template))
+        assert first[0].values == second[0].values
+
+    def test_generate_contexts_seed_interleaved(self):
+        template = MagicMock(id='test')
+        app = executor.Executor(Path('/'))
+        app.journal = MagicMock(seed=10)
+        app.generate_parameters = lambda template: (
+            {'x': executor.random.random()} for _ in range(3)
+        )
+
+        expected = [context.values for context in app.generate_contexts(MagicMock(), template)]
+        values = []
+        for context in app.generate_contexts(MagicMock(), template):
+            # running a context uses the global random module between generated contexts
+            executor.random.random()
+            values.append(context.values)
+        assert values == expected
+
+    def test_generate_contexts_golden(self):
+        template = MagicMock()
+        app = executor.Executor(Path('/'))
+        app.golden = MagicMock()
+        app.generate_parameters = MagicMock()
+
+        assert app.generate_contexts(MagicMock(), template) is (
+            app.golden.generate_contexts.return_value
+        )
+        app.golden.generate_contexts.assert_called_once_with(template)
+        app.generate_parameters.assert_not_called()
+
+    @patch.object(executor, 'GoldenSnapshot')
+    @patch.object(executor, 'RunJournal')
+    def test_run_project_golden(self, mock_journal_cls, mock_snapshot_cls):
+        project = MagicMock(templates=[], debloaters={'x': MagicMock()})
+        project.directory.exists.return_value = False
+        archive = Path('/golden.tar.gz')
+
+        app = executor.Executor(Path('/'), golden=archive)
+        assert app.run_project(project) == 0
+
+        snapshot = mock_snapshot_cls.load.return_value
+        mock_snapshot_cls.load.assert_called_once_with(
+            archive, project.directory / executor.GOLDEN_DIRNAME
+        )
+        snapshot.check_project.assert_called_once_with(project)
+        assert app.golden is snapshot
+
+    @patch.object(executor, 'GoldenSnapshot')
+    @patch.object(executor, 'RunJournal')
+    def test_record_snapshot(self, mock_journal_cls, mock_snapshot_cls):
+        template = MagicMock()
+        contexts = [MagicMock(), MagicMock()]
+        project = MagicMock(templates=[template])
+        project.directory.exists.return_value = False
+        archive = Path('/golden.tar.gz')
+
+        app = executor.Executor(Path('/'))
+        app.generate_contexts = MagicMock(return_value=contexts)
+        app.record_context = MagicMock(side_effect=[0, 1])
+
+        assert app.record_snapshot(project, archive) == 1
+        snapshot = mock_snapshot_cls.create.return_value
+        assert app.record_context.call_args_list == [
+            call(project, contexts[0], snapshot),
+            call(project, contexts[1], snapshot),
+        ]
+        snapshot.save.assert_called_once_with(archive, seed=app.journal.seed)
+
+    def test_record_context(self):
+        project = MagicMock()
+        project.context_directory.return_value.exists.return_value = False
+        context = MagicMock()
+        snapshot = MagicMock()
+
+        app = executor.Executor(Path('/'))
+        app.create_trace = MagicMock()
+        app.run_trace = MagicMock()
+        app.check_original_trace = MagicMock(return_value=None)
+        app.finish_context = MagicMock()
+
+        assert app.record_context(project, context, snapshot) == 0
+        trace = app.create_trace.return_value
+        app.create_trace.assert_called_once_with(
+            project, context, project.original, '__original__'
+        )
+        app.run_trace.assert_called_once_with(project, trace)
+        snapshot.add.assert_called_once_with(trace)
+        app.finish_context.assert_called_once_with(project, context, 0)
+
+    def test_record_context_crash(self):
+        project = MagicMock()
+        project.context_directory.return_value.exists.return_value = False
+        snapshot = MagicMock()
+
+        app = executor.Executor(Path('/'))
+        app.create_trace = MagicMock()
+        app.run_trace = MagicMock()
+        crash = app.check_original_trace = MagicMock()
+
+        assert app.record_context(project, MagicMock(), snapshot) == 1
+        crash.return_value.save.assert_called_once_with(project.crash_filename.return_value)
+        snapshot.add.assert_not_called()
+
+    @patch.object(executor, 'RunJournal')
+    def test_run_batch(self, mock_journal_cls, tmp_path):
+        short = executor.TraceTemplate(id='short')
+        server = executor.TraceTemplate(
+            id='server', concurrent=MagicMock(), timeout=TimeoutConstraint(30)
+        )
+        first = executor.Project('first', tmp_path / 'first', Path('/bin/true'), templates=[short])
+        second = executor.Project(
+            'second', tmp_path / 'second', Path('/bin/true'), templates=[server]
+        )
+
+        app = executor.Executor(Path('/'), dedupe='none')
+        app.generate_contexts = lambda project, template: [
+            executor.TraceContext(template, {}, id=f'{template.id}-001'),
+            executor.TraceContext(template, {}, id=f'{template.id}-002'),
+        ]
+        app.run_context = MagicMock(side_effect=[1, 0, 0, 1])
+
+        assert app.run_batch([first, second]) == {'first': (2, 1, 0), 'second': (2, 1, 0)}
+        # the server template is scheduled first
+        scheduled = [
+            (call.args[0].name, call.args[1].id) for call in app.run_context.call_args_list
+        ]
+        assert scheduled == [
+            ('second', 'server-001'),
+            ('second', 'server-002'),
+            ('first', 'short-001'),
+            ('first', 'short-002'),
+        ]
+        assert mock_journal_cls.return_value.record.call_count == 4
+        assert app.journal is None
+
+    def test_run_batch_contexts_jobs(self):
+        template = MagicMock()
+        projects = [
+            MagicMock(templates=[template]),
+            MagicMock(templates=[template]),
+        ]
+        items = [
+            (projects[0], executor.TraceContext(template, {}, id='test-001')),
+            (projects[1], executor.TraceContext(template, {}, id='test-001')),
+        ]
+
+        app = executor.Executor(Path('/'), jobs=2)
+        app.run_context = MagicMock(
+            side_effect=lambda project, context, skip: projects.index(project)
+        )
+
+        results = list(app.run_batch_contexts(items))
+        assert sorted((projects.index(project), errors) for project, _, errors in results) == [
+            (0, 0),
+            (1, 1),
+        ]
+        assert executor._POOL_STATE is None
+
+    def test_estimate_context_duration(self):
+        project = MagicMock(debloaters={'a': MagicMock(), 'b': MagicMock()})
+        short = executor.TraceContext(executor.TraceTemplate(id='short'), {})
+        server = executor.TraceContext(
+            executor.TraceTemplate(
+                id='server', concurrent=MagicMock(), timeout=TimeoutConstraint(5)
+            ),
+            {},
+        )
+
+        app = executor.Executor(Path('/'))
+        assert app.estimate_context_duration(project, short) == 3 * executor.SHORT_TRACE_DURATION
+        assert app.estimate_context_duration(project, server) == 15.0
+        app.parallel_debloaters = True
+        assert app.estimate_context_duration(project, server) == 10.0
+
+    def test_run_batch_contexts_jobs_lazy(self):
+        template = executor.TraceTemplate(id='001')
+        project = executor.Project('test', Path('/'), Path('/bin/true'), templates=[template])
+        generated = []
+
+        def generate_items():
+            for i in range(5):
+                generated.append(i)
+                yield project, executor.TraceContext(template, {}, id=f'001-00{i}')
+
+        app = executor.Executor(Path('/'), jobs=2)
+        app.run_context = MagicMock(return_value=0)
+
+        results = app.run_batch_contexts(generate_items(), [project])
+        next(results)
+        # only ``jobs`` contexts have been generated when the first context completes
+        assert len(generated) == 2
+        assert len(list(results)) == 4
+
+    def test_run_batch_contexts_budget(self):
+        template = MagicMock()
+        project = MagicMock(templates=[template], debloaters={})
+        project.name = 'test'
+        contexts = [executor.TraceContext(template, {}, id=f'test-00{i}') for i in range(3)]
+
+        app = executor.Executor(Path('/'), fail_fast=True)
+        app.run_context = MagicMock(return_value=1)
+
+        results = list(app.run_batch_contexts((project, context) for context in contexts))
+        assert [context.id for _, context, _ in results] == ['test-000']
+        assert app.budget.skipped_contexts == {('test', template.id): 2}
+
+    def test_pending_contexts_budget(self):
+        template = executor.TraceTemplate(id='001')
+        project = executor.Project('test', Path('/'), Path('/bin/true'), templates=[template])
+        generated = []
+
+        def generate_contexts(project, template):
+            for i in range(5):
+                generated.append(i)
+                yield executor.TraceContext(template, {}, id=f'001-00{i}')
+
+        app = executor.Executor(Path('/'), max_errors_per_template=1, dedupe='none')
+        app.generate_contexts = MagicMock(side_effect=generate_contexts)
+        contexts = app.pending_contexts(project, template, {})
+        context = next(contexts)
+        app.budget.record(project, context, 1)
+
+        # the remaining contexts are not generated once the error budget is exhausted
+        assert list(contexts) == []
+        assert generated == [0]
+
+    def test_run_batch_contexts_jobs_budget(self):
+        template = executor.TraceTemplate(id='001')
+        project = executor.Project('test', Path('/'), Path('/bin/true'), templates=[template])
+        contexts = [executor.TraceContext(template, {}, id=f'001-00{i}') for i in range(4)]
+
+        app = executor.Executor(Path('/'), jobs=2, max_errors_per_template=2)
+        app.run_context = MagicMock(return_value=1)
+
+        results = list(app.run_batch_contexts((project, context) for context in contexts))
+        # the third context is submitted after the first error, the fourth context is skipped
+        # after the second error
+        assert sorted(context.id for _, context, _ in results) == ['001-000', '001-001', '001-002']
+        assert app.budget.skipped_contexts == {('test', '001'): 1}
+
+    @patch.object(executor, 'RunJournal')
+    @patch('differ.budget.time.monotonic')
+    def test_run_project_time_budget(self, mock_monotonic, mock_journal_cls):
+        mock_monotonic.return_value = 100.0
+        templates = [executor.TraceTemplate(id='001'), executor.TraceTemplate(id='002')]
+        project = executor.Project('test', Path('/'), Path('/bin/true'), templates=templates)
+        project.directory = MagicMock()
+        project.directory.exists.return_value = False
+        contexts = {
+            template.id: [
+                executor.TraceContext(template, {}, id=f'{template.id}-00{i}') for i in range(3)
+            ]
+            for template in templates
+        }
+
+        def run_context(project, context, skip_debloaters):
+            # the first template's contexts take 20 seconds, the second template's take 1 second
+            mock_monotonic.return_value += 20.0 if context.template is templates[0] else 1.0
+            return 0
+
+        app = executor.Executor(Path('/'), time_budget=60.0, dedupe='none')
+        generated = []
+
+        def generate_contexts(project, template):
+            for context in contexts[template.id]:
+                generated.append(context.id)
+                yield context
+
+        app.generate_contexts = MagicMock(side_effect=generate_contexts)
+        app.run_context = MagicMock(side_effect=run_context)
+
+        assert app.run_project(project) == 0
+        # the first template used its 30 second share after two contexts and the second template
+        # had the remaining 20 seconds to run all of its contexts
+        assert [call.args[1].id for call in app.run_context.call_args_list] == [
+            '001-000',
+            '001-001',
+            '002-000',
+            '002-001',
+            '002-002',
+        ]
+        # the first template's last context was never generated
+        assert '001-002' not in generated
+        assert app.time_budget.expired == {('test', '001')}
+        assert app.time_budget.skipped_contexts == {}
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock, call, patch
 import pytest
 
 from differ import executor
-from differ.core import ConcurrentHookMode
+from differ.core import ConcurrentHookMode, PcapConfig
 
 
 class TestExecutorRunTrace:
@@ -16,7 +16,8 @@ class TestExecutorRunTrace:
         trace_cwd = MagicMock()
         link_cwd = trace_cwd.parent / 'current_trace'
         link_cwd.exists.return_value = True
-        trace = MagicMock(cwd=trace_cwd, arguments='hello world')
+        trace = MagicMock(cwd=trace_cwd, arguments='hello world', network_namespace=None)
+        trace.context.template.network_namespace = False
         trace.context.template.pcap = None
 
         app = executor.Executor(Path('/'))
@@ -52,7 +53,8 @@ class TestExecutorRunTrace:
         link_cwd = trace_cwd.parent / 'current_trace'
         link_cwd.exists.return_value = False
         link_filename = trace_cwd / 'my_binary'
-        trace = MagicMock(cwd=trace_cwd, arguments='hello world')
+        trace = MagicMock(cwd=trace_cwd, arguments='hello world', network_namespace=None)
+        trace.context.template.network_namespace = False
         trace.context.template.pcap = None
 
         app = executor.Executor(Path('/'))
@@ -84,12 +86,12 @@ class TestExecutorRunTrace:
         link_filename.symlink_to.assert_called_once_with(trace.binary)
 
     @patch.object(executor.subprocess, 'Popen')
-    @patch.object(executor.time, 'sleep')
-    def test_run_trace_pcap(self, mock_sleep, mock_popen):
+    def test_run_trace_pcap(self, mock_popen):
         trace_cwd = MagicMock()
         link_cwd = trace_cwd.parent / 'current_trace'
         link_cwd.exists.return_value = True
-        trace = MagicMock(cwd=trace_cwd, arguments='hello world')
+        trace = MagicMock(cwd=trace_cwd, arguments='hello world', network_namespace=None)
+        trace.context.template.network_namespace = False
 
         app = executor.Executor(Path('/'))
         app.create_stdin_file = MagicMock()
@@ -99,7 +101,6 @@ class TestExecutorRunTrace:
         app._teardown_trace = MagicMock()
         app._start_packet_capture = MagicMock()
         pcap = app._start_packet_capture.return_value
-        pcap.poll.return_value = None
 
         app.run_trace(MagicMock(link_filename=''), trace)
 
@@ -122,14 +123,12 @@ class TestExecutorRunTrace:
         link_cwd.symlink_to.assert_called_once_with(trace_cwd)
 
         app._start_packet_capture.assert_called_once_with(trace)
-        pcap.poll.assert_called_once()
-        pcap.send_signal.assert_called_once_with(signal.SIGINT.value)
-        pcap.wait.assert_called_once()
+        pcap.stop.assert_called_once()
 
     @patch.object(executor.subprocess, 'run')
     def test_setup_trace(self, mock_run):
         hook = MagicMock()
-        trace = MagicMock()
+        trace = MagicMock(network_namespace=None)
         trace.context.template.hooks = [hook]
         cwd = object()
 
@@ -169,7 +168,7 @@ class TestExecutorRunTrace:
     @patch.object(executor.time, 'monotonic')
     def test_teardown_trace(self, mock_time, mock_run):
         hook = MagicMock()
-        trace = MagicMock()
+        trace = MagicMock(network_namespace=None)
         trace.context.template.hooks = [hook]
         trace.context.template.timeout.seconds = 10.0
         trace.start_time = 0.0
@@ -245,8 +244,9 @@ class TestExecutorRunTrace:
         mock_time.return_value = 10
 
         cwd = MagicMock()
-        trace = MagicMock()
+        trace = MagicMock(network_namespace=None)
         trace.context.template.concurrent.delay = 2
+        trace.context.template.concurrent.ready = None
         trace.context.template.timeout.seconds = 5
 
         app = executor.Executor(Path('/'))
@@ -415,18 +415,215 @@ class TestExecutorRunTrace:
             call(trace.process, 20.0 + 1.0),
         ]
 
-    @patch.object(executor.subprocess, 'Popen')
-    def test_start_packet_capture(self, mock_popen):
-        trace = MagicMock()
-        trace.context.template.pcap.interface = 'lo'
+    @patch.object(executor, 'PacketCapture')
+    def test_start_packet_capture(self, mock_capture_cls):
+        trace = MagicMock(network_namespace=None)
+        trace.context.template.pcap = PcapConfig(Path('capture.pcap'), 'lo')
 
         app = executor.Executor(Path('/'))
-        assert app._start_packet_capture(trace) is mock_popen.return_value
-        mock_popen.assert_called_once_with(
-            ['tcpdump', '-i', 'lo', '-w', str(trace.pcap_path)],
-            cwd=str(trace.cwd),
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            stdin=subprocess.DEVNULL,
+        assert app._start_packet_capture(trace) is mock_capture_cls.return_value
+        mock_capture_cls.assert_called_once_with(
+            ['tcpdump', '-i', 'lo', '-U', '--immediate-mode', '-w', str(trace.pcap_path)],
+            trace.pcap_path,
+            trace.cwd,
         )
+        mock_capture_cls.return_value.start.assert_called_once_with()
         trace.pcap_path.touch.assert_called_once_with(mode=0o666)
+
+    @patch.object(executor, 'PacketCapture')
+    def test_start_packet_capture_network_namespace(self, mock_capture_cls):
+        trace = MagicMock()
+        trace.network_namespace.wrap.side_effect = lambda args: ['nsenter'] + args
+        trace.context.template.pcap = PcapConfig(Path('capture.pcap'), 'eth0')
+
+        app = executor.Executor(Path('/'))
+        assert app._start_packet_capture(trace) is mock_capture_cls.return_value
+        mock_capture_cls.assert_called_once_with(
+            ['nsenter', 'tcpdump', '-i', 'lo', '-U', '--immediate-mode']
+            + ['-w', str(trace.pcap_path)],
+            trace.pcap_path,
+            trace.cwd,
+        )
+
+    @patch.object(executor, 'NetworkNamespace')
+    @patch.object(executor.subprocess, 'Popen')
+    def test_run_trace_network_namespace(self, mock_popen, mock_ns_cls):
+        trace_cwd = MagicMock()
+        trace = MagicMock(cwd=trace_cwd, arguments='hello world', network_namespace=None)
+        trace.context.template.pcap = None
+        trace.context.template.network_namespace = True
+        ns = mock_ns_cls.return_value
+        ns.wrap.side_effect = lambda args: ['nsenter'] + args
+
+        app = executor.Executor(Path('/'))
+        app.create_stdin_file = MagicMock()
+        app.write_hook_scripts = MagicMock()
+        app._setup_trace = MagicMock()
+        app._monitor_trace = MagicMock()
+        app._teardown_trace = MagicMock()
+
+        app.run_trace(MagicMock(link_filename=''), trace)
+
+        assert trace.network_namespace is ns
+        ns.start.assert_called_once()
+        ns.stop.assert_called_once()
+        assert mock_popen.call_args.args[0] == [
+            'nsenter',
+            f'./{trace.binary.name}',
+            'hello',
+            'world',
+        ]
+        assert trace.process.args == [f'./{trace.binary.name}', 'hello', 'world']
+
+    def test_monitor_trace_ready(self):
+        trace = MagicMock(network_namespace=None)
+        trace.context.template.timeout.seconds = 5
+        ready = trace.context.template.concurrent.ready
+
+        app = executor.Executor(Path('/'))
+        app._wait_ready = MagicMock(return_value=(True, 0))
+        app._wait_process = MagicMock()
+        app._launch_concurrent_script = MagicMock()
+        app._monitor_concurrent_mode = MagicMock(return_value=(False, 0))
+        app._monitor_trace(trace, MagicMock())
+
+        app._wait_ready.assert_called_once_with(trace, ready, trace.start_time + 5)
+        app._wait_process.assert_not_called()
+        app._launch_concurrent_script.assert_called_once()
+
+    @patch.object(executor.time, 'monotonic')
+    def test_wait_ready(self, mock_time):
+        mock_time.return_value = 10.0
+        trace = MagicMock()
+        probe = MagicMock(interval=0.5, timeout=5.0)
+        probe.is_ready.side_effect = [False, True]
+
+        app = executor.Executor(Path('/'))
+        app._wait_process = MagicMock(return_value=(True, 0))
+        assert app._wait_ready(trace, probe, 100.0) == (True, 0)
+        assert app._wait_process.call_args_list == [
+            call(trace.process, 10.5),
+            call(trace.process, 10.5),
+        ]
+
+    @patch.object(executor.time, 'monotonic')
+    def test_wait_ready_exited(self, mock_time):
+        mock_time.return_value = 10.0
+        trace = MagicMock()
+        probe = MagicMock(interval=0.5, timeout=5.0)
+
+        app = executor.Executor(Path('/'))
+        app._wait_process = MagicMock(return_value=(False, 100))
+        assert app._wait_ready(trace, probe, 100.0) == (False, 100)
+        probe.is_ready.assert_not_called()
+
+    @patch.object(executor.time, 'monotonic')
+    def test_wait_ready_timeout(self, mock_time):
+        mock_time.side_effect = [10.0, 10.0, 10.5, 10.5, 11.0]
+        trace = MagicMock()
+        probe = MagicMock(interval=0.5, timeout=1.0)
+        probe.is_ready.return_value = False
+
+        app = executor.Executor(Path('/'))
+        app._wait_process = MagicMock(return_value=(True, 0))
+        assert app._wait_ready(trace, probe, 100.0) == (True, 0)
+        assert app._wait_process.call_args_list == [
+            call(trace.process, 10.5),
+            call(trace.process, 11.0),
+        ]
+
+    def test_restore_cached_trace(self):
+        trace = MagicMock(debloater_engine='__original__', cache_key='')
+        trace.context.template.network_namespace = False
+        app = executor.Executor(Path('/'))
+        app.trace_cache = MagicMock()
+        app.trace_cache.restore.return_value = True
+        cwd = MagicMock()
+
+        assert app._restore_cached_trace(MagicMock(), trace, cwd) is True
+        assert trace.cache_key is app.trace_cache.key.return_value
+        app.trace_cache.restore.assert_called_once_with(trace, trace.cache_key)
+
+    def test_restore_cached_trace_debloated(self):
+        trace = MagicMock(debloater_engine='binrec', cache_key='')
+        app = executor.Executor(Path('/'))
+        app.trace_cache = MagicMock()
+
+        assert app._restore_cached_trace(MagicMock(), trace, MagicMock()) is False
+        app.trace_cache.key.assert_not_called()
+        assert trace.cache_key == ''
+
+    def test_restore_cached_trace_golden(self):
+        trace = MagicMock(debloater_engine='__original__', cache_key='')
+        app = executor.Executor(Path('/'))
+        app.trace_cache = MagicMock()
+        app.golden = MagicMock()
+        app.golden.restore.return_value = True
+
+        assert app._restore_cached_trace(MagicMock(), trace, MagicMock()) is True
+        app.golden.restore.assert_called_once_with(trace)
+        app.trace_cache.restore.assert_not_called()
+
+    def test_restore_cached_trace_golden_missing(self):
+        trace = MagicMock(debloater_engine='__original__', cache_key='')
+        app = executor.Executor(Path('/'))
+        app.golden = MagicMock()
+        app.golden.restore.return_value = False
+
+        with pytest.raises(ValueError):
+            app._restore_cached_trace(MagicMock(), trace, MagicMock())
+
+    @patch.object(executor.subprocess, 'Popen')
+    def test_run_trace_cached(self, mock_popen):
+        trace = MagicMock(arguments='hello world', network_namespace=None)
+        trace.context.template.network_namespace = False
+        app = executor.Executor(Path('/'))
+        app.create_stdin_file = MagicMock()
+        app.write_hook_scripts = MagicMock()
+        app._setup_trace = MagicMock()
+        app._restore_cached_trace = MagicMock(return_value=True)
+        app._cleanup_trace = MagicMock()
+
+        app.run_trace(MagicMock(link_filename=''), trace)
+
+        mock_popen.assert_not_called()
+        app._setup_trace.assert_not_called()
+        app._cleanup_trace.assert_called_once()
+
+    def test_run_trace_error_cleanup(self):
+        trace = MagicMock()
+        app = executor.Executor(Path('/'))
+        app._prepare_trace = MagicMock(return_value=([], MagicMock(), MagicMock()))
+        app._restore_cached_trace = MagicMock(return_value=False)
+        app._start_packet_capture = MagicMock()
+        app._setup_trace = MagicMock()
+        app._launch_trace = MagicMock()
+        app._monitor_trace = MagicMock(side_effect=OSError('monitor failed'))
+        app._teardown_trace = MagicMock()
+        app._cleanup_trace = MagicMock()
+
+        with pytest.raises(OSError):
+            app.run_trace(MagicMock(), trace)
+
+        app._teardown_trace.assert_not_called()
+        app._start_packet_capture.return_value.stop.assert_called_once()
+        app._cleanup_trace.assert_called_once_with(trace, app._prepare_trace.return_value[1], True)
+
+    def test_run_trace_prepare_error_cleanup(self):
+        trace = MagicMock()
+        app = executor.Executor(Path('/'))
+        app._prepare_trace = MagicMock(side_effect=OSError('prepare failed'))
+        app._cleanup_trace = MagicMock()
+
+        with pytest.raises(OSError):
+            app.run_trace(MagicMock(), trace)
+
+        app._cleanup_trace.assert_called_once_with(trace, None, True)
+
+    def test_cleanup_trace(self):
+        trace = MagicMock()
+        app = executor.Executor(Path('/'))
+        app.port_allocator = MagicMock()
+        app._cleanup_trace(trace, None, True)
+        trace.network_namespace.stop.assert_called_once()
+        app.port_allocator.release.assert_called_once_with(trace.ports)
@@ -0,0 +1,121 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from differ import executor
+
+
+class TestExecutorWorkQueue:
+    @patch.object(executor.time, 'sleep')
+    @patch.object(executor, 'RunJournal')
+    def test_run_coordinator(self, mock_journal_cls, mock_sleep):
+        template = MagicMock()
+        contexts = [MagicMock(), MagicMock()]
+        project = MagicMock(templates=[template], debloaters={'x': MagicMock()})
+        project.directory.exists.return_value = False
+        tasks = [MagicMock(context_id='t-001', errors=1), MagicMock(context_id='t-002', errors=0)]
+        queue = MagicMock()
+        queue.unfinished_count.side_effect = [1, 0]
+        queue.collect.side_effect = [[tasks[0]], [tasks[1]]]
+        journal = mock_journal_cls.return_value
+        journal.completed = {}
+
+        app = executor.Executor(Path('/'))
+        app.generate_contexts = MagicMock(return_value=contexts)
+        app.collect_task = MagicMock(side_effect=lambda project, queue, task: task.errors)
+
+        assert app.run_coordinator(project, Path('project.yml'), queue) == 1
+        queue.publish.assert_called_once()
+        assert list(queue.publish.call_args.args[2]) == contexts
+        assert queue.acknowledge.call_count == 2
+        assert journal.record.call_count == 2
+        mock_sleep.assert_called_once()
+
+    @patch.object(executor, 'RunJournal')
+    def test_run_coordinator_collected(self, mock_journal_cls):
+        project = MagicMock(templates=[], debloaters={})
+        project.directory.exists.return_value = False
+        task = MagicMock(context_id='t-001')
+        queue = MagicMock()
+        queue.unfinished_count.return_value = 0
+        queue.collect.return_value = [task]
+        journal = mock_journal_cls.return_value
+        journal.completed = {'t-001': 0}
+
+        app = executor.Executor(Path('/'))
+        app.collect_task = MagicMock()
+
+        assert app.run_coordinator(project, Path('project.yml'), queue) == 0
+        # the task was recorded by an interrupted coordinator
+        app.collect_task.assert_not_called()
+        journal.record.assert_not_called()
+        queue.acknowledge.assert_called_once_with(task)
+
+    def test_collect_task(self):
+        project = MagicMock()
+        queue = MagicMock()
+        task = MagicMock(state='done', context_id='t-001', errors=2)
+
+        app = executor.Executor(Path('/'))
+        app.remove_context = MagicMock()
+
+        assert app.collect_task(project, queue, task) == 2
+        app.remove_context.assert_called_once_with(project, 't-001')
+        queue.extract_artifact.assert_called_once_with(task, project)
+
+    def test_collect_task_failed(self):
+        queue = MagicMock()
+        task = MagicMock(state='failed', errors=1)
+        app = executor.Executor(Path('/'))
+
+        assert app.collect_task(MagicMock(), queue, task) == 1
+        queue.extract_artifact.assert_not_called()
+
+    @patch.object(executor.Project, 'load')
+    def test_run_worker(self, mock_load):
+        tasks = [MagicMock(project_filename='a.yml'), MagicMock(project_filename='a.yml')]
+        queue = MagicMock()
+        queue.claim.side_effect = [tasks[0], tasks[1], None]
+        queue.unfinished_count.return_value = 0
+
+        app = executor.Executor(Path('/'))
+        app.run_task = MagicMock()
+
+        assert app.run_worker(queue, 'worker-1') == 2
+        mock_load.assert_called_once_with(app.root, 'a.yml')
+        queue.claim.assert_called_with('worker-1')
+        assert app.run_task.call_count == 2
+
+    def test_run_task(self):
+        queue = MagicMock(lease_seconds=300.0)
+        task = MagicMock()
+        project = MagicMock()
+
+        app = executor.Executor(Path('/'))
+        app.run_context = MagicMock(return_value=1)
+        app.remove_context = MagicMock()
+
+        app.run_task(queue, task, project)
+        context = task.create_context.return_value
+        app.run_context.assert_called_once_with(project, context)
+        queue.create_artifact.assert_called_once_with(task, project)
+        queue.complete.assert_called_once_with(task, 1, queue.create_artifact.return_value)
+        assert app.remove_context.call_count == 2
+
+    def test_run_task_error(self):
+        queue = MagicMock(lease_seconds=300.0)
+        task = MagicMock()
+
+        app = executor.Executor(Path('/'))
+        app.run_context = MagicMock(side_effect=OSError())
+        app.remove_context = MagicMock()
+
+        app.run_task(queue, task, MagicMock())
+        queue.release.assert_called_once_with(task)
+        queue.complete.assert_not_called()
+
+    def test_renew_lease(self):
+        queue = MagicMock(lease_seconds=0.003)
+        queue.renew.return_value = False
+        app = executor.Executor(Path('/'))
+        app._renew_lease(queue, MagicMock(), executor.threading.Event())
+        queue.renew.assert_called_once()
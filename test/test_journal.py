@@ -0,0 +1,35 @@
+from differ.journal import RunJournal
+
+
+class TestRunJournal:
+    def test_record_load(self, tmp_path):
+        filename = tmp_path / RunJournal.FILENAME
+        journal = RunJournal(filename)
+        journal.start(1234)
+        journal.record('test-001', 0)
+        journal.record('test-002', 2)
+
+        assert filename.read_text() == (
+            '{seed: 1234}\n{context: test-001, errors: 0}\n{context: test-002, errors: 2}\n'
+        )
+
+        loaded = RunJournal.load(filename)
+        assert loaded.seed == 1234
+        assert loaded.completed == {'test-001': 0, 'test-002': 2}
+
+    def test_load_partial_line(self, tmp_path):
+        filename = tmp_path / RunJournal.FILENAME
+        filename.write_text('{seed: 1234}\n{context: test-001, errors: 0}\n{context: test-0')
+
+        journal = RunJournal.load(filename)
+        assert journal.seed == 1234
+        assert journal.completed == {'test-001': 0}
+
+        journal.record('test-002', 1)
+        assert RunJournal.load(filename).completed == {'test-001': 0, 'test-002': 1}
+
+    def test_load_unterminated_line(self, tmp_path):
+        filename = tmp_path / RunJournal.FILENAME
+        filename.write_text('{seed: 1234}\n{context: test-001, errors: 1')
+
+        assert RunJournal.load(filename).completed == {}
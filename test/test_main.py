@@ -1,30 +1,168 @@
 from pathlib import Path
 from unittest.mock import patch
 
-from differ.__main__ import main
+import pytest
+
+from differ.__main__ import main, print_batch_summary
 
 
 class TestMain:
-    @patch('argparse.ArgumentParser')
     @patch('differ.executor.Executor')
     @patch('differ.core.Project')
-    def test_main(self, mock_project_cls, mock_executor_cls, mock_parser_cls):
-        parser = mock_parser_cls.return_value
-        args = parser.parse_args.return_value
-        args.report_dir = '/asdf'
+    def test_main(self, mock_project_cls, mock_executor_cls):
         project = mock_project_cls.load.return_value
         app = mock_executor_cls.return_value
         app.run_project.return_value = 10
 
-        assert main() is app.run_project.return_value
+        argv = ['-r', '/asdf', '-j', '4', '--seed', '10', '--cache', '/cache', 'project.yml']
+        assert main(argv) is app.run_project.return_value
 
         mock_executor_cls.assert_called_once_with(
-            Path(args.report_dir),
-            report_successes=args.report_successes,
-            max_permutations=args.max_permutations,
-            verbose=args.verbose,
-            overwrite_existing_report=args.force,
+            Path('/asdf'),
+            report_successes=False,
+            max_permutations=100,
+            verbose=False,
+            overwrite_existing_report=False,
+            jobs=4,
+            parallel_debloaters=False,
+            network_namespace=False,
+            resume=False,
+            seed=10,
+            cache_dir=Path('/cache'),
+            golden=None,
+            max_errors_per_template=0,
+            max_errors_per_debloater=0,
+            fail_fast=False,
+            time_budget=0.0,
+            template_time_budget=0.0,
+            dedupe='template',
+            workspace=None,
+            workspace_max_size=1024 * 1024 * 1024,
+            keep='all',
+            keep_runs=1,
+            max_disk_usage=0,
+            archive_artifacts=False,
         )
         app.setup.assert_called_once()
-        mock_project_cls.load.assert_called_once_with(app.root, args.project_filename)
+        mock_project_cls.load.assert_called_once_with(app.root, 'project.yml')
         app.run_project.assert_called_once_with(project)
+
+    @patch('differ.executor.Executor')
+    @patch('differ.core.Project')
+    def test_main_run_golden(self, mock_project_cls, mock_executor_cls):
+        app = mock_executor_cls.return_value
+        app.run_project.return_value = 0
+
+        assert main(['run', '--golden', '/golden.tar.gz', 'project.yml']) == 0
+
+        kwargs = mock_executor_cls.call_args.kwargs
+        assert kwargs['golden'] == Path('/golden.tar.gz')
+        assert kwargs['cache_dir'] is None
+        app.run_project.assert_called_once_with(mock_project_cls.load.return_value)
+
+    @patch('differ.executor.Executor')
+    @patch('differ.core.Project')
+    def test_main_workspace_tmpfs(self, mock_project_cls, mock_executor_cls):
+        app = mock_executor_cls.return_value
+        app.run_project.return_value = 0
+
+        argv = ['--workspace', 'tmpfs', '--workspace-max-size', '16', 'project.yml']
+        assert main(argv) == 0
+        kwargs = mock_executor_cls.call_args.kwargs
+        assert kwargs['workspace'] == Path('/dev/shm')
+        assert kwargs['workspace_max_size'] == 16 * 1024 * 1024
+
+    @patch('differ.executor.Executor')
+    @patch('differ.core.Project')
+    def test_main_retention(self, mock_project_cls, mock_executor_cls):
+        mock_executor_cls.return_value.run_project.return_value = 0
+
+        argv = ['--keep', 'failures', '--keep-runs', '3', '--max-disk-usage', '2', 'project.yml']
+        assert main(argv) == 0
+        kwargs = mock_executor_cls.call_args.kwargs
+        assert kwargs['keep'] == 'failures'
+        assert kwargs['keep_runs'] == 3
+        assert kwargs['max_disk_usage'] == 2 * 1024 * 1024
+
+    @patch('differ.async_executor.AsyncExecutor')
+    @patch('differ.core.Project')
+    def test_main_async(self, mock_project_cls, mock_executor_cls):
+        app = mock_executor_cls.return_value
+        app.run_project.return_value = 0
+
+        assert main(['--async', 'project.yml']) == 0
+        mock_executor_cls.assert_called_once()
+        app.run_project.assert_called_once_with(mock_project_cls.load.return_value)
+
+    @patch('differ.executor.Executor')
+    @patch('differ.core.Project')
+    def test_main_snapshot_record(self, mock_project_cls, mock_executor_cls):
+        project = mock_project_cls.load.return_value
+        app = mock_executor_cls.return_value
+        app.record_snapshot.return_value = 2
+
+        argv = ['snapshot', 'record', '-o', '/golden.tar.gz', '--seed', '5', 'project.yml']
+        assert main(argv) == 2
+
+        mock_executor_cls.assert_called_once_with(
+            Path('./reports'),
+            max_permutations=100,
+            verbose=False,
+            overwrite_existing_report=False,
+            network_namespace=False,
+            seed=5,
+            cache_dir=None,
+        )
+        app.setup.assert_called_once()
+        app.record_snapshot.assert_called_once_with(project, Path('/golden.tar.gz'))
+        app.run_project.assert_not_called()
+
+    def test_main_snapshot_record_output_required(self):
+        with pytest.raises(SystemExit):
+            main(['snapshot', 'record', 'project.yml'])
+
+    @patch('differ.__main__.print_batch_summary')
+    @patch('differ.util.discover_projects')
+    @patch('differ.executor.Executor')
+    def test_main_batch(self, mock_executor_cls, mock_discover, mock_print_summary):
+        app = mock_executor_cls.return_value
+        app.run_batch.return_value = {'a': (10, 1, 0), 'b': (4, 2, 3)}
+
+        assert main(['batch', '-j', '8', '/samples']) == 3
+        mock_discover.assert_called_once_with(Path('/samples'), app.root)
+        app.run_batch.assert_called_once_with(mock_discover.return_value)
+        mock_print_summary.assert_called_once_with(app.run_batch.return_value)
+        assert mock_executor_cls.call_args.kwargs['jobs'] == 8
+
+    def test_print_batch_summary(self, capsys):
+        print_batch_summary({'coreutils_echo': (10, 1, 3), 'lighttpd': (4, 0, 0)})
+        assert capsys.readouterr().out.splitlines() == [
+            'project           traces    errors   skipped',
+            'coreutils_echo        10         1         3',
+            'lighttpd               4         0         0',
+            'total                 14         1         3',
+        ]
+
+    @patch('differ.workqueue.WorkQueue')
+    @patch('differ.executor.Executor')
+    @patch('differ.core.Project')
+    def test_main_run_queue(self, mock_project_cls, mock_executor_cls, mock_queue_cls):
+        app = mock_executor_cls.return_value
+        app.run_coordinator.return_value = 1
+
+        assert main(['run', '--queue', '/queue.db', 'project.yml']) == 1
+        mock_queue_cls.assert_called_once_with(Path('/queue.db'))
+        app.run_coordinator.assert_called_once_with(
+            mock_project_cls.load.return_value, Path('project.yml'), mock_queue_cls.return_value
+        )
+        app.run_project.assert_not_called()
+
+    @patch('differ.workqueue.WorkQueue')
+    @patch('differ.executor.Executor')
+    def test_main_worker(self, mock_executor_cls, mock_queue_cls):
+        app = mock_executor_cls.return_value
+
+        argv = ['worker', '--queue', '/queue.db', '--lease', '60', '--worker-id', 'w1']
+        assert main(argv) == 0
+        mock_queue_cls.assert_called_once_with(Path('/queue.db'), lease_seconds=60.0)
+        app.run_worker.assert_called_once_with(mock_queue_cls.return_value, 'w1')
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from differ import namespace
+
+
+class TestNetworkNamespace:
+    @patch.object(namespace.subprocess, 'Popen')
+    def test_start(self, mock_popen):
+        proc = mock_popen.return_value
+        proc.pid = 100
+        proc.stdout.readline.return_value = b'ready\n'
+
+        ns = namespace.NetworkNamespace()
+        ns.start()
+
+        assert ns.process is proc
+        assert ns.pid == 100
+        mock_popen.assert_called_once_with(
+            namespace.NAMESPACE_HOLDER_COMMAND,
+            stdin=namespace.subprocess.DEVNULL,
+            stdout=namespace.subprocess.PIPE,
+            stderr=namespace.subprocess.PIPE,
+        )
+
+    @patch.object(namespace.subprocess, 'Popen')
+    def test_start_error(self, mock_popen):
+        proc = mock_popen.return_value
+        proc.stdout.readline.return_value = b''
+        proc.communicate.return_value = (b'', b'unshare: operation not permitted\n')
+
+        ns = namespace.NetworkNamespace()
+        with pytest.raises(OSError):
+            ns.start()
+
+        assert ns.process is None
+
+    def test_wrap(self):
+        ns = namespace.NetworkNamespace()
+        ns.process = MagicMock(pid=100)
+        assert ns.wrap(['./binary', '-v']) == [
+            'nsenter',
+            '--target=100',
+            '--user',
+            '--net',
+            '--preserve-credentials',
+            '--',
+            './binary',
+            '-v',
+        ]
+
+    def test_stop(self):
+        ns = namespace.NetworkNamespace()
+        proc = ns.process = MagicMock()
+        ns.stop()
+        proc.terminate.assert_called_once()
+        proc.communicate.assert_called_once()
+        assert ns.process is None
+
+    def test_stop_not_running(self):
+        ns = namespace.NetworkNamespace()
+        ns.stop()
+        assert ns.process is None
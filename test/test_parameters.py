@@ -1,15 +1,48 @@
+from itertools import combinations, product
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from differ.parameters import CombinationParameterGenerator, ParameterIterator
+from differ.parameters import (
+    CombinationParameterGenerator,
+    CoveringArrayParameterGenerator,
+    PairwiseParameterGenerator,
+    ParameterIterator,
+    RandomParameterGenerator,
+    create_generator,
+    generate_variable_values,
+)
+
+
+def make_variable(name: str, items: list) -> MagicMock:
+    variable = MagicMock(reiterable=False)
+    variable.name = name
+    variable.generate_values.return_value = iter(items)
+    variable.indexed_values.return_value = None
+    return variable
+
+
+def make_template(variables: dict, **config) -> MagicMock:
+    template = MagicMock(generator_config=config)
+    values = []
+    for name, items in variables.items():
+        values.append(make_variable(name, items))
+    template.variables.values.return_value = values
+    return template
+
+
+def covered(rows: list[dict], variables: dict, strength: int) -> bool:
+    for names in combinations(variables, strength):
+        expected = set(product(*(variables[name] for name in names)))
+        if not expected <= {tuple(row[name] for name in names) for row in rows}:
+            return False
+    return True
 
 
 class TestParameterIterator:
     def test_advance(self):
         template = MagicMock()
-        variable = MagicMock()
-        variable.generate_values.return_value = iter([1, 2])
+        variable = make_variable('x', [1, 2])
 
         it = ParameterIterator(template, variable)
         assert it.value == 1
@@ -23,16 +56,50 @@ class TestParameterIterator:
 
         variable.generate_values.assert_called_once_with(template)
 
+    def test_advance_indexed(self):
+        template = MagicMock()
+        variable = make_variable('x', [])
+        variable.indexed_values.return_value = range(1, 3)
+
+        it = ParameterIterator(template, variable)
+        assert [it.value, it.advance(), it.value, it.advance(), it.value] == [1, False, 2, True, 1]
+        assert it._cache is None
+        variable.generate_values.assert_not_called()
+
+    def test_advance_indexed_empty(self):
+        variable = make_variable('x', [])
+        variable.indexed_values.return_value = []
+        with pytest.raises(ValueError):
+            ParameterIterator(MagicMock(), variable)
+
+    def test_advance_reiterable(self):
+        template = MagicMock()
+        variable = make_variable('x', [])
+        variable.reiterable = True
+        variable.generate_values.side_effect = lambda template: iter([1, 2])
+
+        it = ParameterIterator(template, variable)
+        assert [it.value, it.advance(), it.value, it.advance(), it.value] == [1, False, 2, True, 1]
+        assert not it.advance()
+        assert it.value == 2
+        assert it._cache is None
+        assert variable.generate_values.call_count == 2
+
+
+class TestGenerateVariableValues:
+    def test_generate_variable_values(self):
+        template = make_template({'x': [1, 2], 'y': []})
+        indexed = template.variables.values.return_value[1]
+        indexed.indexed_values.return_value = range(3)
+        assert generate_variable_values(template) == {'x': [1, 2], 'y': range(3)}
+        indexed.generate_values.assert_not_called()
+
 
 class TestCombinationParameterGenerator:
     def test_generate(self):
-        var1 = MagicMock()
-        var1.name = 'int'
-        var1.generate_values.return_value = iter([1, 2])
+        var1 = make_variable('int', [1, 2])
 
-        var2 = MagicMock()
-        var2.name = 'str'
-        var2.generate_values.return_value = iter(['a', 'b', 'c'])
+        var2 = make_variable('str', ['a', 'b', 'c'])
 
         template = MagicMock()
         template.variables.values.return_value = [var1, var2]
@@ -51,13 +118,9 @@ class TestCombinationParameterGenerator:
             next(it)
 
     def test_generate_list(self):
-        var1 = MagicMock()
-        var1.name = 'int'
-        var1.generate_values.return_value = iter([1, 2])
+        var1 = make_variable('int', [1, 2])
 
-        var2 = MagicMock()
-        var2.name = 'str'
-        var2.generate_values.return_value = iter(['a', 'b', 'c'])
+        var2 = make_variable('str', ['a', 'b', 'c'])
 
         template = MagicMock()
         template.variables.values.return_value = [var1, var2]
@@ -71,3 +134,90 @@ class TestCombinationParameterGenerator:
             {'int': 2, 'str': 'b'},
             {'int': 2, 'str': 'c'},
         ]
+
+
+class TestCoveringArrayParameterGenerator:
+    def test_pairwise(self):
+        variables = {'x': ['a', 'b'], 'y': [1, 2], 'z': [True, False]}
+        gen = PairwiseParameterGenerator(make_template(variables))
+        assert list(gen.generate()) == [
+            {'x': 'a', 'y': 1, 'z': True},
+            {'x': 'a', 'y': 2, 'z': False},
+            {'x': 'b', 'y': 1, 'z': False},
+            {'x': 'b', 'y': 2, 'z': True},
+        ]
+
+    def test_pairwise_coverage(self):
+        variables = {name: list(range(4)) for name in 'abcdefgh'}
+        rows = list(PairwiseParameterGenerator(make_template(variables)).generate())
+        assert covered(rows, variables, 2)
+        # the full cartesian product is 65536 combinations
+        assert len(rows) < 40
+
+    def test_t_way(self):
+        variables = {name: [0, 1, 2] for name in 'abcde'}
+        gen = CoveringArrayParameterGenerator(make_template(variables, strength=3))
+        rows = list(gen.generate())
+        assert covered(rows, variables, 3)
+        assert len(rows) < 3**5
+
+    def test_strength_greater_than_variables(self):
+        variables = {'x': [1, 2], 'y': ['a', 'b']}
+        gen = CoveringArrayParameterGenerator(make_template(variables, strength=3))
+        assert len(list(gen.generate())) == 4
+
+    def test_no_variables(self):
+        gen = CoveringArrayParameterGenerator(make_template({}))
+        assert list(gen.generate()) == [{}]
+
+    def test_invalid_strength(self):
+        with pytest.raises(ValueError):
+            CoveringArrayParameterGenerator(make_template({}, strength=0))
+
+    def test_empty_variable(self):
+        with pytest.raises(ValueError):
+            CoveringArrayParameterGenerator(make_template({'x': []}))
+
+
+class TestRandomParameterGenerator:
+    def test_decode(self):
+        variables = {'x': [1, 2], 'y': ['a', 'b', 'c']}
+        gen = RandomParameterGenerator(make_template(variables))
+        assert gen.size == 6
+        combination = CombinationParameterGenerator(make_template(variables))
+        assert [gen.decode(index) for index in range(6)] == list(combination.generate())
+
+    def test_generate_distinct(self):
+        variables = {'x': [1, 2, 3], 'y': ['a', 'b'], 'z': [True, False]}
+        rows = list(RandomParameterGenerator(make_template(variables, seed=10)).generate())
+        assert len(rows) == 12
+        assert len({tuple(row.values()) for row in rows}) == 12
+
+    def test_generate_seed(self):
+        variables = {name: list(range(10)) for name in 'abcdefghij'}
+        first = RandomParameterGenerator(make_template(variables, seed=10)).generate()
+        second = RandomParameterGenerator(make_template(variables, seed=10)).generate()
+        # the space has 10**10 combinations and is not enumerated
+        assert [next(first) for _ in range(5)] == [next(second) for _ in range(5)]
+
+    @patch('differ.parameters.random.randrange')
+    def test_generate_global_random(self, mock_randrange):
+        mock_randrange.side_effect = lambda start, stop: stop - 1
+        gen = RandomParameterGenerator(make_template({'x': [1, 2, 3]}))
+        assert list(gen.generate()) == [{'x': 3}, {'x': 1}, {'x': 2}]
+
+    def test_no_variables(self):
+        assert list(RandomParameterGenerator(make_template({})).generate()) == [{}]
+
+
+class TestCreateGenerator:
+    def test_create_generator(self):
+        template = make_template({'x': [1]})
+        template.generator = 'pairwise'
+        assert isinstance(create_generator(template), PairwiseParameterGenerator)
+
+    def test_create_generator_invalid(self):
+        template = make_template({})
+        template.generator = 'invalid'
+        with pytest.raises(ValueError):
+            create_generator(template)
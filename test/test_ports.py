@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from differ import ports
+
+
+def run_forked(target) -> int:
+    """
+    Run a function within a forked child process and return its exit status.
+    """
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        code = 1
+        try:
+            code = target()
+        finally:
+            os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+def make_allocator(tmp_path: Path) -> ports.PortAllocator:
+    return ports.PortAllocator(tmp_path / 'ports.lock')
+
+
+class TestPortAllocator:
+    def test_allocate(self, tmp_path):
+        allocator = make_allocator(tmp_path)
+        tcp = allocator.allocate('tcp')
+        udp = allocator.allocate('udp')
+        assert 0 < tcp < 65536
+        assert 0 < udp < 65536
+        assert allocator._reserved == {tcp, udp}
+
+    @patch.object(ports.socket, 'socket')
+    def test_allocate_skip_reserved(self, mock_socket, tmp_path):
+        sock = mock_socket.return_value.__enter__.return_value
+        sock.getsockname.side_effect = [('0.0.0.0', 8000), ('0.0.0.0', 8001)]
+        allocator = make_allocator(tmp_path)
+        allocator._reserved.add(8000)
+
+        assert allocator.allocate('tcp') == 8001
+        assert allocator._reserved == {8000, 8001}
+
+    def test_allocate_ports_release(self, tmp_path):
+        allocator = make_allocator(tmp_path)
+        allocator.allocate = MagicMock(side_effect=[1000, 2000])
+
+        allocated = allocator.allocate_ports({'http': 'tcp', 'dns': 'udp'})
+        assert allocated == {'http': 1000, 'dns': 2000}
+
+        allocator._reserved.update({1000, 2000, 3000})
+        allocator.release(allocated)
+        assert allocator._reserved == {3000}
+
+    def test_reserve_other_process(self, tmp_path):
+        allocator = make_allocator(tmp_path)
+        assert allocator.reserve(8000)
+        assert not allocator.reserve(8000)
+        assert run_forked(lambda: int(make_allocator(tmp_path).reserve(8000))) == 0
+
+        allocator.release({'http': 8000})
+        assert run_forked(lambda: int(make_allocator(tmp_path).reserve(8000))) == 1
+
+    def test_reserve_no_lock_file(self, tmp_path):
+        allocator = ports.PortAllocator(tmp_path / 'missing' / 'ports.lock')
+        assert allocator.reserve(8000)
+        assert not allocator.reserve(8000)
+        allocator.release({'http': 8000})
+        assert allocator._reserved == set()
+
+    def test_allocate_forked(self, tmp_path):
+        read_fd, write_fd = os.pipe()
+        ready_fd, start_fd = os.pipe()
+
+        def allocate() -> int:
+            allocator = make_allocator(tmp_path)
+            allocated = [allocator.allocate('tcp') for _ in range(20)]
+            os.write(write_fd, ' '.join(str(port) for port in allocated).encode() + b'\n')
+            # hold the reservations until both processes have allocated
+            os.read(ready_fd, 1)
+            return 0
+
+        pids = []
+        for _ in range(2):
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                os._exit(allocate())
+            pids.append(pid)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as file:
+            lines = [file.readline().split() for _ in pids]
+        os.write(start_fd, b'xx')
+        for pid in pids:
+            assert os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0
+
+        os.close(ready_fd)
+        os.close(start_fd)
+        assert len(set(lines[0]) | set(lines[1])) == 40
+
+
+class TestIsPortListening:
+    def test_listening(self):
+        with ports.socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+            assert not ports.is_port_listening(os.getpid(), port)
+            sock.listen()
+            assert ports.is_port_listening(os.getpid(), port)
+
+    def test_no_process(self):
+        with patch.object(ports.Path, 'read_text', side_effect=FileNotFoundError):
+            assert not ports.is_port_listening(1234, 8080)
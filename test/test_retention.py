@@ -0,0 +1,105 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from differ import retention
+from differ.core import Project
+from differ.retention import KEEP_FAILURES, RetentionPolicy
+
+
+def make_project(tmp_path: Path) -> Project:
+    project = Project('test', tmp_path / 'test', Path('/bin/true'))
+    project.directory.mkdir()
+    return project
+
+
+def make_context(project: Project, context_id: str, size: int = 0) -> Path:
+    context_dir = project.directory / f'trace-{context_id}'
+    (context_dir / '__original__').mkdir(parents=True)
+    (context_dir / '__original__' / '__differ-stdout.bin').write_bytes(b'x' * size)
+    return context_dir
+
+
+class TestRetention:
+    def test_remove_tree(self, tmp_path):
+        path = tmp_path / 'test'
+        (path / 'sub').mkdir(parents=True)
+        (path / 'sub' / 'file').touch()
+
+        thread = retention.remove_tree(path)
+        assert not path.exists()
+        thread.join()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_invalid_keep(self):
+        with pytest.raises(ValueError):
+            RetentionPolicy('asdf')
+
+    @patch.object(retention, 'remove_tree')
+    def test_remove_previous_run_overwrite(self, mock_remove_tree, tmp_path):
+        project = make_project(tmp_path)
+        RetentionPolicy().remove_previous_run(project, True)
+        mock_remove_tree.assert_called_once_with(project.directory)
+
+    def test_remove_previous_run_exists(self, tmp_path):
+        project = make_project(tmp_path)
+        with pytest.raises(FileExistsError):
+            RetentionPolicy().remove_previous_run(project, False)
+
+    @patch.object(retention, 'remove_tree')
+    def test_remove_previous_run_keep_runs(self, mock_remove_tree, tmp_path):
+        project = make_project(tmp_path)
+        old = [
+            tmp_path / 'test.run-20200101-000000-000000',
+            tmp_path / 'test.run-20210101-000000-000000',
+        ]
+        for path in old:
+            path.mkdir()
+
+        app = RetentionPolicy(keep_runs=3)
+        app.remove_previous_run(project, False)
+        assert not project.directory.exists()
+        previous = app.previous_runs(project)
+        assert len(previous) == 3
+        assert previous[:2] == old
+        mock_remove_tree.assert_called_once_with(old[0])
+
+    def test_context_finished_keep_all(self, tmp_path):
+        project = make_project(tmp_path)
+        context_dir = make_context(project, '001-001')
+        app = RetentionPolicy()
+        app.context_finished(project, '001-001', 0)
+        assert context_dir.exists()
+
+    def test_context_finished_keep_failures(self, tmp_path):
+        project = make_project(tmp_path)
+        passed = make_context(project, '001-001')
+        failed = make_context(project, '001-002')
+        app = RetentionPolicy(KEEP_FAILURES)
+        app.context_finished(project, '001-001', 0)
+        app.context_finished(project, '001-002', 1)
+        app.context_finished(project, '001-003', 0)
+        assert not passed.exists()
+        assert failed.exists()
+        assert app.pruned == {'test': 1}
+
+    def test_context_finished_max_disk_usage(self, tmp_path):
+        project = make_project(tmp_path)
+        app = RetentionPolicy(max_disk_usage=16384)
+        app.start_project(project)
+        usage = app.disk_usage['test']
+        first = make_context(project, '001-001', 8192)
+        second = make_context(project, '001-002', 8192)
+        failed = make_context(project, '001-003', 8192)
+
+        app.context_finished(project, '001-001', 0)
+        assert first.exists()
+        assert app.disk_usage['test'] > usage
+
+        app.context_finished(project, '001-002', 0)
+        assert not second.exists()
+
+        app.context_finished(project, '001-003', 1)
+        assert failed.exists()
+        assert app.disk_usage['test'] > 16384
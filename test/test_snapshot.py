@@ -0,0 +1,73 @@
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from differ import snapshot
+from differ.core import TraceContext, TraceTemplate
+
+
+def make_trace(tmp_path: Path, template: TraceTemplate, context_id: str) -> MagicMock:
+    binary = tmp_path / 'binary'
+    binary.write_bytes(b'\x7fELF')
+    cwd = tmp_path / 'trace'
+    cwd.mkdir()
+    (cwd / 'binary').symlink_to(binary)
+    context = TraceContext(template, {'x': 1}, id=context_id)
+    trace = MagicMock(binary=cwd / 'binary', cwd=cwd, context=context)
+    trace.process = subprocess.CompletedProcess(['./binary'], 0)
+    trace.process_status = 0
+    trace.timed_out = False
+    trace.setup_script = None
+    trace.teardown_script = None
+    trace.concurrent_script = None
+    return trace
+
+
+class TestGoldenSnapshot:
+    def test_save_load(self, tmp_path):
+        original = tmp_path / 'original'
+        original.write_bytes(b'\x7fELF')
+        project = MagicMock(original=original)
+        project.name = 'test'
+        template = TraceTemplate(id='echo')
+        other = TraceTemplate(id='other')
+
+        golden = snapshot.GoldenSnapshot.create(tmp_path / 'record', project)
+        (tmp_path / 'recorded').mkdir()
+        trace = make_trace(tmp_path / 'recorded', template, 'echo-001')
+        (trace.cwd / 'stdout.bin').write_bytes(b'hello')
+        golden.add(trace)
+        golden.save(tmp_path / 'golden.tar.gz', seed=10)
+
+        loaded = snapshot.GoldenSnapshot.load(tmp_path / 'golden.tar.gz', tmp_path / 'extract')
+        assert loaded.project_name == 'test'
+        assert loaded.original_digest == golden.original_digest
+        assert [(item.id, item.values) for item in loaded.generate_contexts(template)] == [
+            ('echo-001', {'x': 1})
+        ]
+        assert loaded.generate_contexts(other) == []
+        loaded.check_project(project)
+
+        (tmp_path / 'restored').mkdir()
+        restored = make_trace(tmp_path / 'restored', template, 'echo-001')
+        assert loaded.restore(restored)
+        assert (restored.cwd / 'stdout.bin').read_bytes() == b'hello'
+        assert restored.process.returncode == 0
+        # the link to the original binary is not archived and the prepared link is kept
+        assert not list((tmp_path / 'extract').rglob('binary'))
+        assert (restored.cwd / 'binary').resolve() == tmp_path / 'restored' / 'binary'
+
+    def test_restore_missing(self, tmp_path):
+        golden = snapshot.GoldenSnapshot(tmp_path)
+        trace = MagicMock()
+        trace.context.id = 'echo-001'
+        assert not golden.restore(trace)
+
+    def test_check_project_name(self, tmp_path):
+        golden = snapshot.GoldenSnapshot(tmp_path, 'test')
+        project = MagicMock()
+        project.name = 'other'
+        with pytest.raises(ValueError):
+            golden.check_project(project)
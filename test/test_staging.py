@@ -0,0 +1,120 @@
+import errno
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from differ import staging
+from differ.core import InputFile, Project
+from differ.staging import InputStager
+
+
+def make_project(tmp_path: Path) -> Project:
+    project = Project('test', tmp_path / 'test', Path('/bin/true'))
+    project.directory.mkdir()
+    return project
+
+
+def make_source(tmp_path: Path) -> Path:
+    source = tmp_path / 'serve'
+    (source / 'sub').mkdir(parents=True)
+    (source / 'index.html').write_text('index')
+    (source / 'sub' / 'data.txt').write_text('data')
+    (source / 'sub' / 'data.txt').chmod(0o444)
+    os.utime(source / 'index.html', ns=(1_000_000_000, 2_000_000_000))
+    return source
+
+
+def unsupported(*args):
+    raise OSError(errno.EOPNOTSUPP, 'not supported')
+
+
+class TestInputStager:
+    def test_stage_file(self, tmp_path):
+        project = make_project(tmp_path)
+        source = make_source(tmp_path) / 'index.html'
+        input_file = InputFile(source, mode='600', static=True)
+        stager = InputStager()
+
+        staged = stager.stage(project, input_file)
+        assert staged.parent == project.staging_directory()
+        assert staged.read_text() == 'index'
+        assert staged.stat().st_mode & 0o777 == 0o600
+        assert staged.stat().st_mtime_ns == 2_000_000_000
+
+        # the file is only staged once
+        source.write_text('changed')
+        assert stager.stage(project, input_file) == staged
+        assert staged.read_text() == 'index'
+
+        # a different mode is staged separately
+        assert stager.stage(project, InputFile(source, static=True)) != staged
+
+        stager.cleanup(project)
+        assert not project.staging_directory().exists()
+
+    @patch.object(staging.fcntl, 'ioctl', side_effect=unsupported)
+    def test_materialize_directory(self, mock_ioctl, tmp_path):
+        project = make_project(tmp_path)
+        input_file = InputFile(make_source(tmp_path), static=True)
+        stager = InputStager()
+
+        first = tmp_path / 'trace-1' / 'serve'
+        second = tmp_path / 'trace-2' / 'serve'
+        stager.materialize(project, input_file, first)
+        stager.materialize(project, input_file, second)
+
+        assert stager.reflink_supported is False
+        mock_ioctl.assert_called_once()
+        for destination in (first, second):
+            assert (destination / 'index.html').read_text() == 'index'
+            assert (destination / 'index.html').stat().st_mtime_ns == 2_000_000_000
+            assert (destination / 'sub' / 'data.txt').stat().st_mode & 0o777 == 0o444
+
+        # the read-only file is hard linked and the writable file is copied
+        assert (first / 'sub' / 'data.txt').stat().st_ino == (
+            second / 'sub' / 'data.txt'
+        ).stat().st_ino
+        assert (first / 'index.html').stat().st_ino != (second / 'index.html').stat().st_ino
+        assert stager.materialized == {'hardlink': 2, 'copy': 2}
+
+    @patch.object(staging.fcntl, 'ioctl', side_effect=unsupported)
+    def test_materialize_no_hardlink(self, mock_ioctl, tmp_path):
+        project = make_project(tmp_path)
+        input_file = InputFile(make_source(tmp_path), static=True)
+        stager = InputStager()
+
+        first = tmp_path / 'trace-1' / 'serve'
+        second = tmp_path / 'trace-2' / 'serve'
+        stager.materialize(project, input_file, first, hardlink=False)
+        stager.materialize(project, input_file, second, hardlink=False)
+
+        assert (first / 'sub' / 'data.txt').stat().st_ino != (
+            second / 'sub' / 'data.txt'
+        ).stat().st_ino
+        assert (first / 'sub' / 'data.txt').stat().st_mode & 0o777 == 0o444
+        assert stager.materialized == {'copy': 4}
+
+    @patch.object(staging.fcntl, 'ioctl')
+    def test_materialize_reflink(self, mock_ioctl, tmp_path):
+        project = make_project(tmp_path)
+        input_file = InputFile(make_source(tmp_path) / 'index.html', static=True)
+        stager = InputStager()
+
+        destination = tmp_path / 'trace-1' / 'index.html'
+        stager.materialize(project, input_file, destination)
+        mock_ioctl.assert_called_once()
+        assert mock_ioctl.call_args.args[1] == staging.FICLONE
+        assert stager.reflink_supported
+        assert stager.materialized == {'reflink': 1}
+        assert destination.stat().st_mtime_ns == 2_000_000_000
+
+    @patch.object(staging.fcntl, 'ioctl', side_effect=OSError(errno.EIO, 'io error'))
+    def test_materialize_reflink_error(self, mock_ioctl, tmp_path):
+        project = make_project(tmp_path)
+        input_file = InputFile(make_source(tmp_path) / 'index.html', static=True)
+        destination = tmp_path / 'index.html'
+        with pytest.raises(OSError):
+            InputStager().materialize(project, input_file, destination)
+        assert not destination.exists()
@@ -13,3 +13,18 @@ class TestQuoteFilter:
     def test_quote_filter_template(self):
         templ = template.JINJA_ENVIRONMENT.from_string('hello {{name | quote}}')
         assert templ.render(name='duke leto') == "hello 'duke leto'"
+
+
+class TestTraceIndependent:
+    def test_trace_independent(self):
+        templ = template.JINJA_ENVIRONMENT.from_string('{{x | quote}} {{env.HOME}}')
+        assert templ.trace_independent
+        assert template.is_trace_independent(templ)
+
+    def test_trace_dependent(self):
+        templ = template.JINJA_ENVIRONMENT.from_string('{% if x %}{{trace.cwd}}{% endif %}')
+        assert not templ.trace_independent
+        assert not template.is_trace_independent(templ)
+
+    def test_not_compiled(self):
+        assert not template.is_trace_independent(None)
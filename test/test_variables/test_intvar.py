@@ -21,3 +21,9 @@ class TestIntVariable:
         )
         assert list(var.generate_values(MagicMock())) == [1, 2, 3, 4, 5, 6, 7, 8]
         mock_sample.assert_called_once_with(range(1, 11), k=5)
+
+    def test_indexed_values(self):
+        var = IntVariable('int', {'values': [1, 2, 3]})
+        assert var.indexed_values(MagicMock()) == [1, 2, 3]
+        var = IntVariable('int', {'range': {'minimum': 1, 'maximum': 10, 'count': 5}})
+        assert var.indexed_values(MagicMock()) is None
@@ -32,9 +32,9 @@ class TestRadamsaVariable:
         mock_popen = mock_popen_cls.return_value
         mock_popen.communicate.return_value = b'hello\nworld\nworld\n\nasdf', b''
         ext = RadamsaVariable('var', CONFIG)
-        assert sorted(ext._generate_from_seed('foo', 10)) == ['asdf', 'hello', 'world']
+        assert sorted(ext._generate_from_seed('foo', 10, 1234)) == ['asdf', 'hello', 'world']
         mock_popen_cls.assert_called_once_with(
-            [str(mock_bin), '--count', '10'],
+            [str(mock_bin), '--seed', '1234', '--count', '10'],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -42,10 +42,23 @@ class TestRadamsaVariable:
         mock_popen.communicate.assert_called_once_with(b'foo\n')
 
     @patch('differ.variables.radamsa.RADAMSA_BIN_FILENAME')
-    def test_generate_values(self, mock_bin):
+    @patch('random.getrandbits', side_effect=[10, 20])
+    def test_generate_values(self, mock_getrandbits, mock_bin):
         mock_bin.is_file.return_value = True
         template = MagicMock()
         ext = RadamsaVariable('var', CONFIG)
         ext._generate_from_seed = MagicMock(side_effect=[['1', '2'], ['3', '4']])
         assert list(ext.generate_values(template)) == ['1', '2', '3', '4']
-        assert ext._generate_from_seed.call_args_list == [call('1', 2), call('2', 2)]
+        assert ext._generate_from_seed.call_args_list == [call('1', 2, 10), call('2', 2, 20)]
+
+    @patch('differ.variables.radamsa.RADAMSA_BIN_FILENAME')
+    @patch('random.getrandbits', side_effect=[10, 20])
+    def test_generate_values_reiterable(self, mock_getrandbits, mock_bin):
+        mock_bin.is_file.return_value = True
+        template = MagicMock()
+        ext = RadamsaVariable('var', CONFIG)
+        ext._generate_from_seed = MagicMock(side_effect=lambda seed, count, arg: [f'{seed}-{arg}'])
+        assert ext.reiterable
+        assert list(ext.generate_values(template)) == ['1-10', '2-20']
+        assert list(ext.generate_values(template)) == ['1-10', '2-20']
+        assert mock_getrandbits.call_count == 2
@@ -164,3 +164,10 @@ def test_stringvar5():
     generatedExps = strVar.generate_values(TraceTemplate())
     for x in generatedExps:
         assert x == '56' or x == 'dance' or re.match('^\\d+\\.\\d+\\.\\d+\\.\\d+$', x)
+
+
+def test_stringvar_indexed_values():
+    strVar = StringVariable(name=getName(), config={'values': ['a', 'b']})
+    assert strVar.indexed_values(TraceTemplate()) == ['a', 'b']
+    strVar = StringVariable(name=getName(), config={'regex': {'pattern': 'a+', 'count': 2}})
+    assert strVar.indexed_values(TraceTemplate()) is None
@@ -0,0 +1,117 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from differ import workqueue
+from differ.core import Project, TraceContext, TraceTemplate
+
+
+def make_project(tmp_path: Path) -> Project:
+    template = TraceTemplate(id='001')
+    project = Project('test', tmp_path / 'test', Path('/bin/true'), templates=[template])
+    project.directory.mkdir()
+    return project
+
+
+def publish(tmp_path: Path, **kwargs) -> tuple[workqueue.WorkQueue, Project]:
+    project = make_project(tmp_path)
+    queue = workqueue.WorkQueue(tmp_path / 'queue.db', **kwargs)
+    contexts = [
+        TraceContext(project.templates[0], {'x': 1}, id='001-001'),
+        TraceContext(project.templates[0], {'x': 2}, id='001-002'),
+    ]
+    assert queue.publish(project, tmp_path / 'test.yml', contexts) == 2
+    return queue, project
+
+
+class TestWorkQueue:
+    def test_publish_claim(self, tmp_path):
+        queue, project = publish(tmp_path)
+        # contexts are only published once
+        assert queue.publish(project, tmp_path / 'test.yml', []) == 0
+        assert queue.unfinished_count() == 2
+
+        task = queue.claim('worker-1')
+        assert task.context_id == '001-001'
+        assert task.values == {'x': 1}
+        assert task.project_filename == str(tmp_path / 'test.yml')
+        assert task.worker == 'worker-1'
+        assert task.attempts == 1
+        context = task.create_context(project)
+        assert context.template is project.templates[0]
+        assert context.id == '001-001'
+
+        assert queue.claim('worker-2').context_id == '001-002'
+        assert queue.claim('worker-3') is None
+        assert queue.unfinished_count() == 2
+
+    def test_create_context_missing_template(self, tmp_path):
+        queue, project = publish(tmp_path)
+        task = queue.claim('worker-1')
+        task.template_id = 'missing'
+        with pytest.raises(ValueError):
+            task.create_context(project)
+
+    def test_complete_collect(self, tmp_path):
+        queue, project = publish(tmp_path)
+        task = queue.claim('worker-1')
+        (project.directory / 'trace-001-001').mkdir()
+        (project.directory / 'trace-001-001' / 'context.yml').write_text('id: 001-001\n')
+        (project.directory / 'report-__original__-error-001-001.yml').write_text('error\n')
+
+        artifact = queue.create_artifact(task, project)
+        assert artifact.parent == queue.artifact_directory
+        assert queue.renew(task)
+        assert queue.complete(task, 1, artifact)
+        assert queue.unfinished_count() == 1
+
+        collected = queue.collect('test')
+        assert [(item.context_id, item.state, item.errors) for item in collected] == [
+            ('001-001', 'done', 1)
+        ]
+
+        (tmp_path / 'coordinator').mkdir()
+        extract = make_project(tmp_path / 'coordinator')
+        queue.extract_artifact(collected[0], extract)
+        assert (extract.directory / 'trace-001-001' / 'context.yml').is_file()
+        assert (extract.directory / 'report-__original__-error-001-001.yml').is_file()
+        assert not artifact.exists()
+
+        # finished tasks are returned until they are acknowledged
+        assert len(queue.collect('test')) == 1
+        queue.acknowledge(collected[0])
+        assert queue.collect('test') == []
+
+    def test_lease_expired(self, tmp_path):
+        queue, project = publish(tmp_path, lease_seconds=10.0, max_attempts=2)
+        with patch.object(workqueue.time, 'time', return_value=1000.0):
+            task = queue.claim('worker-1')
+        with patch.object(workqueue.time, 'time', return_value=1011.0):
+            retry = queue.claim('worker-2')
+        assert retry.id == task.id
+        assert retry.attempts == 2
+
+        # the first worker lost the lease and its result is discarded
+        assert not queue.renew(task)
+        artifact = queue.artifact_directory / 'stale.tar.gz'
+        artifact.touch()
+        assert not queue.complete(task, 0, artifact)
+        assert not artifact.exists()
+
+        with patch.object(workqueue.time, 'time', return_value=1100.0):
+            collected = queue.collect('test')
+        # the task was claimed max_attempts times
+        assert [(item.id, item.state, item.errors) for item in collected] == [
+            (task.id, 'failed', 1)
+        ]
+
+    def test_release(self, tmp_path):
+        queue, project = publish(tmp_path)
+        task = queue.claim('worker-1')
+        queue.release(task)
+        assert queue.claim('worker-2').id == task.id
+
+    def test_extract_artifact_none(self, tmp_path):
+        queue = workqueue.WorkQueue(tmp_path / 'queue.db')
+        queue.extract_artifact(MagicMock(artifact=''), MagicMock())
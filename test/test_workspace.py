@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from differ import workspace
+from differ.workspace import TraceWorkspace
+
+
+def make_workspace(tmp_path: Path, max_size: int = 0) -> TraceWorkspace:
+    (tmp_path / 'shm').mkdir()
+    (tmp_path / 'reports').mkdir()
+    return TraceWorkspace(tmp_path / 'shm', max_size)
+
+
+class TestTraceWorkspace:
+    def test_root(self, tmp_path):
+        app = TraceWorkspace(tmp_path, 10)
+        assert app.root == tmp_path / f'differ-{os.getpid()}'
+        assert app.max_size == 10
+
+    def test_create(self, tmp_path):
+        app = make_workspace(tmp_path)
+        context_dir = tmp_path / 'reports' / 'trace-001-001'
+        assert app.create(context_dir)
+        assert context_dir.is_symlink()
+        assert context_dir.readlink() == app.root / 'reports' / 'trace-001-001'
+        assert app.is_linked(context_dir)
+
+    @patch.object(workspace, 'directory_size', return_value=100)
+    def test_create_full(self, mock_size, tmp_path):
+        app = make_workspace(tmp_path, max_size=100)
+        app.root.mkdir()
+        context_dir = tmp_path / 'reports' / 'trace-001-001'
+        assert not app.create(context_dir)
+        assert not context_dir.exists()
+        mock_size.assert_called_once_with(app.root)
+
+    def test_persist(self, tmp_path):
+        app = make_workspace(tmp_path)
+        context_dir = tmp_path / 'reports' / 'trace-001-001'
+        app.create(context_dir)
+        directory = context_dir.readlink()
+        (context_dir / '__original__').mkdir()
+        (context_dir / '__original__' / 'stdout').write_text('hello')
+        (context_dir / '__original__' / 'binary').symlink_to('/bin/true')
+
+        app.persist(context_dir)
+        assert not context_dir.is_symlink()
+        assert (context_dir / '__original__' / 'stdout').read_text() == 'hello'
+        assert (context_dir / '__original__' / 'binary').readlink() == Path('/bin/true')
+        assert not directory.exists()
+
+    def test_discard(self, tmp_path):
+        app = make_workspace(tmp_path)
+        context_dir = tmp_path / 'reports' / 'trace-001-001'
+        app.create(context_dir)
+        directory = context_dir.readlink()
+        (context_dir / 'context.yml').write_text('x')
+
+        app.discard(context_dir)
+        assert not context_dir.exists()
+        assert not context_dir.is_symlink()
+        assert not directory.exists()
+
+    def test_persist_discard_on_disk(self, tmp_path):
+        app = make_workspace(tmp_path)
+        context_dir = tmp_path / 'reports' / 'trace-001-001'
+        context_dir.mkdir()
+        app.persist(context_dir)
+        app.discard(context_dir)
+        assert context_dir.is_dir()
+
+    def test_cleanup(self, tmp_path):
+        app = make_workspace(tmp_path)
+        app.create(tmp_path / 'reports' / 'trace-001-001')
+        app.cleanup()
+        assert not app.root.exists()
+
+    def test_directory_size(self, tmp_path):
+        (tmp_path / 'sub').mkdir()
+        (tmp_path / 'sub' / 'data').write_bytes(b'x' * 10000)
+        assert workspace.directory_size(tmp_path) >= 10000